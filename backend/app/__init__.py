@@ -4,8 +4,9 @@ DeepKod后端应用程序包
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import practice
+from .routes import practice, health
 from .database import init_db
+from .components import components
 
 
 def create_app() -> FastAPI:
@@ -32,8 +33,17 @@ def create_app() -> FastAPI:
     )
     
     # 注册路由
+    app.include_router(health.router)
     app.include_router(practice.router)
     
+    # 重量级组件在后台加载预热，不阻塞端口绑定
+    app.add_event_handler("startup", components.start_warm_up)
+    app.add_event_handler("shutdown", components.close)
+    
+    # 后台生成任务的worker协程随服务启动
+    app.add_event_handler("startup", practice.generation_jobs.start)
+    app.add_event_handler("shutdown", practice.generation_jobs.stop)
+    
     # 初始化数据库
     init_db()
     
@@ -0,0 +1,229 @@
+"""
+组件管理模块，延迟构建重量级组件并在后台预热
+"""
+import time
+import threading
+from typing import Dict, Any
+
+
+class ComponentRegistry:
+    """
+    组件注册表
+    
+    检索引擎（向量模型、FAISS索引、ES客户端）、查询解析器与题目生成器
+    都在首次使用或后台预热时才构建，导入应用时不再加载torch和索引。
+    预热失败（如ES或索引尚未就绪）时按指数退避重试，连续失败过多时存活检查失败。
+    """
+    
+    # 预热时编码的查询
+    WARM_UP_QUERY = "反转链表"
+    
+    def __init__(self):
+        """初始化组件注册表"""
+        self._lock = threading.RLock()
+        self._search_engine = None
+        self._deepseek_client = None
+        self._query_parser = None
+        self._question_generator = None
+        self._generation_cache = None
+        self._duplicate_gate = None
+        self._ready = threading.Event()
+        self._warm_up_thread = None
+        self._stopped = threading.Event()
+        self.warm_up_failures = 0
+        self.started_at = time.monotonic()
+        self.error = None
+        self.timings = {}
+    
+    @property
+    def search_engine(self):
+        """混合检索引擎"""
+        if self._search_engine is None:
+            with self._lock:
+                if self._search_engine is None:
+                    from .core.matching.hybrid_search import HybridSearchEngine
+                    started = time.perf_counter()
+                    self._search_engine = HybridSearchEngine()
+                    self.timings["search_engine_seconds"] = time.perf_counter() - started
+        return self._search_engine
+    
+    @property
+    def deepseek_client(self):
+        """DeepSeek客户端，查询解析器与题目生成器共享连接池与熔断器"""
+        if self._deepseek_client is None:
+            with self._lock:
+                if self._deepseek_client is None:
+                    from .config import active_config
+                    from .core.deepseek_client import DeepSeekClient, CircuitBreaker
+                    from .core.rate_limit import TokenBucket, RedisTokenBucket
+                    rate_limiter = None
+                    if active_config.DEEPSEEK_RATE_LIMIT > 0:
+                        redis_client = None
+                        if active_config.DEEPSEEK_RATE_LIMIT_REDIS:
+                            from .core.matching.cache import connect_redis
+                            redis_client = connect_redis(
+                                active_config.REDIS_HOST, active_config.REDIS_PORT, active_config.REDIS_DB
+                            )
+                        if redis_client is not None:
+                            rate_limiter = RedisTokenBucket(
+                                redis_client, active_config.DEEPSEEK_RATE_LIMIT_KEY, active_config.DEEPSEEK_RATE_LIMIT
+                            )
+                        else:
+                            rate_limiter = TokenBucket(active_config.DEEPSEEK_RATE_LIMIT)
+                    self._deepseek_client = DeepSeekClient(
+                        active_config.DEEPSEEK_API_KEY,
+                        active_config.DEEPSEEK_API_URL,
+                        max_connections=active_config.DEEPSEEK_MAX_CONNECTIONS,
+                        max_concurrency=active_config.DEEPSEEK_MAX_CONCURRENCY,
+                        timeout=active_config.DEEPSEEK_TIMEOUT,
+                        max_retries=active_config.DEEPSEEK_MAX_RETRIES,
+                        backoff_base=active_config.DEEPSEEK_BACKOFF_BASE,
+                        backoff_max=active_config.DEEPSEEK_BACKOFF_MAX,
+                        breaker=CircuitBreaker(
+                            failure_threshold=active_config.DEEPSEEK_BREAKER_FAILURES,
+                            reset_timeout=active_config.DEEPSEEK_BREAKER_RESET
+                        ),
+                        rate_limiter=rate_limiter
+                    )
+        return self._deepseek_client
+    
+    @property
+    def query_parser(self):
+        """查询解析器"""
+        if self._query_parser is None:
+            with self._lock:
+                if self._query_parser is None:
+                    from .core.NLP.deepseek_nlp import QueryParser
+                    self._query_parser = QueryParser(self.deepseek_client)
+        return self._query_parser
+    
+    @property
+    def question_generator(self):
+        """题目生成器"""
+        if self._question_generator is None:
+            with self._lock:
+                if self._question_generator is None:
+                    from .config import active_config
+                    from .core.generation.deepseek_generation import QuestionGenerator
+                    self._question_generator = QuestionGenerator(
+                        self.deepseek_client, mode=active_config.GENERATION_MODE
+                    )
+        return self._question_generator
+    
+    @property
+    def generation_cache(self):
+        """生成结果语义缓存"""
+        if self._generation_cache is None:
+            with self._lock:
+                if self._generation_cache is None:
+                    from .config import active_config
+                    from .core.generation.generation_cache import GenerationCache
+                    self._generation_cache = GenerationCache(
+                        threshold=active_config.GENERATION_CACHE_THRESHOLD,
+                        max_size=active_config.GENERATION_CACHE_SIZE,
+                        ttl=active_config.GENERATION_CACHE_TTL
+                    )
+        return self._generation_cache
+    
+    @property
+    def duplicate_gate(self):
+        """生成题目近重复检测"""
+        if self._duplicate_gate is None:
+            with self._lock:
+                if self._duplicate_gate is None:
+                    from .config import active_config
+                    from .core.generation.dedup import DuplicateGate
+                    self._duplicate_gate = DuplicateGate(
+                        self.search_engine,
+                        threshold=active_config.GENERATION_DEDUP_THRESHOLD,
+                        buffer_size=active_config.GENERATION_DEDUP_BUFFER
+                    )
+        return self._duplicate_gate
+    
+    @property
+    def ready(self) -> bool:
+        """组件是否已加载并完成预热"""
+        return self._ready.is_set()
+    
+    @property
+    def live(self) -> bool:
+        """连续预热失败次数是否未超过上限（超过后进程应被重启）"""
+        from .config import active_config
+        max_failures = active_config.WARM_UP_MAX_FAILURES
+        return self.ready or max_failures <= 0 or self.warm_up_failures < max_failures
+    
+    def start_warm_up(self):
+        """在后台线程中构建组件并预热，不阻塞服务启动"""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+                self._warm_up_thread.start()
+    
+    def warm_up(self):
+        """构建全部组件并预热，失败时按指数退避重试，直到成功或服务关闭"""
+        from .config import active_config
+        delay = active_config.WARM_UP_BACKOFF_BASE
+        while not self._stopped.is_set():
+            if self._warm_up_once():
+                return
+            self.warm_up_failures += 1
+            print(f"组件预热第{self.warm_up_failures}次失败，{delay:.1f}秒后重试")
+            self._stopped.wait(delay)
+            delay = min(delay * 2, active_config.WARM_UP_BACKOFF_MAX)
+    
+    def _warm_up_once(self) -> bool:
+        """
+        构建全部组件，并执行一次预热编码和检索
+        
+        Returns:
+            bool: 是否预热成功
+        """
+        try:
+            self.query_parser
+            self.question_generator
+            engine = self.search_engine
+            
+            started = time.perf_counter()
+            engine.warm_up(self.WARM_UP_QUERY)
+            self.timings["warm_up_seconds"] = time.perf_counter() - started
+            
+            self.error = None
+            self.timings["ready_after_seconds"] = time.monotonic() - self.started_at
+            self._ready.set()
+            return True
+        except Exception as e:
+            self.error = str(e)
+            print(f"组件预热失败: {str(e)}")
+            return False
+    
+    async def close(self):
+        """服务关闭时停止预热重试并释放DeepSeek连接池"""
+        self._stopped.set()
+        if self._deepseek_client is not None:
+            await self._deepseek_client.close()
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        获取组件状态
+        
+        Returns:
+            Dict[str, Any]: 各组件是否已加载、预热耗时及错误信息
+        """
+        return {
+            "ready": self.ready,
+            "components": {
+                "search_engine": self._search_engine is not None,
+                "query_parser": self._query_parser is not None,
+                "question_generator": self._question_generator is not None,
+                "generation_cache": self._generation_cache is not None,
+                "duplicate_gate": self._duplicate_gate is not None
+            },
+            "deepseek": self._deepseek_client.stats() if self._deepseek_client is not None else None,
+            "timings": dict(self.timings),
+            "warm_up_failures": self.warm_up_failures,
+            "error": self.error
+        }
+
+
+# 全局组件注册表
+components = ComponentRegistry()
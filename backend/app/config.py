@@ -19,25 +19,89 @@ class Config:
     # DeepSeek API配置
     DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
     DEEPSEEK_API_URL = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1")
+    DEEPSEEK_MAX_CONNECTIONS = int(os.getenv("DEEPSEEK_MAX_CONNECTIONS", "20"))  # 连接池最大连接数
+    DEEPSEEK_MAX_CONCURRENCY = int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "8"))  # 同时进行的最大请求数
+    DEEPSEEK_TIMEOUT = float(os.getenv("DEEPSEEK_TIMEOUT", "30"))  # 单次请求默认超时（秒），查询解析固定为10秒
+    DEEPSEEK_MAX_RETRIES = int(os.getenv("DEEPSEEK_MAX_RETRIES", "2"))  # 429/5xx及网络错误的最大重试次数
+    DEEPSEEK_BACKOFF_BASE = float(os.getenv("DEEPSEEK_BACKOFF_BASE", "0.5"))  # 重试退避基数（秒）
+    DEEPSEEK_BACKOFF_MAX = float(os.getenv("DEEPSEEK_BACKOFF_MAX", "8"))  # 单次退避上限（秒）
+    DEEPSEEK_BREAKER_FAILURES = int(os.getenv("DEEPSEEK_BREAKER_FAILURES", "5"))  # 连续失败多少次后熔断
+    DEEPSEEK_BREAKER_RESET = float(os.getenv("DEEPSEEK_BREAKER_RESET", "30"))  # 熔断后放行探测请求前的冷却时间（秒）
+    DEEPSEEK_RATE_LIMIT = float(os.getenv("DEEPSEEK_RATE_LIMIT", "0"))  # 每秒最多发出的请求数（含重试），0表示不限流
+    DEEPSEEK_RATE_LIMIT_REDIS = os.getenv("DEEPSEEK_RATE_LIMIT_REDIS", "False").lower() in ("true", "1", "t")  # 是否通过Redis与其他进程（worker、批量脚本）共享限流配额
+    DEEPSEEK_RATE_LIMIT_KEY = os.getenv("DEEPSEEK_RATE_LIMIT_KEY", "deepkod:ratelimit:deepseek")  # 共享令牌桶在Redis中的键
+    GENERATION_MODE = os.getenv("GENERATION_MODE", "combined")  # 生成模式：combined（一次调用生成题目、解决方案与测试用例）或two_step
+    GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))  # 后台生成任务的worker协程数
+    GENERATION_JOB_MAX_PENDING = int(os.getenv("GENERATION_JOB_MAX_PENDING", "100"))  # 排队与执行中生成任务的上限
+    GENERATION_JOB_TTL = int(os.getenv("GENERATION_JOB_TTL", "3600"))  # 已结束生成任务的保留时间（秒）
     
     # Elasticsearch配置
     ELASTICSEARCH_HOST = os.getenv("ELASTICSEARCH_HOST", "localhost")
     ELASTICSEARCH_PORT = int(os.getenv("ELASTICSEARCH_PORT", "9200"))
+    ELASTICSEARCH_INDEX = os.getenv("ELASTICSEARCH_INDEX", "kodcode")
+    
+    # 精确匹配配置
+    LEXICAL_BACKEND = os.getenv("LEXICAL_BACKEND", "elasticsearch")  # 精确匹配后端：elasticsearch或bm25（进程内倒排索引）
+    BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", "data/bm25_index")
+    
+    # 检索后端配置
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "faiss_es")  # 检索后端：faiss_es（FAISS与ES两路合并）或es_knn（ES dense_vector单次请求）
+    ES_KNN_NUM_CANDIDATES = int(os.getenv("ES_KNN_NUM_CANDIDATES", "100"))  # ES kNN每个分片的候选数量
+    ES_KNN_BOOST = float(os.getenv("ES_KNN_BOOST", "0.7"))  # ES kNN向量得分权重
+    ES_KNN_QUERY_BOOST = float(os.getenv("ES_KNN_QUERY_BOOST", "0.3"))  # ES kNN关键词得分权重
+    
+    # 混合排序配置
+    FUSION_STRATEGY = os.getenv("FUSION_STRATEGY", "rank")  # 融合策略：rank（按名次加权）、rrf、minmax、zscore
+    FUSION_SEMANTIC_WEIGHT = float(os.getenv("FUSION_SEMANTIC_WEIGHT", "0.7"))  # 语义检索权重
+    FUSION_EXACT_WEIGHT = float(os.getenv("FUSION_EXACT_WEIGHT", "0.3"))  # 精确匹配权重
+    FUSION_RRF_K = int(os.getenv("FUSION_RRF_K", "60"))  # RRF平滑常数
     
     # Redis配置
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_DB = int(os.getenv("REDIS_DB", "0"))
     
+    # 索引包配置
+    INDEX_BUNDLE_ROOT = os.getenv("INDEX_BUNDLE_ROOT", "data/bundles")  # 版本化索引包目录，存在CURRENT时优先于下面的单文件路径
+    INDEX_BUNDLE_CHECK_INTERVAL = float(os.getenv("INDEX_BUNDLE_CHECK_INTERVAL", "5"))  # 检查新发布索引包的间隔（秒）
+    INDEX_BUNDLE_DRAIN_TIMEOUT = float(os.getenv("INDEX_BUNDLE_DRAIN_TIMEOUT", "30"))  # 切换后等待旧索引包上的查询结束的最长时间（秒）
+    
     # 向量检索配置
     FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/kodcode_index.faiss")
+    FAISS_MMAP = os.getenv("FAISS_MMAP", "True").lower() in ("true", "1", "t")  # 是否以mmap方式加载FAISS索引
+    INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", "data/index_manifest.json")
+    METADATA_STORE_PATH = os.getenv("METADATA_STORE_PATH", "data/metadata_store")
+    EMBEDDINGS_PATH = os.getenv("EMBEDDINGS_PATH", "data/embeddings.npy")
+    FILTER_EXACT_MAX_CANDIDATES = int(os.getenv("FILTER_EXACT_MAX_CANDIDATES", "4096"))  # 过滤后候选不超过该值时精确计算
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+    ENCODER_BATCH_WINDOW_MS = float(os.getenv("ENCODER_BATCH_WINDOW_MS", "5"))  # 查询编码批处理窗口（毫秒）
+    ENCODER_MAX_BATCH_SIZE = int(os.getenv("ENCODER_MAX_BATCH_SIZE", "32"))  # 查询编码单批最大查询数
+    SEARCH_THREADS = int(os.getenv("SEARCH_THREADS", "8"))  # 异步检索路径的线程池大小
+    SEARCH_ASYNC = os.getenv("SEARCH_ASYNC", "True").lower() in ("true", "1", "t")  # 是否使用异步检索路径
+    SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "32"))  # 批量检索单次最多查询数
+    DELTA_LOG_PATH = os.getenv("DELTA_LOG_PATH", "data/delta.jsonl")  # 增量题目追加日志
+    DELTA_REFRESH_INTERVAL = float(os.getenv("DELTA_REFRESH_INTERVAL", "1"))  # 读取其他worker写入的增量题目的间隔（秒）
+    
+    # 组件预热配置
+    WARM_UP_BACKOFF_BASE = float(os.getenv("WARM_UP_BACKOFF_BASE", "1"))  # 预热失败后首次重试前的等待时间（秒），之后按指数退避
+    WARM_UP_BACKOFF_MAX = float(os.getenv("WARM_UP_BACKOFF_MAX", "60"))  # 预热重试的最长等待时间（秒）
+    WARM_UP_MAX_FAILURES = int(os.getenv("WARM_UP_MAX_FAILURES", "10"))  # 连续预热失败达到该次数后/healthz返回503，由编排系统重启进程，0表示不限
     
     # 沙箱配置
     SANDBOX_TIMEOUT = int(os.getenv("SANDBOX_TIMEOUT", "10"))  # 沙箱执行超时时间（秒）
     
     # 缓存配置
     CACHE_EXPIRATION = int(os.getenv("CACHE_EXPIRATION", "3600"))  # 缓存过期时间（秒）
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))  # 查询向量缓存最大条目数
+    EMBEDDING_CACHE_REDIS = os.getenv("EMBEDDING_CACHE_REDIS", "False").lower() in ("true", "1", "t")  # 是否启用Redis共享向量缓存
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2000"))  # 检索结果缓存最大条目数
+    RESULT_CACHE_REDIS = os.getenv("RESULT_CACHE_REDIS", "False").lower() in ("true", "1", "t")  # 是否启用Redis共享结果缓存
+    INDEX_VERSION_CHECK_INTERVAL = int(os.getenv("INDEX_VERSION_CHECK_INTERVAL", "10"))  # ES索引版本检查间隔（秒）
+    GENERATION_CACHE_THRESHOLD = float(os.getenv("GENERATION_CACHE_THRESHOLD", "0.92"))  # 复用生成结果所需的最小查询余弦相似度
+    GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1000"))  # 生成结果缓存最大条目数
+    GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "86400"))  # 生成结果缓存过期时间（秒）
+    GENERATION_DEDUP_THRESHOLD = float(os.getenv("GENERATION_DEDUP_THRESHOLD", "0.9"))  # 生成题目与已有题目的余弦相似度达到该值时视为重复，返回已有题目
+    GENERATION_DEDUP_BUFFER = int(os.getenv("GENERATION_DEDUP_BUFFER", "256"))  # 参与去重比较的最近生成题目数量
 
 
 # 开发环境配置
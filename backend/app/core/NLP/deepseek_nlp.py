@@ -3,10 +3,9 @@ DeepSeek NLP模块，用于解析用户意图
 """
 import re
 import json
-import requests
 from typing import Dict, Any, List, Optional
 
-from ...config import active_config
+from ..deepseek_client import DeepSeekClient, DeepSeekError
 
 
 class QueryParser:
@@ -62,10 +61,14 @@ class QueryParser:
         "排序": "Sorting",
     }
     
-    def __init__(self):
-        """初始化查询解析器"""
-        self.api_key = active_config.DEEPSEEK_API_KEY
-        self.api_url = f"{active_config.DEEPSEEK_API_URL}/chat/completions"
+    def __init__(self, client: DeepSeekClient):
+        """
+        初始化查询解析器
+        
+        Args:
+            client: 共享的DeepSeek客户端
+        """
+        self.client = client
     
     def parse_with_rules(self, query: str) -> Dict[str, Any]:
         """
@@ -104,7 +107,7 @@ class QueryParser:
         
         return result
     
-    def parse_with_deepseek(self, query: str) -> Dict[str, Any]:
+    async def parse_with_deepseek(self, query: str) -> Dict[str, Any]:
         """
         使用DeepSeek API解析查询意图
         
@@ -114,7 +117,7 @@ class QueryParser:
         Returns:
             Dict[str, Any]: 解析结果
         """
-        if not self.api_key:
+        if not self.client.enabled:
             # 如果没有API密钥，回退到规则引擎
             return self.parse_with_rules(query)
         
@@ -134,46 +137,35 @@ class QueryParser:
         仅返回JSON格式，不要有其他文本。
         """
         
-        # 调用DeepSeek API
+        # 调用DeepSeek API（熔断时立即失败）
         try:
-            response = requests.post(
-                self.api_url,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                },
-                json={
-                    "model": "deepseek-coder",
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 500
-                },
+            content = await self.client.chat(
+                [{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=500,
                 timeout=10
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                # 提取JSON
-                try:
-                    parsed_result = json.loads(content)
-                    # 添加原始查询
-                    parsed_result["original_query"] = query
-                    return parsed_result
-                except json.JSONDecodeError:
-                    # 如果解析失败，回退到规则引擎
+            # 提取JSON
+            try:
+                parsed_result = json.loads(content)
+                if not isinstance(parsed_result, dict):
+                    # 合法JSON但不是对象（null、列表或字符串），回退到规则引擎
                     return self.parse_with_rules(query)
+                # 添加原始查询
+                parsed_result["original_query"] = query
+                return parsed_result
+            except json.JSONDecodeError:
+                # 如果解析失败，回退到规则引擎
+                return self.parse_with_rules(query)
             
-        except Exception as e:
+        except DeepSeekError as e:
             print(f"DeepSeek API调用失败: {str(e)}")
         
         # 如果API调用失败，回退到规则引擎
         return self.parse_with_rules(query)
     
-    def parse(self, query: str) -> Dict[str, Any]:
+    async def parse(self, query: str) -> Dict[str, Any]:
         """
         解析用户查询，结合规则引擎和DeepSeek API
         
@@ -188,6 +180,6 @@ class QueryParser:
         
         # 如果规则引擎无法提取足够信息，使用DeepSeek API
         if not any([rule_result["difficulty"], rule_result["data_structure"], rule_result["technique"]]):
-            return self.parse_with_deepseek(query)
+            return await self.parse_with_deepseek(query)
         
         return rule_result
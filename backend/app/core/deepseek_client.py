@@ -0,0 +1,449 @@
+"""
+DeepSeek API客户端模块，查询解析与题目生成共用
+
+所有DeepSeek调用共享连接池（HTTP keep-alive，省去每次调用的TCP+TLS握手），
+以信号量限制并发请求数，对429/5xx及网络错误按带抖动的指数退避重试，
+上游持续失败时熔断，调用方立即回退（查询解析回退到规则引擎），不再占用连接等待超时。
+"""
+import json
+import time
+import random
+import asyncio
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class DeepSeekError(Exception):
+    """DeepSeek API调用失败"""
+
+
+class CircuitOpenError(DeepSeekError):
+    """熔断器打开，请求未发出"""
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败达到阈值后打开，冷却期内拒绝请求；冷却结束后放行一个探测请求，
+    成功则关闭，失败则重新打开
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        初始化熔断器
+        
+        Args:
+            failure_threshold: 打开熔断器所需的连续失败次数
+            reset_timeout: 打开后到放行探测请求的冷却时间（秒）
+        """
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self.times_opened = 0
+    
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+    
+    def allow(self) -> bool:
+        """
+        判断是否放行请求
+        
+        Returns:
+            bool: 是否放行
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # 冷却结束，同一时间只放行一个探测请求（探测请求被取消时，超过冷却时间后重新放行）
+            if self._probing and now - self._probe_started < self.reset_timeout:
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            self._probe_started = now
+            return True
+    
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+    
+    def record_failure(self):
+        """记录一次失败调用"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class DeepSeekClient:
+    """
+    DeepSeek异步客户端
+    
+    aiohttp的会话与信号量绑定创建它们的事件循环，每个事件循环各持有一份，
+    循环结束后随之回收；熔断器与统计在全部事件循环间共享。
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str,
+        model: str = "deepseek-coder",
+        max_connections: int = 20,
+        max_concurrency: int = 8,
+        timeout: float = 30,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8,
+        breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional[Any] = None
+    ):
+        """
+        初始化客户端
+        
+        Args:
+            api_key: API密钥，为空时客户端不可用
+            base_url: API地址（可指向本地桩服务）
+            model: 模型名称
+            max_connections: 连接池最大连接数
+            max_concurrency: 同时进行的最大请求数
+            timeout: 默认单次请求超时（秒）
+            max_retries: 最大重试次数
+            backoff_base: 退避基数（秒）
+            backoff_max: 单次退避上限（秒），同时限制Retry-After
+            breaker: 熔断器
+            rate_limiter: 限流器（提供async acquire()，如TokenBucket），每次发出请求（含重试）前取令牌
+        """
+        self.api_key = api_key
+        self.api_url = f"{base_url.rstrip('/')}/chat/completions"
+        self.model = model
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        
+        # 事件循环 -> (会话, 信号量)
+        self._loops = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._rejected = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """是否配置了API密钥"""
+        return bool(self.api_key)
+    
+    def _session(self):
+        """
+        获取当前事件循环的会话与信号量，首次使用时创建
+        
+        Returns:
+            Tuple[aiohttp.ClientSession, asyncio.Semaphore]: 会话与信号量
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._loops.get(loop)
+            if entry is None or entry[0].closed:
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                    headers={
+                        "Content-Type": "application/json",
+                        "Authorization": f"Bearer {self.api_key}"
+                    }
+                )
+                entry = (session, asyncio.Semaphore(self.max_concurrency))
+                self._loops[loop] = entry
+            return entry
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        计算重试前的等待时间
+        
+        Args:
+            attempt: 已失败的次数（从0开始）
+            retry_after: 响应的Retry-After头（秒数）
+        
+        Returns:
+            float: 等待时间（秒）
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        # 全抖动：并发失败的请求错开重试时间，避免同时再次冲击上游
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _admit(self):
+        """
+        检查客户端是否可用、熔断器是否放行
+        
+        Raises:
+            CircuitOpenError: 熔断器打开
+            DeepSeekError: 未配置API密钥
+        """
+        if not self.enabled:
+            raise DeepSeekError("未配置DEEPSEEK_API_KEY")
+        if not self.breaker.allow():
+            with self._lock:
+                self._rejected += 1
+            raise CircuitOpenError("DeepSeek API熔断中")
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        调用chat/completions接口
+        
+        Args:
+            messages: 对话消息
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            timeout: 单次请求超时（秒），默认使用客户端配置
+        
+        Returns:
+            str: 模型回复内容
+        
+        Raises:
+            CircuitOpenError: 熔断器打开
+            DeepSeekError: 重试后仍然失败
+        """
+        content, _ = await self.chat_completion(messages, temperature, max_tokens, timeout)
+        return content
+    
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        调用chat/completions接口，同时返回token用量
+        
+        Args:
+            messages: 对话消息
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            timeout: 单次请求超时（秒），默认使用客户端配置
+        
+        Returns:
+            Tuple[str, Dict[str, int]]: 模型回复内容与token用量（prompt_tokens、completion_tokens）
+        
+        Raises:
+            CircuitOpenError: 熔断器打开
+            DeepSeekError: 重试后仍然失败
+        """
+        self._admit()
+        session, semaphore = self._session()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        request_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        
+        error = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            with self._lock:
+                self._requests += 1
+                if attempt:
+                    self._retries += 1
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                # 退避等待时不占用并发名额
+                async with semaphore:
+                    async with session.post(self.api_url, json=payload, timeout=request_timeout) as response:
+                        if response.status == 200:
+                            result = await response.json(content_type=None)
+                            # 响应结构不符合预期（如choices为空或null）时按可重试错误处理
+                            usage = result.get("usage") or {}
+                            content = result["choices"][0]["message"]["content"]
+                            usage = {
+                                "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+                                "completion_tokens": int(usage.get("completion_tokens", 0))
+                            }
+                            self.breaker.record_success()
+                            return content, usage
+                        retry_after = response.headers.get("Retry-After")
+                        error = DeepSeekError(f"HTTP {response.status}: {(await response.text())[:200]}")
+            except (
+                aiohttp.ClientError, asyncio.TimeoutError, KeyError, IndexError, TypeError, AttributeError, ValueError
+            ) as e:
+                error = DeepSeekError(f"{type(e).__name__}: {str(e)}")
+            else:
+                if response.status not in RETRY_STATUSES:
+                    # 其他4xx是请求本身的问题，上游可用，不计入熔断
+                    self.breaker.record_success()
+                    with self._lock:
+                        self._failures += 1
+                    raise error
+            
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        
+        with self._lock:
+            self._failures += 1
+        self.breaker.record_failure()
+        raise error
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        以流式方式（stream=true）调用chat/completions接口，逐段产出模型回复
+        
+        开始产出内容之前的失败按chat的规则重试；已产出内容后连接中断则直接失败，
+        由调用方决定是否重新生成。
+        
+        Args:
+            messages: 对话消息
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            timeout: 建立连接及两次读取之间的超时（秒），默认使用客户端配置
+        
+        Returns:
+            AsyncIterator[str]: 回复内容的增量片段
+        
+        Raises:
+            CircuitOpenError: 熔断器打开
+            DeepSeekError: 重试后仍然失败，或输出中途中断
+        """
+        self._admit()
+        session, semaphore = self._session()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        # 流式输出的总时长随生成长度变化，只限制连接与读取间隔
+        request_timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=timeout or self.timeout, sock_read=timeout or self.timeout
+        )
+        
+        error = None
+        streamed = False
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            with self._lock:
+                self._requests += 1
+                if attempt:
+                    self._retries += 1
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                async with semaphore:
+                    async with session.post(self.api_url, json=payload, timeout=request_timeout) as response:
+                        if response.status == 200:
+                            # 服务端事件流：每个事件一行"data: {...}"，以"data: [DONE]"结束
+                            async for line in response.content:
+                                line = line.strip()
+                                if not line.startswith(b"data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == b"[DONE]":
+                                    break
+                                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                                if delta:
+                                    streamed = True
+                                    yield delta
+                            self.breaker.record_success()
+                            return
+                        retry_after = response.headers.get("Retry-After")
+                        error = DeepSeekError(f"HTTP {response.status}: {(await response.text())[:200]}")
+            except (
+                aiohttp.ClientError, asyncio.TimeoutError, KeyError, IndexError, TypeError, AttributeError, ValueError
+            ) as e:
+                error = DeepSeekError(f"{type(e).__name__}: {str(e)}")
+                if streamed:
+                    break
+            else:
+                if response.status not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    with self._lock:
+                        self._failures += 1
+                    raise error
+            
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        
+        with self._lock:
+            self._failures += 1
+        self.breaker.record_failure()
+        raise error
+    
+    async def close(self):
+        """关闭当前事件循环的会话"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._loops.pop(loop, None)
+        if entry is not None:
+            await entry[0].close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取调用统计
+        
+        Returns:
+            Dict[str, Any]: 请求、重试、失败、熔断拒绝次数及熔断器状态
+        """
+        with self._lock:
+            stats = {
+                "requests": self._requests,
+                "retries": self._retries,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "event_loops": len(self._loops)
+            }
+        stats["circuit_state"] = self.breaker.state
+        stats["circuit_opened"] = self.breaker.times_opened
+        if self.rate_limiter is not None:
+            stats["rate_limit"] = self.rate_limiter.stats()
+        return stats
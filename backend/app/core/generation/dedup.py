@@ -0,0 +1,161 @@
+"""
+生成题目近重复检测模块，写入索引与数据库之前拦截与已有题目几乎相同的生成结果
+
+生成的题目按索引的预处理方式编码，与基础索引和增量段中最相似的题目、以及本进程最近登记的
+生成题目比较余弦相似度，达到阈值即判定为重复，调用方返回已有题目，不再写入FAISS增量段、
+ES与数据库。最近生成缓冲区覆盖索引还看不到的题目（其他worker写入的增量段尚未刷新）。
+
+题目只在保存到数据库并写入索引之后才通过admit登记，缓冲区中的题目都有真实的题目ID；
+失败的生成任务不会留下记录，判定重复时返回的题目一定存在。
+"""
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class DuplicateGate:
+    """
+    线程安全的生成题目去重检查
+    """
+    
+    # 保留最近多少次检查的耗时用于计算分位数
+    METRICS_WINDOW = 1024
+    
+    # 保留最近多少条判定记录
+    DECISION_LOG_SIZE = 50
+    
+    def __init__(self, search_engine, threshold: float = 0.9, buffer_size: int = 256):
+        """
+        初始化去重检查
+        
+        Args:
+            search_engine: 混合检索引擎（提供encode_question与nearest_questions）
+            threshold: 判定为重复的最小余弦相似度
+            buffer_size: 最近登记的生成题目的保留数量
+        """
+        self.search_engine = search_engine
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # (题目摘要, 归一化向量)，只包含已保存并写入索引的题目
+        self._recent = deque(maxlen=max(int(buffer_size), 1))
+        
+        self._passed = 0
+        self._admitted = 0
+        self._duplicates = {"index": 0, "recent": 0}
+        self._encode_ms = deque(maxlen=self.METRICS_WINDOW)
+        self._lookup_ms = deque(maxlen=self.METRICS_WINDOW)
+        self._decisions = deque(maxlen=self.DECISION_LOG_SIZE)
+    
+    def check(self, question: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """
+        检查生成的题目是否与已有题目重复（不登记，保存成功后调用admit）
+        
+        Args:
+            question: 生成的题目
+        
+        Returns:
+            Tuple[Optional[Dict[str, Any]], np.ndarray]: 重复时为已有题目（含similarity与duplicate_source），
+            否则为None；以及题目向量（可传给add_question避免重复编码）
+        """
+        started = time.perf_counter()
+        vector = self.search_engine.encode_question(question)
+        encoded = time.perf_counter()
+        nearest = self.search_engine.nearest_questions(vector, top_k=1)
+        
+        duplicate, similarity, source = None, self.threshold, None
+        if nearest and nearest[0].get("score", 0.0) >= similarity:
+            duplicate, similarity, source = nearest[0], nearest[0]["score"], "index"
+        
+        with self._lock:
+            # 与最近登记的题目比较（索引可能尚未看到）
+            if self._recent:
+                scores = np.vstack([item[1] for item in self._recent]) @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= similarity:
+                    duplicate, similarity, source = dict(self._recent[best][0]), float(scores[best]), "recent"
+            
+            if duplicate is None:
+                self._passed += 1
+            else:
+                self._duplicates[source] += 1
+            
+            finished = time.perf_counter()
+            self._encode_ms.append((encoded - started) * 1000.0)
+            self._lookup_ms.append((finished - encoded) * 1000.0)
+            self._decisions.append({
+                "title": question.get("title", ""),
+                "duplicate": duplicate is not None,
+                "source": source,
+                "matched_id": duplicate.get("id") if duplicate is not None else None,
+                "matched_title": duplicate.get("title") if duplicate is not None else None,
+                "similarity": float(similarity) if duplicate is not None else None,
+                "checked_at": time.time()
+            })
+        
+        if duplicate is None:
+            return None, vector
+        print(f"生成题目与已有题目重复（{source}，相似度{similarity:.3f}）: {question.get('title', '')} -> {duplicate.get('title', '')}")
+        duplicate = dict(duplicate)
+        duplicate["similarity"] = float(similarity)
+        duplicate["duplicate_source"] = source
+        return duplicate, vector
+    
+    def admit(self, question: Dict[str, Any], vector: np.ndarray):
+        """
+        登记已保存到数据库并写入索引的生成题目，之后的检查会与其比较
+        
+        Args:
+            question: 生成的题目（id为保存时分配的题目ID）
+            vector: check返回的题目向量
+        """
+        summary = {
+            "id": question["id"],
+            "title": question.get("title", ""),
+            "description": question.get("description", ""),
+            "difficulty": question.get("difficulty"),
+            "tags": question.get("tags", [])
+        }
+        with self._lock:
+            self._recent.append((summary, vector))
+            self._admitted += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取去重统计
+        
+        Returns:
+            Dict[str, Any]: 通过检查、登记与判定重复的次数、编码与查找耗时（毫秒）及最近的判定记录
+        """
+        with self._lock:
+            passed = self._passed
+            admitted = self._admitted
+            duplicates = dict(self._duplicates)
+            encode_ms = np.array(self._encode_ms, dtype=np.float64)
+            lookup_ms = np.array(self._lookup_ms, dtype=np.float64)
+            decisions = list(self._decisions)
+        
+        def summarize(values: np.ndarray) -> Dict[str, float]:
+            if len(values) == 0:
+                return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0}
+            return {
+                "count": int(len(values)),
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99))
+            }
+        
+        checked = passed + sum(duplicates.values())
+        return {
+            "threshold": self.threshold,
+            "checked": checked,
+            "passed": passed,
+            "admitted": admitted,
+            "duplicates": duplicates,
+            "duplicate_rate": sum(duplicates.values()) / checked if checked else 0.0,
+            "encode_ms": summarize(encode_ms),
+            "lookup_ms": summarize(lookup_ms),
+            "recent_decisions": decisions
+        }
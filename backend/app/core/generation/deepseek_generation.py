@@ -2,10 +2,15 @@
 DeepSeek生成模块，用于动态生成编程题目
 """
 import json
-import requests
-from typing import Dict, Any, List, Optional
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
-from ...config import active_config
+import numpy as np
+
+from ..deepseek_client import DeepSeekClient, DeepSeekError
+from .json_stream import IncrementalJSONParser
 
 
 class QuestionGenerator:
@@ -13,12 +18,118 @@ class QuestionGenerator:
     题目生成器，用于动态生成编程题目
     """
     
-    def __init__(self):
-        """初始化题目生成器"""
-        self.api_key = active_config.DEEPSEEK_API_KEY
-        self.api_url = f"{active_config.DEEPSEEK_API_URL}/chat/completions"
+    # 保留最近多少次生成的耗时用于计算分位数
+    METRICS_WINDOW = 1024
+    
+    # 生成结果的必需字段及允许的类型，合并生成的结果按此校验
+    QUESTION_SCHEMA = {
+        "title": (str,),
+        "description": (str,),
+        "difficulty": (str,),
+        "example_input": (str, list, dict),
+        "example_output": (str, list, dict)
+    }
+    SOLUTION_SCHEMA = {
+        "solution_code": (str,),
+        "explanation": (str,),
+        "time_complexity": (str,),
+        "space_complexity": (str,),
+        "test_cases": (list,)
+    }
+    
+    def __init__(self, client: DeepSeekClient, mode: str = "combined"):
+        """
+        初始化题目生成器
+        
+        Args:
+            client: 共享的DeepSeek客户端
+            mode: 生成模式，combined（一次调用生成题目、解决方案与测试用例）或two_step（先题目后解决方案）
+        """
+        if mode not in ("combined", "two_step"):
+            raise ValueError(f"不支持的生成模式: {mode}")
+        self.client = client
+        self.mode = mode
+        
+        # 生成耗时（毫秒）与token用量：按生成模式分别记录，流式生成分别记录首个字段到达时间与总耗时
+        self._metrics_lock = threading.Lock()
+        self._latency = {
+            "two_step": deque(maxlen=self.METRICS_WINDOW),
+            "combined": deque(maxlen=self.METRICS_WINDOW)
+        }
+        self._tokens = {
+            "two_step": deque(maxlen=self.METRICS_WINDOW),
+            "combined": deque(maxlen=self.METRICS_WINDOW)
+        }
+        self._combined_fallbacks = 0
+        self._stream_first_content = deque(maxlen=self.METRICS_WINDOW)
+        self._stream_total = deque(maxlen=self.METRICS_WINDOW)
+    
+    async def generate(
+        self, 
+        query: str, 
+        parsed_intent: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        按配置的生成模式生成题目与解决方案
+        
+        合并模式下一次调用返回题目、解决方案与测试用例，校验不通过时只补齐缺失的部分：
+        题目缺少字段时回退到两步生成，仅解决方案缺少字段时单独生成解决方案。
+        
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
+            
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]: 题目与解决方案，生成失败的部分为None
+        """
+        if not self.client.enabled:
+            return None, None
+        
+        started = time.perf_counter()
+        question, solution, usage = None, None, []
+        mode = self.mode
+        
+        if mode == "combined":
+            generated, combined_usage = await self._request_json(
+                self._build_combined_prompt(query, parsed_intent), temperature=0.5, max_tokens=4000
+            )
+            usage.append(combined_usage)
+            if isinstance(generated, dict):
+                question = generated.get("question")
+                solution = generated.get("solution")
+            
+            missing_question = self._missing_fields(question, self.QUESTION_SCHEMA)
+            missing_solution = self._missing_fields(solution, self.SOLUTION_SCHEMA)
+            if missing_question or missing_solution:
+                print(f"合并生成结果缺少字段: {missing_question + missing_solution}，分步补充生成")
+                with self._metrics_lock:
+                    self._combined_fallbacks += 1
+            if missing_question:
+                question, solution = None, None
+            elif missing_solution:
+                solution = None
+            if question is not None:
+                question = self._annotate_question(question, query)
+            if solution is not None:
+                solution = self._annotate_solution(solution, question)
+        
+        if question is None:
+            question, question_usage = await self._generate_question(query, parsed_intent)
+            usage.append(question_usage)
+        if question is not None and solution is None:
+            solution, solution_usage = await self._generate_solution(question)
+            usage.append(solution_usage)
+        
+        with self._metrics_lock:
+            self._latency[mode].append((time.perf_counter() - started) * 1000.0)
+            self._tokens[mode].append((
+                sum(item.get("prompt_tokens", 0) for item in usage),
+                sum(item.get("completion_tokens", 0) for item in usage)
+            ))
+        
+        return question, solution
     
-    def generate_question(
+    async def generate_question(
         self, 
         query: str, 
         parsed_intent: Dict[str, Any]
@@ -33,9 +144,26 @@ class QuestionGenerator:
         Returns:
             Optional[Dict[str, Any]]: 生成的题目，如果生成失败则返回None
         """
-        if not self.api_key:
+        if not self.client.enabled:
             return None
+        question, _ = await self._generate_question(query, parsed_intent)
+        return question
+    
+    async def _generate_question(
+        self, 
+        query: str, 
+        parsed_intent: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, int]]:
+        """
+        生成编程题目并返回token用量
         
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
+            
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Dict[str, int]]: 生成的题目（失败为None）与token用量
+        """
         # 构建提示
         difficulty = parsed_intent.get("difficulty", "Medium")
         data_structure = parsed_intent.get("data_structure", "")
@@ -44,63 +172,109 @@ class QuestionGenerator:
         prompt = self._build_generation_prompt(query, difficulty, data_structure, technique)
         
         # 调用DeepSeek API
-        try:
-            response = requests.post(
-                self.api_url,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                },
-                json={
-                    "model": "deepseek-coder",
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 2000
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                # 提取JSON
-                try:
-                    # 查找JSON部分
-                    start_idx = content.find('{')
-                    end_idx = content.rfind('}') + 1
-                    
-                    if start_idx >= 0 and end_idx > start_idx:
-                        json_content = content[start_idx:end_idx]
-                        question = json.loads(json_content)
-                        
-                        # 添加元数据
-                        question["generated"] = True
-                        question["query"] = query
-                        
-                        return question
-                except json.JSONDecodeError:
-                    print(f"JSON解析失败: {content}")
+        question, usage = await self._request_json(prompt, temperature=0.7, max_tokens=2000)
+        if question is None:
+            return None, usage
+        return self._annotate_question(question, query), usage
+    
+    async def stream_question(
+        self, 
+        query: str, 
+        parsed_intent: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式生成编程题目，题目的每个字段（标题、描述、示例等）一生成完就产出
+        
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
             
-        except Exception as e:
+        Returns:
+            AsyncIterator[Dict[str, Any]]: 事件序列：若干{"event": "field", "field", "value"}，
+                最后是{"event": "question", "question", "timings"}，失败时为{"event": "error", "detail"}
+        """
+        if not self.client.enabled:
+            yield {"event": "error", "detail": "未配置DEEPSEEK_API_KEY"}
+            return
+        
+        difficulty = parsed_intent.get("difficulty", "Medium")
+        data_structure = parsed_intent.get("data_structure", "")
+        technique = parsed_intent.get("technique", "")
+        prompt = self._build_generation_prompt(query, difficulty, data_structure, technique)
+        
+        parser = IncrementalJSONParser()
+        started = time.perf_counter()
+        first_content = None
+        try:
+            async for chunk in self.client.chat_stream(
+                [{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=2000
+            ):
+                for field, value in parser.feed(chunk):
+                    if first_content is None:
+                        first_content = time.perf_counter() - started
+                    yield {"event": "field", "field": field, "value": value}
+        except DeepSeekError as e:
             print(f"DeepSeek API调用失败: {str(e)}")
+            yield {"event": "error", "detail": str(e)}
+            return
+        
+        question = parser.result()
+        if question is None:
+            print(f"JSON解析失败: {parser.text}")
+            yield {"event": "error", "detail": "生成的题目不是完整的JSON对象"}
+            return
+        
+        total = time.perf_counter() - started
+        with self._metrics_lock:
+            self._stream_first_content.append((first_content if first_content is not None else total) * 1000.0)
+            self._stream_total.append(total * 1000.0)
         
-        return None
+        # 添加元数据
+        question = self._annotate_question(question, query)
+        yield {
+            "event": "question",
+            "question": question,
+            "timings": {"first_content_seconds": first_content, "total_seconds": total}
+        }
     
-    def generate_solution(self, question: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def generate_solution(
+        self, 
+        question: Dict[str, Any], 
+        language: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         为题目生成解决方案
         
         Args:
             question: 题目数据
+            language: 解决方案的编程语言，默认由模型决定（保存时记为python）
             
         Returns:
             Optional[Dict[str, Any]]: 生成的解决方案，如果生成失败则返回None
         """
-        if not self.api_key:
+        if not self.client.enabled:
             return None
+        solution, _ = await self._generate_solution(question, language)
+        return solution
+    
+    async def _generate_solution(
+        self, 
+        question: Dict[str, Any], 
+        language: Optional[str] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, int]]:
+        """
+        为题目生成解决方案并返回token用量
+        
+        Args:
+            question: 题目数据（生成结果，或数据库题目的to_dict()，示例取第一条）
+            language: 解决方案的编程语言
+            
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Dict[str, int]]: 生成的解决方案（失败为None）与token用量
+        """
+        example = (question.get('examples') or [{}])[0]
         
         # 构建提示
         prompt = f"""
@@ -112,10 +286,11 @@ class QuestionGenerator:
         {question.get('description', '')}
         
         示例输入：
-        {question.get('example_input', '')}
+        {question.get('example_input', example.get('input', ''))}
         
         示例输出：
-        {question.get('example_output', '')}
+        {question.get('example_output', example.get('output', ''))}
+        {f"请使用{language}实现。" if language else ""}
         
         请以JSON格式返回以下内容：
         1. solution_code: 完整的解决方案代码
@@ -128,50 +303,146 @@ class QuestionGenerator:
         """
         
         # 调用DeepSeek API
+        solution, usage = await self._request_json(prompt, temperature=0.3, max_tokens=3000)
+        if solution is None:
+            return None, usage
+        if language:
+            solution["language"] = language
+        return self._annotate_solution(solution, question), usage
+    
+    async def _request_json(
+        self, 
+        prompt: str, 
+        temperature: float, 
+        max_tokens: int
+    ) -> Tuple[Optional[Any], Dict[str, int]]:
+        """
+        调用DeepSeek API并提取回复中的JSON对象
+        
+        Args:
+            prompt: 提示
+            temperature: 采样温度
+            max_tokens: 最大生成token数
+            
+        Returns:
+            Tuple[Optional[Any], Dict[str, int]]: 解析出的JSON（失败为None）与token用量
+        """
+        usage = {}
         try:
-            response = requests.post(
-                self.api_url,
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                },
-                json={
-                    "model": "deepseek-coder",
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 3000
-                },
-                timeout=30
+            content, usage = await self.client.chat_completion(
+                [{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
+            # 提取JSON
+            try:
+                # 查找JSON部分
+                start_idx = content.find('{')
+                end_idx = content.rfind('}') + 1
                 
-                # 提取JSON
-                try:
-                    # 查找JSON部分
-                    start_idx = content.find('{')
-                    end_idx = content.rfind('}') + 1
-                    
-                    if start_idx >= 0 and end_idx > start_idx:
-                        json_content = content[start_idx:end_idx]
-                        solution = json.loads(json_content)
-                        
-                        # 添加元数据
-                        solution["generated"] = True
-                        solution["question_id"] = question.get("id", "")
-                        
-                        return solution
-                except json.JSONDecodeError:
-                    print(f"JSON解析失败: {content}")
+                if start_idx >= 0 and end_idx > start_idx:
+                    return json.loads(content[start_idx:end_idx]), usage
+            except json.JSONDecodeError:
+                print(f"JSON解析失败: {content}")
             
-        except Exception as e:
+        except DeepSeekError as e:
             print(f"DeepSeek API调用失败: {str(e)}")
         
-        return None
+        return None, usage
+    
+    def validate(self, question: Any = None, solution: Any = None) -> List[str]:
+        """
+        校验生成的题目与解决方案是否包含全部必需字段，为None的部分不校验
+        
+        Args:
+            question: 生成的题目
+            solution: 生成的解决方案
+            
+        Returns:
+            List[str]: 缺失、为空或类型不符的字段，解决方案的字段带solution.前缀
+        """
+        missing = []
+        if question is not None:
+            missing += self._missing_fields(question, self.QUESTION_SCHEMA)
+        if solution is not None:
+            missing += [f"solution.{field}" for field in self._missing_fields(solution, self.SOLUTION_SCHEMA)]
+        return missing
+    
+    @staticmethod
+    def _missing_fields(data: Any, schema: Dict[str, Tuple[type, ...]]) -> List[str]:
+        """
+        按字段表校验生成结果
+        
+        Args:
+            data: 生成结果
+            schema: 必需字段到允许类型的映射
+            
+        Returns:
+            List[str]: 缺失、为空或类型不符的字段
+        """
+        if not isinstance(data, dict):
+            return list(schema)
+        return [
+            field for field, types in schema.items()
+            if not isinstance(data.get(field), types) or not data.get(field)
+        ]
+    
+    @staticmethod
+    def _annotate_question(question: Dict[str, Any], query: str) -> Dict[str, Any]:
+        """添加生成题目的元数据"""
+        question["generated"] = True
+        question["query"] = query
+        return question
+    
+    @staticmethod
+    def _annotate_solution(solution: Dict[str, Any], question: Dict[str, Any]) -> Dict[str, Any]:
+        """添加生成解决方案的元数据"""
+        solution["generated"] = True
+        solution["question_id"] = question.get("id", "")
+        return solution
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取生成耗时与token用量指标
+        
+        Returns:
+            Dict[str, Any]: 各生成模式的总耗时（毫秒）与token用量，流式生成首个字段耗时与总耗时（毫秒）
+        """
+        with self._metrics_lock:
+            latency = {mode: np.array(values, dtype=np.float64) for mode, values in self._latency.items()}
+            tokens = {
+                mode: np.array(values, dtype=np.float64).reshape(-1, 2) for mode, values in self._tokens.items()
+            }
+            combined_fallbacks = self._combined_fallbacks
+            stream_first_content = np.array(self._stream_first_content, dtype=np.float64)
+            stream_total = np.array(self._stream_total, dtype=np.float64)
+        
+        def summarize(values: np.ndarray) -> Dict[str, float]:
+            if values.size == 0:
+                return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0}
+            return {
+                "count": int(values.size),
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99))
+            }
+        
+        modes = {
+            mode: {
+                "total_ms": summarize(latency[mode]),
+                "prompt_tokens": summarize(tokens[mode][:, 0]),
+                "completion_tokens": summarize(tokens[mode][:, 1])
+            }
+            for mode in latency
+        }
+        modes["combined"]["fallbacks"] = combined_fallbacks
+        return {
+            "mode": self.mode,
+            **modes,
+            "stream_first_content_ms": summarize(stream_first_content),
+            "stream_total_ms": summarize(stream_total)
+        }
     
     def _build_generation_prompt(
         self, 
@@ -224,3 +495,56 @@ class QuestionGenerator:
         """
         
         return prompt
+    
+    def _build_combined_prompt(self, query: str, parsed_intent: Dict[str, Any]) -> str:
+        """
+        构建合并生成提示，一次返回题目、解决方案与测试用例
+        
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
+            
+        Returns:
+            str: 生成提示
+        """
+        difficulty = parsed_intent.get("difficulty", "Medium")
+        data_structure = parsed_intent.get("data_structure", "")
+        technique = parsed_intent.get("technique", "")
+        
+        prompt = f"""
+        请根据以下要求生成一个高质量的编程题目，并给出详细的解决方案：
+        
+        用户查询："{query}"
+        难度级别：{difficulty}
+        {f"数据结构：{data_structure}" if data_structure else ""}
+        {f"算法技术：{technique}" if technique else ""}
+        
+        生成的题目应该包含清晰的问题描述、输入和输出格式说明、示例输入和输出、约束条件；
+        解决方案应该包含完整的代码实现、解题思路、复杂度分析，以及至少3个测试用例。
+        
+        请以JSON格式返回以下字段：
+        {{
+            "question": {{
+                "id": "自动生成的唯一ID",
+                "title": "题目标题",
+                "description": "详细的问题描述",
+                "difficulty": "难度级别(Easy/Medium/Hard)",
+                "tags": ["相关标签"],
+                "example_input": "示例输入",
+                "example_output": "示例输出",
+                "constraints": "约束条件",
+                "function_signature": "函数签名（如有）"
+            }},
+            "solution": {{
+                "solution_code": "完整的解决方案代码",
+                "explanation": "详细的解题思路和算法分析",
+                "time_complexity": "时间复杂度",
+                "space_complexity": "空间复杂度",
+                "test_cases": [{{"input": "测试输入", "expected_output": "预期输出"}}]
+            }}
+        }}
+        
+        仅返回JSON格式，不要有其他文本。
+        """
+        
+        return prompt
@@ -0,0 +1,198 @@
+"""
+生成结果语义缓存模块，相似查询直接复用已生成的题目与解决方案
+
+检索无结果时，生成一道题目和解决方案需要两次DeepSeek API调用。缓存记录查询向量、
+解析意图与生成结果，新查询与某条缓存的余弦相似度达到阈值，且难度、数据结构、
+算法技术都相同时，直接返回缓存的结果。
+"""
+import json
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def intent_key(parsed_intent: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    构建意图键，只有意图键相同的查询才会共享缓存
+    
+    Args:
+        parsed_intent: 解析后的意图
+    
+    Returns:
+        Tuple[str, str, str]: (难度, 数据结构, 算法技术)
+    """
+    return tuple(
+        str(parsed_intent.get(field) or "").strip().lower()
+        for field in ("difficulty", "data_structure", "technique")
+    )
+
+
+class GenerationCache:
+    """
+    线程安全的生成结果语义缓存，按意图分组，组内以矩阵乘法计算相似度
+    """
+    
+    def __init__(self, threshold: float = 0.92, max_size: int = 1000, ttl: float = 86400):
+        """
+        初始化生成结果缓存
+        
+        Args:
+            threshold: 命中所需的最小余弦相似度
+            max_size: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 过期时间（秒），小于等于0表示不过期
+        """
+        self.threshold = threshold
+        self.max_size = max(int(max_size), 1)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        # 条目ID -> (意图键, 序列化的生成结果, 过期时间)，按最近使用排序
+        self._entries = OrderedDict()
+        # 意图键 -> (条目ID数组, 归一化的查询向量矩阵)
+        self._groups = {}
+        
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def _remove(self, entry_ids):
+        """
+        删除条目（调用方需持有锁）
+        
+        Args:
+            entry_ids: 待删除的条目ID
+        """
+        by_group = {}
+        for entry_id in entry_ids:
+            key = self._entries.pop(entry_id)[0]
+            by_group.setdefault(key, set()).add(entry_id)
+        
+        for key, removed in by_group.items():
+            ids, matrix = self._groups[key]
+            keep = ~np.isin(ids, list(removed))
+            if keep.any():
+                self._groups[key] = (ids[keep], matrix[keep])
+            else:
+                del self._groups[key]
+    
+    def _purge_expired(self, key: Tuple[str, str, str]):
+        """
+        删除意图分组中已过期的条目（调用方需持有锁）
+        
+        Args:
+            key: 意图键
+        """
+        if self.ttl <= 0 or key not in self._groups:
+            return
+        now = time.monotonic()
+        expired = [entry_id for entry_id in self._groups[key][0] if self._entries[entry_id][2] <= now]
+        if expired:
+            self._remove(expired)
+            self._expired += len(expired)
+    
+    def get(self, query_vector: np.ndarray, parsed_intent: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        查找与查询语义相近、意图相同的生成结果
+        
+        Args:
+            query_vector: 归一化的查询向量
+            parsed_intent: 解析后的意图
+        
+        Returns:
+            Optional[Dict[str, Any]]: 结果副本（question、solution、similarity），未命中返回None
+        """
+        key = intent_key(parsed_intent)
+        query_vector = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        
+        with self._lock:
+            self._purge_expired(key)
+            group = self._groups.get(key)
+            if group is not None:
+                ids, matrix = group
+                similarities = matrix @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id = int(ids[best])
+                    self._entries.move_to_end(entry_id)
+                    self._hits += 1
+                    # 以序列化形式缓存，每次返回独立副本，调用方修改不会污染缓存
+                    result = json.loads(self._entries[entry_id][1])
+                    result["similarity"] = float(similarities[best])
+                    return result
+            self._misses += 1
+            return None
+    
+    def set(
+        self,
+        query_vector: np.ndarray,
+        parsed_intent: Dict[str, Any],
+        question: Dict[str, Any],
+        solution: Optional[Dict[str, Any]]
+    ):
+        """
+        写入生成结果
+        
+        Args:
+            query_vector: 归一化的查询向量
+            parsed_intent: 生成时解析的意图
+            question: 生成的题目（生成结果重复时为已有题目）
+            solution: 生成的解决方案，返回已有题目时为None
+        """
+        key = intent_key(parsed_intent)
+        query_vector = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        payload = json.dumps({"question": question, "solution": solution}, ensure_ascii=False, default=str)
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else float("inf")
+        
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (key, payload, expires_at)
+            if key in self._groups:
+                ids, matrix = self._groups[key]
+                self._groups[key] = (np.append(ids, entry_id), np.vstack([matrix, query_vector]))
+            else:
+                self._groups[key] = (np.array([entry_id], dtype=np.int64), query_vector.copy())
+            
+            # 淘汰最久未使用的条目
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                self._remove(list(itertools.islice(self._entries, overflow)))
+                self._evicted += overflow
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存命中统计
+        
+        Returns:
+            Dict[str, Any]: 命中/未命中计数
+        """
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            size, groups = len(self._entries), len(self._groups)
+            expired, evicted = self._expired, self._evicted
+        total = hits + misses
+        return {
+            "size": size,
+            "intent_groups": groups,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "expired": expired,
+            "evicted": evicted,
+            "threshold": self.threshold,
+            "ttl": self.ttl
+        }
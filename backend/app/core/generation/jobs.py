@@ -0,0 +1,301 @@
+"""
+生成任务模块，检索无结果时在后台生成题目，请求立即返回任务ID
+
+任务在事件循环中的worker协程上执行（DeepSeek调用为异步IO，数据库写入交给线程池），
+调用方通过轮询或服务端事件查询进度。相同查询与意图的进行中任务会合并为一个。
+流式任务在生成过程中逐个登记题目字段，/search/stream的订阅者按顺序推送。
+"""
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..matching.cache import normalize_query
+from .generation_cache import intent_key
+
+
+class GenerationJob:
+    """
+    一个生成任务的状态
+    """
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    def __init__(self, key: str, query: str, parsed_intent: Dict[str, Any], streaming: bool = False):
+        """
+        初始化生成任务
+        
+        Args:
+            key: 合并键（规范化查询+意图）
+            query: 用户查询
+            parsed_intent: 解析后的意图
+            streaming: 是否流式生成题目（字段生成完即登记）
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.query = query
+        self.parsed_intent = parsed_intent
+        self.streaming = streaming
+        # 已生成的题目字段，(字段名, 值)
+        self.fields = []
+        self.timings = {}
+        self.status = self.PENDING
+        self.stage = "queued"
+        self.result = None
+        self.error = None
+        self.subscribers = 1
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at = None
+        self.version = 0
+        self._changed = asyncio.Event()
+    
+    @property
+    def done(self) -> bool:
+        """任务是否已结束"""
+        return self.status in (self.SUCCEEDED, self.FAILED)
+    
+    def update(self, status: Optional[str] = None, stage: Optional[str] = None):
+        """
+        更新任务进度并唤醒等待者
+        
+        Args:
+            status: 新状态
+            stage: 当前阶段
+        """
+        if status is not None:
+            self.status = status
+        if stage is not None:
+            self.stage = stage
+        self.updated_at = time.time()
+        if self.done and self.finished_at is None:
+            self.finished_at = self.updated_at
+        self.version += 1
+        # 唤醒当前等待者，之后的等待使用新事件
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    def add_field(self, field: str, value: Any):
+        """
+        登记一个已生成的题目字段并唤醒等待者
+        
+        Args:
+            field: 字段名
+            value: 字段值
+        """
+        self.fields.append((field, value))
+        self.update()
+    
+    async def wait(self, version: int, timeout: float) -> bool:
+        """
+        等待任务进度变化
+        
+        Args:
+            version: 调用方已看到的版本
+            timeout: 最长等待时间（秒）
+        
+        Returns:
+            bool: 是否有新进度
+        """
+        if self.version != version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典
+        
+        Returns:
+            Dict[str, Any]: 字典表示
+        """
+        return {
+            "id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "subscribers": self.subscribers,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "elapsed_seconds": (self.finished_at or time.time()) - self.created_at
+        }
+
+
+class GenerationJobManager:
+    """
+    生成任务管理器：任务队列、worker协程池与进行中任务的合并
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[[GenerationJob], Awaitable[Dict[str, Any]]],
+        workers: int = 4,
+        max_pending: int = 100,
+        ttl: float = 3600
+    ):
+        """
+        初始化任务管理器
+        
+        Args:
+            handler: 执行任务的协程函数，返回任务结果，过程中可调用job.update(stage=...)报告进度
+            workers: worker协程数量
+            max_pending: 排队与执行中任务的上限
+            ttl: 已结束任务的保留时间（秒）
+        """
+        self.handler = handler
+        self.workers = max(int(workers), 1)
+        self.max_pending = max(int(max_pending), 1)
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._queue = None
+        self._tasks = []
+        
+        self._submitted = 0
+        self._coalesced = 0
+        self._succeeded = 0
+        self._failed = 0
+    
+    def start(self):
+        """在当前事件循环中启动worker协程"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.get_running_loop().create_task(self._worker()) for _ in range(self.workers)
+        ]
+    
+    async def stop(self):
+        """停止worker协程，排队中的任务标记为失败"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in list(self._inflight.values()):
+            job.error = "服务关闭，任务已取消"
+            job.update(status=GenerationJob.FAILED)
+        self._inflight.clear()
+    
+    @staticmethod
+    def make_key(query: str, parsed_intent: Dict[str, Any]) -> str:
+        """
+        构建合并键
+        
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
+        
+        Returns:
+            str: 合并键
+        """
+        return "|".join((normalize_query(query),) + intent_key(parsed_intent))
+    
+    def submit(self, query: str, parsed_intent: Dict[str, Any], streaming: bool = False) -> GenerationJob:
+        """
+        提交生成任务，相同查询与意图的进行中任务直接复用
+        
+        Args:
+            query: 用户查询
+            parsed_intent: 解析后的意图
+            streaming: 是否流式生成题目，合并到尚未开始的任务时同样生效
+        
+        Returns:
+            GenerationJob: 生成任务
+        
+        Raises:
+            RuntimeError: 任务管理器未启动或排队任务已满
+        """
+        if not self._tasks:
+            raise RuntimeError("生成任务管理器未启动")
+        self._purge()
+        
+        key = self.make_key(query, parsed_intent)
+        job = self._inflight.get(key)
+        if job is not None:
+            job.subscribers += 1
+            if streaming and job.status == GenerationJob.PENDING:
+                job.streaming = True
+            self._coalesced += 1
+            return job
+        
+        if len(self._inflight) >= self.max_pending:
+            raise RuntimeError(f"生成任务已达上限（{self.max_pending}），请稍后重试")
+        
+        job = GenerationJob(key, query, parsed_intent, streaming)
+        self._jobs[job.id] = job
+        self._inflight[key] = job
+        self._submitted += 1
+        self._queue.put_nowait(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        查询生成任务
+        
+        Args:
+            job_id: 任务ID
+        
+        Returns:
+            Optional[GenerationJob]: 生成任务，不存在或已过期时返回None
+        """
+        self._purge()
+        return self._jobs.get(job_id)
+    
+    def _purge(self):
+        """删除超过保留时间的已结束任务"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and now - job.finished_at > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    async def _worker(self):
+        """worker协程：依次执行队列中的任务"""
+        while True:
+            job = await self._queue.get()
+            job.update(status=GenerationJob.RUNNING, stage="started")
+            try:
+                job.result = await self.handler(job)
+                self._succeeded += 1
+                job.update(status=GenerationJob.SUCCEEDED, stage="done")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"生成任务失败: {str(e)}")
+                job.error = str(e)
+                self._failed += 1
+                job.update(status=GenerationJob.FAILED)
+            finally:
+                # 任务结束后不再合并，后续相同查询由生成结果缓存或检索命中
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self._queue.task_done()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取任务统计
+        
+        Returns:
+            Dict[str, Any]: 提交、合并、成功、失败数量与当前排队数
+        """
+        return {
+            "workers": self.workers,
+            "submitted": self._submitted,
+            "coalesced": self._coalesced,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "inflight": len(self._inflight),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "retained": len(self._jobs)
+        }
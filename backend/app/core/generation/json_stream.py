@@ -0,0 +1,104 @@
+"""
+增量JSON解析模块，流式生成时顶层字段一完成即可取出
+
+模型按token输出JSON对象，解析器逐字符跟踪字符串、转义与嵌套深度，
+在最外层对象的某个成员之后出现逗号或右花括号时解析该成员。对象之前的说明文字
+（如```json）会被跳过。
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    模型输出中第一个JSON对象的增量解析器
+    """
+    
+    def __init__(self):
+        """初始化解析器"""
+        self.text = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+    
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        追加一段输出
+        
+        Args:
+            chunk: 新到达的文本片段
+        
+        Returns:
+            List[Tuple[str, Any]]: 本次新完成的顶层字段（字段名, 值）
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self.complete:
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                # 对象开始之前的文本直接跳过
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_member(self._pos, completed)
+                    self.complete = True
+            elif ch == "," and self._depth == 1:
+                self._complete_member(self._pos, completed)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+    
+    def _complete_member(self, end: int, completed: List[Tuple[str, Any]]):
+        """
+        解析一个完整的顶层成员
+        
+        Args:
+            end: 成员结束位置（逗号或右花括号）
+            completed: 新完成字段的输出列表
+        """
+        member = self.text[self._member_start:end].strip()
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            # 格式错误的成员跳过，输出结束后由result()整体兜底解析
+            return
+        for key, value in parsed.items():
+            self.fields[key] = value
+            completed.append((key, value))
+    
+    def result(self) -> Optional[Dict[str, Any]]:
+        """
+        获取解析结果
+        
+        Returns:
+            Optional[Dict[str, Any]]: 完整的JSON对象，输出未包含完整对象时返回None
+        """
+        if self.complete:
+            # 优先整体解析，逐成员解析跳过的字段也能取到
+            start_idx = self.text.find("{")
+            try:
+                return json.loads(self.text[start_idx:self._pos])
+            except json.JSONDecodeError:
+                return dict(self.fields)
+        return None
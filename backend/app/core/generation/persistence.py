@@ -0,0 +1,172 @@
+"""
+生成结果持久化模块，将生成的题目与解决方案写入数据库
+"""
+import json
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from ...models.question import Question, QuestionTag, QuestionExample, Solution, TestCase
+
+
+def _as_text(value: Any) -> str:
+    """
+    将生成结果中的字段转换为文本列的值
+    
+    Args:
+        value: 字段值（模型可能返回字符串、列表或对象）
+    
+    Returns:
+        str: 文本
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _solution_rows(question_id: str, solution: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    将生成的解决方案转换为解决方案与测试用例的列值
+    
+    Args:
+        question_id: 题目ID
+        solution: 生成的解决方案
+    
+    Returns:
+        Tuple[Dict[str, Any], List[Dict[str, Any]]]: 解决方案的列值与测试用例的列值列表
+    """
+    solution_id = str(uuid.uuid4())
+    row = {
+        "id": solution_id,
+        "question_id": question_id,
+        "language": solution.get("language") or "python",
+        "code": _as_text(solution.get("solution_code")),
+        "explanation": _as_text(solution.get("explanation")),
+        "time_complexity": _as_text(solution.get("time_complexity"))[:50],
+        "space_complexity": _as_text(solution.get("space_complexity"))[:50],
+        "is_generated": True
+    }
+    test_cases = [
+        {
+            "solution_id": solution_id,
+            "input_data": _as_text(test_case.get("input")),
+            "expected_output": _as_text(test_case.get("expected_output", test_case.get("output")))
+        }
+        for test_case in solution.get("test_cases") or []
+        if isinstance(test_case, dict)
+    ]
+    return row, test_cases
+
+
+def _build_solution(question_id: str, solution: Dict[str, Any]) -> Solution:
+    """
+    构建解决方案及其测试用例
+    
+    Args:
+        question_id: 题目ID
+        solution: 生成的解决方案
+    
+    Returns:
+        Solution: 解决方案模型
+    """
+    values, test_cases = _solution_rows(question_id, solution)
+    row = Solution(**values)
+    for test_case in test_cases:
+        row.test_cases.append(TestCase(**test_case))
+    return row
+
+
+def save_generated(db: Session, question: Dict[str, Any], solution: Dict[str, Any]) -> str:
+    """
+    保存生成的题目、标签、示例、解决方案与测试用例
+    
+    Args:
+        db: 数据库会话
+        question: 生成的题目（id为写入增量索引时分配的ID）
+        solution: 生成的解决方案
+    
+    Returns:
+        str: 题目ID
+    """
+    question_id = question.get("id") or f"gen_{uuid.uuid4().hex}"
+    row = Question(
+        id=question_id,
+        title=_as_text(question.get("title"))[:255],
+        description=_as_text(question.get("description")),
+        difficulty=question.get("difficulty") or "Medium",
+        function_signature=_as_text(question.get("function_signature"))[:255] or None,
+        constraints=_as_text(question.get("constraints")) or None,
+        is_generated=True
+    )
+    for tag in dict.fromkeys(str(tag)[:50] for tag in question.get("tags") or []):
+        row.tags.append(QuestionTag(tag=tag))
+    if question.get("example_input") or question.get("example_output"):
+        row.examples.append(QuestionExample(
+            input_example=_as_text(question.get("example_input")),
+            output_example=_as_text(question.get("example_output"))
+        ))
+    row.solutions.append(_build_solution(question_id, solution))
+    
+    try:
+        db.add(row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return question_id
+
+
+def save_solution(db: Session, question_id: str, solution: Dict[str, Any]) -> Solution:
+    """
+    为已有题目保存生成的解决方案与测试用例
+    
+    Args:
+        db: 数据库会话
+        question_id: 题目ID
+        solution: 生成的解决方案
+    
+    Returns:
+        Solution: 已保存的解决方案
+    """
+    row = _build_solution(question_id, solution)
+    try:
+        db.add(row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(row)
+    return row
+
+
+def save_solutions_bulk(db: Session, solutions: List[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    批量保存生成的解决方案与测试用例，两张表各一次批量插入，在同一事务中提交
+    
+    Args:
+        db: 数据库会话
+        solutions: (题目ID, 生成的解决方案)列表
+    
+    Returns:
+        int: 保存的解决方案数量
+    """
+    solution_rows, test_case_rows = [], []
+    for question_id, solution in solutions:
+        row, test_cases = _solution_rows(question_id, solution)
+        solution_rows.append(row)
+        test_case_rows.extend(test_cases)
+    if not solution_rows:
+        return 0
+    
+    try:
+        # 测试用例引用解决方案ID，先插入解决方案
+        db.bulk_insert_mappings(Solution, solution_rows)
+        db.bulk_insert_mappings(TestCase, test_case_rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(solution_rows)
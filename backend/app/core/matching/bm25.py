@@ -0,0 +1,224 @@
+"""
+进程内BM25倒排索引模块，作为单机部署时Elasticsearch精确匹配的替代
+
+索引目录结构：
+    bm25.json                   清单（文档数、BM25参数、平均文档长度）
+    terms.json                  词表（按词项编号排列）
+    postings.offsets.npy        每个词项倒排列表的偏移量(int64, V+1)
+    postings.docs.npy           倒排列表中的行号(int32，每个词项内升序)
+    postings.weights.npy        预先计算的BM25词频分量(float32)
+    idf.npy                     词项的IDF(float32)
+
+行号与元数据存储、FAISS索引的行号一致，过滤条件直接使用元数据存储的属性位图。
+本模块只依赖numpy，数据处理脚本可直接复用。
+"""
+import os
+import re
+import json
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 索引格式版本
+BM25_FORMAT_VERSION = 1
+
+# 英文单词/数字，或连续的中日韩统一表意文字
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    中英文分词：英文按单词切分，中文切分为单字与相邻双字
+    
+    Args:
+        text: 文本
+    
+    Returns:
+        List[str]: 词项列表
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        if token[0].isascii():
+            tokens.append(token)
+        else:
+            tokens.extend(token)
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def write_bm25_index(
+    records: List[Dict[str, Any]],
+    output_dir: str,
+    k1: float = 1.2,
+    b: float = 0.75,
+    title_boost: float = 2.0
+) -> Dict[str, Any]:
+    """
+    从题目元数据构建BM25倒排索引，records的顺序即行号
+    
+    标题与描述合并为一个字段，标题中的词项按title_boost加权计入词频和文档长度。
+    
+    Args:
+        records: 题目元数据列表
+        output_dir: 索引目录
+        k1: BM25词频饱和参数
+        b: BM25文档长度归一化参数
+        title_boost: 标题词项权重
+    
+    Returns:
+        Dict[str, Any]: 索引清单
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = len(records)
+    
+    # 统计每篇文档的加权词频
+    postings = {}
+    doc_lengths = np.zeros(count, dtype=np.float32)
+    for row, record in enumerate(records):
+        frequencies = Counter()
+        for token in tokenize(record.get("title") or ""):
+            frequencies[token] += title_boost
+        for token in tokenize(record.get("description") or ""):
+            frequencies[token] += 1.0
+        doc_lengths[row] = sum(frequencies.values())
+        for token, frequency in frequencies.items():
+            postings.setdefault(token, []).append((row, frequency))
+    
+    avgdl = float(doc_lengths.mean()) if count else 0.0
+    terms = sorted(postings)
+    
+    # 倒排列表按词项顺序拼接，行号在每个词项内天然升序
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+    docs = np.empty(offsets[-1], dtype=np.int32)
+    frequencies = np.empty(offsets[-1], dtype=np.float32)
+    for i, term in enumerate(terms):
+        entries = postings[term]
+        docs[offsets[i]:offsets[i + 1]] = [row for row, _ in entries]
+        frequencies[offsets[i]:offsets[i + 1]] = [frequency for _, frequency in entries]
+    
+    # 预先计算词频分量，检索时只需乘以IDF后累加
+    norms = k1 * (1 - b + b * doc_lengths[docs] / max(avgdl, 1e-6))
+    weights = (frequencies * (k1 + 1) / (frequencies + norms)).astype(np.float32)
+    document_frequencies = np.diff(offsets).astype(np.float64)
+    idf = np.log(1 + (count - document_frequencies + 0.5) / (document_frequencies + 0.5)).astype(np.float32)
+    
+    np.save(os.path.join(output_dir, "postings.offsets.npy"), offsets)
+    np.save(os.path.join(output_dir, "postings.docs.npy"), docs)
+    np.save(os.path.join(output_dir, "postings.weights.npy"), weights)
+    np.save(os.path.join(output_dir, "idf.npy"), idf)
+    with open(os.path.join(output_dir, "terms.json"), "w") as f:
+        json.dump(terms, f, ensure_ascii=False)
+    
+    manifest = {
+        "format_version": BM25_FORMAT_VERSION,
+        "count": count,
+        "num_terms": len(terms),
+        "num_postings": int(offsets[-1]),
+        "k1": k1,
+        "b": b,
+        "title_boost": title_boost,
+        "avgdl": avgdl
+    }
+    with open(os.path.join(output_dir, "bm25.json"), "w") as f:
+        json.dump(manifest, f)
+    
+    return manifest
+
+
+class BM25Index:
+    """
+    只读的BM25倒排索引，倒排数组以mmap方式打开
+    """
+    
+    def __init__(self, path: str):
+        """
+        打开BM25倒排索引
+        
+        Args:
+            path: 索引目录
+        """
+        self.path = path
+        with open(os.path.join(path, "bm25.json")) as f:
+            self.manifest = json.load(f)
+        
+        if self.manifest.get("format_version") != BM25_FORMAT_VERSION:
+            raise ValueError(f"不支持的BM25索引格式: {self.manifest.get('format_version')}")
+        
+        self.count = self.manifest["count"]
+        with open(os.path.join(path, "terms.json")) as f:
+            self._term_ids = {term: i for i, term in enumerate(json.load(f))}
+        
+        self._offsets = np.load(os.path.join(path, "postings.offsets.npy"), mmap_mode="r")
+        self._docs = np.load(os.path.join(path, "postings.docs.npy"), mmap_mode="r")
+        self._weights = np.load(os.path.join(path, "postings.weights.npy"), mmap_mode="r")
+        self._idf = np.load(os.path.join(path, "idf.npy"), mmap_mode="r")
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算与查询至少有一个共同词项的文档的BM25得分
+        
+        Args:
+            query: 查询文本
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 行号（升序）与得分
+        """
+        term_ids = [self._term_ids[token] for token in dict.fromkeys(tokenize(query)) if token in self._term_ids]
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        docs = np.concatenate([self._docs[self._offsets[t]:self._offsets[t + 1]] for t in term_ids])
+        weights = np.concatenate([
+            self._weights[self._offsets[t]:self._offsets[t + 1]] * self._idf[t] for t in term_ids
+        ])
+        rows, inverse = np.unique(docs, return_inverse=True)
+        return rows.astype(np.int64), np.bincount(inverse, weights=weights).astype(np.float32)
+    
+    def search(
+        self,
+        query: str,
+        size: int = 10,
+        bitmap: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        执行BM25检索
+        
+        与ES中term过滤加multi_match的bool查询语义一致：给定位图时只返回满足条件的行，
+        文本匹配的行按得分排在前面，不足size时用其余满足条件的行（得分为0）补齐；
+        未给定位图时只返回与查询有共同词项的行。
+        
+        Args:
+            query: 查询文本，为空时只按位图过滤
+            size: 返回结果数量
+            bitmap: 小端位序打包的行位图（来自元数据存储）
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 行号与得分（按得分降序）
+        """
+        rows, scores = self.score(query)
+        if bitmap is not None and len(rows):
+            keep = ((bitmap[rows >> 3] >> (rows & 7)) & 1).astype(bool)
+            rows, scores = rows[keep], scores[keep]
+        
+        # argpartition取前size个，再对这部分排序
+        if len(rows) > size:
+            top = np.argpartition(-scores, size - 1)[:size]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        rows, scores = rows[order], scores[order]
+        
+        if bitmap is not None and len(rows) < size:
+            candidates = np.flatnonzero(np.unpackbits(bitmap, count=self.count, bitorder="little"))
+            extra = candidates[~np.isin(candidates, rows)][:size - len(rows)]
+            rows = np.concatenate([rows, extra])
+            scores = np.concatenate([scores, np.zeros(len(extra), dtype=np.float32)])
+        
+        return rows, scores
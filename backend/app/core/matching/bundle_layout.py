@@ -0,0 +1,191 @@
+"""
+索引包目录布局模块，构建脚本与服务端共用
+
+每次构建生成一个版本化的索引包目录，包含同一份语料的FAISS索引、元数据、嵌入向量、
+BM25索引与清单（含语料哈希与对应的ES索引名）；根目录下的CURRENT文件记录当前发布的版本：
+    data/bundles/
+    ├── CURRENT
+    ├── 20250101120000-1a2b3c4d/
+    │   ├── kodcode_index.faiss
+    │   ├── metadata.json
+    │   ├── metadata_store/
+    │   ├── embeddings.npy
+    │   ├── bm25_index/
+    │   └── index_manifest.json
+    └── ...
+
+本模块只依赖标准库，构建脚本可直接复用。
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+# 索引包内的文件名
+INDEX_FILE = "kodcode_index.faiss"
+METADATA_FILE = "metadata.json"
+METADATA_STORE_DIR = "metadata_store"
+EMBEDDINGS_FILE = "embeddings.npy"
+BM25_DIR = "bm25_index"
+MANIFEST_FILE = "index_manifest.json"
+
+# 根目录下记录当前版本的文件
+CURRENT_FILE = "CURRENT"
+
+
+def bundle_paths(bundle_dir: str) -> Dict[str, str]:
+    """
+    获取索引包内各文件的路径
+    
+    Args:
+        bundle_dir: 索引包目录
+    
+    Returns:
+        Dict[str, str]: 文件用途到路径的映射
+    """
+    return {
+        "index": os.path.join(bundle_dir, INDEX_FILE),
+        "metadata": os.path.join(bundle_dir, METADATA_FILE),
+        "metadata_store": os.path.join(bundle_dir, METADATA_STORE_DIR),
+        "embeddings": os.path.join(bundle_dir, EMBEDDINGS_FILE),
+        "bm25": os.path.join(bundle_dir, BM25_DIR),
+        "manifest": os.path.join(bundle_dir, MANIFEST_FILE)
+    }
+
+
+def corpus_hash(records: Iterable[Dict[str, Any]]) -> str:
+    """
+    计算语料哈希，按行顺序覆盖全部题目元数据，用于校验FAISS行号、元数据与ES索引是否一致
+    
+    Args:
+        records: 题目元数据（顺序即FAISS行号）
+    
+    Returns:
+        str: SHA-256十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def new_version(corpus_digest: str) -> str:
+    """
+    生成索引包版本号：构建时间在前，按字典序即按时间排序
+    
+    Args:
+        corpus_digest: 语料哈希
+    
+    Returns:
+        str: 版本号
+    """
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{corpus_digest[:8]}"
+
+
+def list_versions(root: str) -> List[str]:
+    """
+    列出根目录下已完成构建的索引包版本（包含清单的目录），按时间升序
+    
+    Args:
+        root: 索引包根目录
+    
+    Returns:
+        List[str]: 版本号列表
+    """
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+
+def read_current(root: str) -> Optional[str]:
+    """
+    读取当前发布的索引包版本
+    
+    Args:
+        root: 索引包根目录
+    
+    Returns:
+        Optional[str]: 版本号，尚未发布时返回None
+    """
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def publish(root: str, version: str):
+    """
+    发布索引包：原子替换CURRENT文件，运行中的服务随后在后台加载并切换
+    
+    Args:
+        root: 索引包根目录
+        version: 版本号
+    """
+    if not os.path.isfile(os.path.join(root, version, MANIFEST_FILE)):
+        raise FileNotFoundError(f"索引包不存在或未完成构建: {os.path.join(root, version)}")
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def read_manifest(bundle_dir: str) -> Dict[str, Any]:
+    """
+    读取索引包清单
+    
+    Args:
+        bundle_dir: 索引包目录
+    
+    Returns:
+        Dict[str, Any]: 清单，不存在时返回空字典
+    """
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(bundle_dir: str, manifest: Dict[str, Any]):
+    """
+    原子写入索引包清单（清单存在即表示索引包构建完成）
+    
+    Args:
+        bundle_dir: 索引包目录
+        manifest: 清单
+    """
+    path = os.path.join(bundle_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def prune(root: str, keep: int = 2) -> List[str]:
+    """
+    删除旧的索引包，保留当前版本与最新的keep个版本
+    
+    仍在使用旧索引包的worker已映射的文件在删除后依然有效，直到其切换到新版本。
+    
+    Args:
+        root: 索引包根目录
+        keep: 保留的版本数量
+    
+    Returns:
+        List[str]: 已删除的版本号
+    """
+    versions = list_versions(root)
+    current = read_current(root)
+    removed = []
+    for version in versions[:max(len(versions) - keep, 0)]:
+        if version != current:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+            removed.append(version)
+    return removed
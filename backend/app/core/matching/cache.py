@@ -0,0 +1,351 @@
+"""
+检索缓存模块，提供进程内LRU+TTL缓存与可选的Redis共享缓存
+"""
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import redis
+except ImportError:  # Redis为可选依赖
+    redis = None
+
+
+def normalize_query(query: str) -> str:
+    """
+    规范化查询文本，作为缓存键
+    
+    Args:
+        query: 原始查询文本
+    
+    Returns:
+        str: 全角转半角、小写、合并空白后的文本
+    """
+    text = unicodedata.normalize("NFKC", query or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class TTLLRUCache:
+    """
+    线程安全的进程内缓存，按LRU淘汰并支持过期时间
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 3600):
+        """
+        初始化缓存
+        
+        Args:
+            max_size: 最大条目数
+            ttl: 过期时间（秒），小于等于0表示不过期
+        """
+        self.max_size = max(int(max_size), 1)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        获取缓存值
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            Optional[Any]: 缓存值，未命中或已过期返回None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any):
+        """
+        写入缓存值
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def connect_redis(host: str, port: int, db: int):
+    """
+    连接Redis，不可用时返回None
+    
+    Args:
+        host: 主机地址
+        port: 端口号
+        db: 数据库编号
+    
+    Returns:
+        Optional[redis.Redis]: Redis客户端
+    """
+    if redis is None:
+        print("未安装redis，共享缓存已禁用")
+        return None
+    try:
+        client = redis.Redis(host=host, port=port, db=db, socket_timeout=0.05)
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"Redis连接失败，共享缓存已禁用: {str(e)}")
+        return None
+
+
+class EmbeddingCache:
+    """
+    查询向量缓存：进程内LRU+TTL为一级缓存，Redis为可选的跨进程二级缓存
+    """
+    
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int = 10000,
+        ttl: float = 3600,
+        redis_client=None
+    ):
+        """
+        初始化查询向量缓存
+        
+        Args:
+            model_name: 向量模型名称，用于隔离不同模型的缓存
+            max_size: 进程内缓存最大条目数
+            ttl: 过期时间（秒）
+            redis_client: 可选的Redis客户端
+        """
+        self.local = TTLLRUCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.redis = redis_client
+        self._key_prefix = f"deepkod:emb:{hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]}:"
+        
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+    
+    def _redis_key(self, normalized: str) -> str:
+        return self._key_prefix + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    
+    def get_many(self, queries: List[str]) -> Tuple[List[Optional[np.ndarray]], List[str]]:
+        """
+        批量查找查询向量
+        
+        Args:
+            queries: 查询文本列表
+        
+        Returns:
+            Tuple[List[Optional[np.ndarray]], List[str]]: 与queries对应的向量（未命中为None）及规范化后的键
+        """
+        keys = [normalize_query(query) for query in queries]
+        vectors = [self.local.get(key) for key in keys]
+        hits = sum(1 for vector in vectors if vector is not None)
+        redis_hits = 0
+        
+        # 查询Redis二级缓存
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.redis is not None:
+            try:
+                payloads = self.redis.mget([self._redis_key(keys[i]) for i in missing])
+                for i, payload in zip(missing, payloads):
+                    if payload:
+                        vector = np.frombuffer(payload, dtype=np.float32)
+                        vectors[i] = vector
+                        self.local.set(keys[i], vector)
+                        redis_hits += 1
+            except Exception as e:
+                print(f"Redis读取失败: {str(e)}")
+        
+        with self._stats_lock:
+            self._hits += hits
+            self._redis_hits += redis_hits
+            self._misses += len(queries) - hits - redis_hits
+        
+        return vectors, keys
+    
+    def set_many(self, keys: List[str], vectors: np.ndarray):
+        """
+        批量写入查询向量
+        
+        Args:
+            keys: 规范化后的查询文本
+            vectors: 归一化的float32向量矩阵
+        """
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        for key, vector in zip(keys, vectors):
+            # 缓存独立副本，避免持有整个批次矩阵
+            vector = vector.copy()
+            vector.flags.writeable = False
+            self.local.set(key, vector)
+        
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, vector in zip(keys, vectors):
+                    pipe.set(self._redis_key(key), vector.tobytes(), ex=int(self.ttl) if self.ttl > 0 else None)
+                pipe.execute()
+            except Exception as e:
+                print(f"Redis写入失败: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存命中统计
+        
+        Returns:
+            Dict[str, Any]: 命中/未命中计数
+        """
+        with self._stats_lock:
+            hits, redis_hits, misses = self._hits, self._redis_hits, self._misses
+        total = hits + redis_hits + misses
+        return {
+            "size": len(self.local),
+            "hits": hits,
+            "redis_hits": redis_hits,
+            "misses": misses,
+            "hit_rate": (hits + redis_hits) / total if total else 0.0,
+            "redis_enabled": self.redis is not None
+        }
+
+
+class ResultCache:
+    """
+    混合检索结果缓存，键包含索引版本，索引重建后旧条目自然失效
+    """
+    
+    def __init__(self, max_size: int = 2000, ttl: float = 3600, redis_client=None):
+        """
+        初始化结果缓存
+        
+        Args:
+            max_size: 进程内缓存最大条目数
+            ttl: 过期时间（秒）
+            redis_client: 可选的Redis客户端
+        """
+        self.local = TTLLRUCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.redis = redis_client
+        
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+    
+    @staticmethod
+    def make_key(query: str, filters: Optional[Dict[str, Any]], top_k: int, index_version: str) -> str:
+        """
+        构建缓存键
+        
+        Args:
+            query: 查询文本
+            filters: 解析后的过滤条件
+            top_k: 返回结果数量
+            index_version: 当前索引版本
+            
+        Returns:
+            str: 缓存键
+        """
+        resolved = sorted((key, str(value)) for key, value in (filters or {}).items() if value)
+        raw = json.dumps([normalize_query(query), resolved, top_k, index_version], ensure_ascii=False)
+        return "deepkod:search:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取缓存的检索结果
+        
+        Args:
+            key: 缓存键
+            
+        Returns:
+            Optional[List[Dict[str, Any]]]: 结果副本，未命中返回None
+        """
+        payload = self.local.get(key)
+        hit_redis = False
+        
+        if payload is None and self.redis is not None:
+            try:
+                payload = self.redis.get(key)
+                if payload is not None:
+                    payload = payload.decode("utf-8")
+                    self.local.set(key, payload)
+                    hit_redis = True
+            except Exception as e:
+                print(f"Redis读取失败: {str(e)}")
+        
+        with self._stats_lock:
+            if payload is None:
+                self._misses += 1
+            elif hit_redis:
+                self._redis_hits += 1
+            else:
+                self._hits += 1
+        
+        # 以序列化形式缓存，每次返回独立副本，调用方修改不会污染缓存
+        return json.loads(payload) if payload is not None else None
+    
+    def set(self, key: str, results: List[Dict[str, Any]]):
+        """
+        写入检索结果
+        
+        Args:
+            key: 缓存键
+            results: 检索结果
+        """
+        payload = json.dumps(results, ensure_ascii=False, default=str)
+        self.local.set(key, payload)
+        
+        if self.redis is not None:
+            try:
+                self.redis.set(key, payload.encode("utf-8"), ex=int(self.ttl) if self.ttl > 0 else None)
+            except Exception as e:
+                print(f"Redis写入失败: {str(e)}")
+    
+    def clear(self):
+        """清空进程内缓存"""
+        self.local.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存命中统计
+        
+        Returns:
+            Dict[str, Any]: 命中/未命中计数
+        """
+        with self._stats_lock:
+            hits, redis_hits, misses = self._hits, self._redis_hits, self._misses
+        total = hits + redis_hits + misses
+        return {
+            "size": len(self.local),
+            "hits": hits,
+            "redis_hits": redis_hits,
+            "misses": misses,
+            "hit_rate": (hits + redis_hits) / total if total else 0.0,
+            "redis_enabled": self.redis is not None
+        }
@@ -0,0 +1,205 @@
+"""
+增量索引模块，新生成的题目无需重建索引即可被检索到
+
+新题目追加到内存中的ID映射FAISS索引（行号从基础索引的行数开始递增），同时写入追加日志。
+同一台机器上的各个worker定期读取日志中的新条目，几秒内即可检索到其他worker写入的题目；
+服务重启或切换索引包时重放日志。data_processing/compact_delta.py定期将日志合并进新版本的索引包。
+"""
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+
+class DeltaSegment:
+    """
+    增量段：基础索引之后新增题目的向量、元数据与追加日志
+    """
+    
+    def __init__(self, dim: int, base_count: int, log_path: str, refresh_interval: float = 1.0):
+        """
+        初始化增量段并重放日志
+        
+        Args:
+            dim: 向量维度
+            base_count: 基础索引的行数，增量行号从该值开始
+            log_path: 追加日志路径
+            refresh_interval: 读取日志新条目的最小间隔（秒）
+        """
+        self.dim = dim
+        self.base_count = base_count
+        self.log_path = log_path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self._records = []
+        self._ids = set()
+        self._log_inode = None
+        self._log_offset = 0
+        self._refreshed_at = 0.0
+        self.refresh()
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def _add_entry(self, record: Dict[str, Any], vector: np.ndarray) -> Optional[int]:
+        """
+        将一条题目加入内存索引，已存在的题目ID直接跳过
+        
+        Args:
+            record: 题目元数据
+            vector: 归一化的题目向量
+        
+        Returns:
+            Optional[int]: 分配的行号，重复时返回None
+        """
+        with self._lock:
+            if record["id"] in self._ids:
+                return None
+            row = self.base_count + len(self._records)
+            self._index.add_with_ids(
+                np.asarray(vector, dtype=np.float32).reshape(1, self.dim), np.array([row], dtype=np.int64)
+            )
+            self._records.append(record)
+            self._ids.add(record["id"])
+            return row
+    
+    def add(self, record: Dict[str, Any], vector: np.ndarray) -> Optional[int]:
+        """
+        新增题目：先写追加日志，再加入内存索引
+        
+        Args:
+            record: 题目元数据（需包含id）
+            vector: 归一化的题目向量
+        
+        Returns:
+            Optional[int]: 分配的行号，题目已存在时返回None
+        """
+        line = json.dumps(
+            {"record": record, "vector": np.asarray(vector, dtype=np.float32).tolist()}, ensure_ascii=False
+        ) + "\n"
+        with self._lock:
+            if record["id"] in self._ids:
+                return None
+            # 单次write追加整行，多个worker并发追加时不会交错
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            return self._add_entry(record, vector)
+    
+    def refresh(self):
+        """读取日志中其他worker新写入的条目"""
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            try:
+                stat = os.stat(self.log_path)
+            except FileNotFoundError:
+                # 日志已被合并任务移走，内存中的条目保留到基础索引重新加载
+                self._log_inode = None
+                self._log_offset = 0
+                return
+            
+            if stat.st_ino != self._log_inode or stat.st_size < self._log_offset:
+                # 合并后新建的日志，从头读取（已有的题目按ID跳过）
+                self._log_inode = stat.st_ino
+                self._log_offset = 0
+            if stat.st_size == self._log_offset:
+                return
+            
+            with open(self.log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read(stat.st_size - self._log_offset)
+            
+            # 只处理完整的行，写了一半的行留到下次读取
+            complete = data[:data.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self._add_entry(entry["record"], np.array(entry["vector"], dtype=np.float32))
+            self._log_offset += len(complete)
+    
+    def maybe_refresh(self):
+        """距上次读取日志超过refresh_interval时读取新条目"""
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+    
+    @staticmethod
+    def _matches(record: Dict[str, Any], conditions: Dict[str, str]) -> bool:
+        """
+        判断题目是否满足全部过滤条件（与元数据存储的字段条件一致）
+        
+        Args:
+            record: 题目元数据
+            conditions: 存储字段名到取值的映射
+        
+        Returns:
+            bool: 是否满足
+        """
+        for field, value in conditions.items():
+            if field == "tags":
+                if value not in [str(tag) for tag in record.get("tags") or []]:
+                    return False
+            elif str(record.get(field)) != value:
+                return False
+        return True
+    
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        top_k: int,
+        conditions: Optional[Dict[str, str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        在增量段中检索
+        
+        Args:
+            query_vectors: 归一化的查询向量矩阵
+            top_k: 每个查询返回的结果数量
+            conditions: 过滤条件（存储字段名到取值的映射）
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 相似度与行号矩阵，不足的位置行号为-1
+        """
+        with self._lock:
+            if not self._records:
+                return (
+                    np.empty((len(query_vectors), 0), dtype=np.float32),
+                    np.empty((len(query_vectors), 0), dtype=np.int64)
+                )
+            
+            k = min(top_k, len(self._records))
+            if not conditions:
+                return self._index.search(query_vectors, k)
+            
+            rows = np.array([
+                self.base_count + i for i, record in enumerate(self._records) if self._matches(record, conditions)
+            ], dtype=np.int64)
+            if rows.size == 0:
+                return (
+                    np.empty((len(query_vectors), 0), dtype=np.float32),
+                    np.empty((len(query_vectors), 0), dtype=np.int64)
+                )
+            selector = faiss.IDSelectorBatch(rows.size, faiss.swig_ptr(rows))
+            return self._index.search(query_vectors, min(k, rows.size), params=faiss.SearchParameters(sel=selector))
+    
+    def record(self, row: int, score: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        构建增量题目的检索结果
+        
+        Args:
+            row: 行号
+            score: 检索得分
+        
+        Returns:
+            Optional[Dict[str, Any]]: 题目元数据，行号不在增量段中时返回None
+        """
+        offset = row - self.base_count
+        if offset < 0 or offset >= len(self._records):
+            return None
+        item = {key: value for key, value in self._records[offset].items() if key != "text"}
+        if score is not None:
+            item["score"] = score
+        return item
@@ -0,0 +1,136 @@
+"""
+Elasticsearch查询构建模块，检索引擎与基准测试脚本共用同一套查询体
+
+本模块不依赖第三方库，数据处理与基准测试脚本可直接复用。
+"""
+from typing import Any, Dict, List, Optional
+
+# 存放题目嵌入向量的dense_vector字段
+VECTOR_FIELD = "embedding"
+
+# 关键词匹配的字段及权重
+TEXT_FIELDS = ["title^2", "description"]
+
+# 过滤条件字段到索引字段的映射（查询解析输出technique，ES映射与元数据存储使用algorithm）
+FILTER_FIELDS = {
+    "difficulty": "difficulty",
+    "data_structure": "data_structure",
+    "technique": "algorithm",
+    "algorithm": "algorithm",
+    "tags": "tags"
+}
+
+
+def _term_clauses(filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将过滤条件转换为term子句，字段名按FILTER_FIELDS映射，忽略取值为空的条件
+    
+    Args:
+        filters: 过滤条件
+    
+    Returns:
+        List[Dict[str, Any]]: term子句列表
+    """
+    return [{"term": {FILTER_FIELDS.get(key, key): value}} for key, value in (filters or {}).items() if value]
+
+
+def build_exact_query(filters: Dict[str, Any], query: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    构建精确匹配查询
+    
+    Args:
+        filters: 过滤条件
+        query: 查询文本，对标题和描述做关键词匹配
+    
+    Returns:
+        Optional[Dict[str, Any]]: ES查询体，没有有效条件时返回None
+    """
+    must_clauses = _term_clauses(filters)
+    
+    # 关键词匹配：有过滤条件时只参与排序，没有过滤条件时至少匹配一个词
+    should_clauses = []
+    if query:
+        should_clauses.append({"multi_match": {"query": query, "fields": TEXT_FIELDS}})
+    
+    if not must_clauses and not should_clauses:
+        return None
+    
+    bool_query = {"must": must_clauses}
+    if should_clauses:
+        bool_query["should"] = should_clauses
+    
+    return {
+        "query": {
+            "bool": bool_query
+        },
+        "_source": {"excludes": [VECTOR_FIELD]}
+    }
+
+
+def build_knn_query(
+    query_vector: List[float],
+    filters: Dict[str, Any],
+    top_k: int,
+    num_candidates: int,
+    query: Optional[str] = None,
+    knn_boost: float = 0.7,
+    query_boost: float = 0.3
+) -> Dict[str, Any]:
+    """
+    构建向量近邻与关键词匹配合并的单次请求查询
+    
+    过滤条件同时作用于kNN（在近邻搜索过程中过滤，而不是对结果后过滤）和关键词匹配，
+    两部分的得分按权重相加。
+    
+    Args:
+        query_vector: 归一化的查询向量
+        filters: 过滤条件
+        top_k: 返回结果数量
+        num_candidates: 每个分片的近邻候选数量
+        query: 查询文本，为空时只做向量近邻检索
+        knn_boost: 向量近邻得分权重
+        query_boost: 关键词匹配得分权重
+    
+    Returns:
+        Dict[str, Any]: ES查询体
+    """
+    term_clauses = _term_clauses(filters)
+    knn = {
+        "field": VECTOR_FIELD,
+        "query_vector": query_vector,
+        "k": top_k,
+        "num_candidates": max(num_candidates, top_k),
+        "boost": knn_boost
+    }
+    if term_clauses:
+        knn["filter"] = term_clauses
+    
+    body = {"knn": knn, "_source": {"excludes": [VECTOR_FIELD]}}
+    if query:
+        body["query"] = {
+            "bool": {
+                "filter": term_clauses,
+                "should": [{"multi_match": {"query": query, "fields": TEXT_FIELDS}}],
+                "minimum_should_match": 1,
+                "boost": query_boost
+            }
+        }
+    return body
+
+
+def parse_hits(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    处理ES检索结果
+    
+    Args:
+        response: ES响应
+    
+    Returns:
+        List[Dict[str, Any]]: 检索结果列表
+    """
+    results = []
+    for hit in response["hits"]["hits"]:
+        item = hit["_source"]
+        item["score"] = hit["_score"]
+        results.append(item)
+    return results
@@ -0,0 +1,211 @@
+"""
+检索结果融合模块，在id/得分数组上合并语义检索与精确匹配的结果
+
+支持的融合策略：
+    rank    原有方案：语义结果按名次线性衰减，精确匹配命中计固定分
+    rrf     倒数排名融合：weight / (rrf_k + 名次)
+    minmax  各路得分min-max归一化到[0, 1]后加权求和
+    zscore  各路得分标准化（减均值除以标准差）后加权求和
+
+在线检索每路只有几十到一百多个候选，此时NumPy的数组创建开销大于计算本身，
+候选总数低于NUMPY_MIN_CANDIDATES时使用纯Python实现。两种实现逐元素的运算相同，
+zscore的均值与标准差都由NumPy计算，累加顺序与并列时的排序规则也相同，结果逐位一致。
+
+本模块只依赖numpy，基准测试脚本可直接复用。
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# 支持的融合策略
+FUSION_STRATEGIES = ("rank", "rrf", "minmax", "zscore")
+
+# 两路候选总数达到该值时使用NumPy实现（见benchmarks/fusion_benchmark.py）
+NUMPY_MIN_CANDIDATES = 128
+
+
+def _normalize(scores: np.ndarray, strategy: str, rrf_k: int, presence: bool = False) -> np.ndarray:
+    """
+    将单路检索结果转换为融合得分
+    
+    Args:
+        scores: 按名次排列的原始得分（越大越相关）
+        strategy: 融合策略
+        rrf_k: RRF平滑常数
+        presence: rank策略下是否只按命中计分（原有方案对精确匹配结果的处理）
+    
+    Returns:
+        np.ndarray: 融合得分（未加权）
+    """
+    count = len(scores)
+    if count == 0:
+        return np.empty(0, dtype=np.float64)
+    
+    ranks = np.arange(count, dtype=np.float64)
+    if strategy == "rank":
+        return np.ones(count) if presence else 1 - ranks / count
+    if strategy == "rrf":
+        return 1.0 / (rrf_k + ranks + 1)
+    
+    scores = np.asarray(scores, dtype=np.float64)
+    if strategy == "minmax":
+        spread = scores.max() - scores.min()
+        return (scores - scores.min()) / spread if spread > 0 else np.ones(count)
+    if strategy == "zscore":
+        std = scores.std()
+        return (scores - scores.mean()) / std if std > 0 else np.zeros(count)
+    
+    raise ValueError(f"不支持的融合策略: {strategy}")
+
+
+def _normalize_list(scores: Sequence[float], strategy: str, rrf_k: int, presence: bool = False) -> List[float]:
+    """
+    _normalize的纯Python实现，用于候选较少的情况
+    
+    Args:
+        scores: 按名次排列的原始得分（越大越相关）
+        strategy: 融合策略
+        rrf_k: RRF平滑常数
+        presence: rank策略下是否只按命中计分
+    
+    Returns:
+        List[float]: 融合得分（未加权）
+    """
+    count = len(scores)
+    if count == 0:
+        return []
+    
+    if strategy == "rank":
+        return [1.0] * count if presence else [1 - rank / count for rank in range(count)]
+    if strategy == "rrf":
+        return [1.0 / (rrf_k + rank + 1) for rank in range(count)]
+    
+    scores = [float(score) for score in scores]
+    if strategy == "minmax":
+        low = min(scores)
+        spread = max(scores) - low
+        return [(score - low) / spread for score in scores] if spread > 0 else [1.0] * count
+    if strategy == "zscore":
+        # 均值与标准差使用与_normalize相同的NumPy实现，避免求和舍入不同导致近似并列时顺序不同
+        values = np.asarray(scores, dtype=np.float64)
+        mean = float(values.mean())
+        std = float(values.std())
+        return [(score - mean) / std for score in scores] if std > 0 else [0.0] * count
+    
+    raise ValueError(f"不支持的融合策略: {strategy}")
+
+
+def _fuse_small(
+    ids: Sequence[str],
+    contributions: Sequence[float],
+    top_k: int
+) -> Tuple[List[int], List[float]]:
+    """
+    在Python字典上累加得分并排序，语义与fuse的NumPy实现一致
+    
+    Args:
+        ids: 拼接后的候选id
+        contributions: 与ids对应的加权得分
+        top_k: 返回数量
+    
+    Returns:
+        Tuple[List[int], List[float]]: 拼接数组中的位置与融合得分（按得分降序）
+    """
+    fused = {}
+    last = {}
+    for position, item_id in enumerate(ids):
+        fused[item_id] = fused.get(item_id, 0.0) + contributions[position]
+        last[item_id] = position
+    
+    # 字典按首次出现的顺序迭代，稳定排序使得分相同时保持该顺序
+    top = sorted(fused, key=fused.__getitem__, reverse=True)[:top_k]
+    return [last[item_id] for item_id in top], [fused[item_id] for item_id in top]
+
+
+def top_k_indices(scores: np.ndarray, top_k: int, tie_breaker: np.ndarray = None) -> np.ndarray:
+    """
+    选出得分最高的top_k个位置，按得分降序排列
+    
+    Args:
+        scores: 得分
+        top_k: 返回数量
+        tie_breaker: 得分相同时按该值升序排列，默认按位置
+    
+    Returns:
+        np.ndarray: 位置数组
+    """
+    if tie_breaker is None:
+        tie_breaker = np.arange(len(scores))
+    if len(scores) > top_k:
+        # 取第top_k大的得分作为阈值，与阈值相同的候选全部保留，再按tie_breaker截断
+        threshold = -np.partition(-scores, top_k - 1)[top_k - 1]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((tie_breaker[candidates], -scores[candidates]))
+    return candidates[order[:top_k]]
+
+
+def fuse(
+    semantic_ids: Sequence[str],
+    semantic_scores: Sequence[float],
+    exact_ids: Sequence[str],
+    exact_scores: Sequence[float],
+    top_k: int,
+    strategy: str = "rank",
+    semantic_weight: float = 0.7,
+    exact_weight: float = 0.3,
+    rrf_k: int = 60
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    融合语义检索与精确匹配的结果
+    
+    两路候选拼接为一个数组（语义在前、精确匹配在后），同一id的得分累加。
+    返回的位置指向该id在拼接数组中最后一次出现的位置，即同时命中时取精确匹配的结果。
+    
+    Args:
+        semantic_ids: 语义检索结果id（按名次排列）
+        semantic_scores: 语义检索得分（内积相似度）
+        exact_ids: 精确匹配结果id（按名次排列）
+        exact_scores: 精确匹配得分（ES _score或BM25得分）
+        top_k: 返回结果数量
+        strategy: 融合策略
+        semantic_weight: 语义检索权重
+        exact_weight: 精确匹配权重
+        rrf_k: RRF平滑常数
+    
+    Returns:
+        Tuple[Sequence[int], Sequence[float]]: 拼接数组中的位置与融合得分（按得分降序）；
+        候选较少时为列表，否则为NumPy数组
+    """
+    if len(semantic_ids) + len(exact_ids) < NUMPY_MIN_CANDIDATES:
+        contributions = [
+            semantic_weight * score for score in _normalize_list(semantic_scores, strategy, rrf_k)
+        ] + [
+            exact_weight * score for score in _normalize_list(exact_scores, strategy, rrf_k, presence=True)
+        ]
+        return _fuse_small([*semantic_ids, *exact_ids], contributions, top_k)
+    
+    # id按首次出现的顺序编码为整数，之后只在整数数组上计算
+    codes_map = {}
+    codes = np.fromiter(
+        (codes_map.setdefault(item_id, len(codes_map)) for item_id in (*semantic_ids, *exact_ids)),
+        dtype=np.int64,
+        count=len(semantic_ids) + len(exact_ids)
+    )
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    
+    contributions = np.concatenate([
+        semantic_weight * _normalize(semantic_scores, strategy, rrf_k),
+        exact_weight * _normalize(exact_scores, strategy, rrf_k, presence=True)
+    ])
+    fused = np.bincount(codes, weights=contributions, minlength=len(codes_map))
+    
+    # 每个id最后一次出现的位置
+    last = np.zeros(len(codes_map), dtype=np.int64)
+    np.maximum.at(last, codes, np.arange(len(codes)))
+    
+    # 编码即首次出现的顺序，得分相同时按该顺序排列
+    top = top_k_indices(fused, top_k)
+    return last[top], fused[top]
@@ -1,13 +1,26 @@
 """
 混合检索算法模块，实现语义检索与精确匹配的结合
 """
+import os
+import time
+import uuid
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import faiss
 import numpy as np
-from typing import List, Dict, Any
-from elasticsearch import Elasticsearch
+from typing import List, Dict, Any, Optional
+from elasticsearch import Elasticsearch, AsyncElasticsearch
 from sentence_transformers import SentenceTransformer
 
 from ...config import active_config
+from .query_encoder import BatchingQueryEncoder
+from .cache import EmbeddingCache, ResultCache, connect_redis
+from .es_queries import VECTOR_FIELD, FILTER_FIELDS, build_exact_query, build_knn_query, parse_hits
+from .fusion import fuse, FUSION_STRATEGIES
+from .index_bundle import IndexBundle
+from .bundle_layout import read_current
 
 
 class HybridSearchEngine:
@@ -15,104 +28,1073 @@ class HybridSearchEngine:
     混合检索引擎，结合向量检索和精确匹配
     """
     
+    # 过滤条件字段到元数据存储字段的映射（与ES查询共用）
+    FILTER_FIELDS = FILTER_FIELDS
+    
     def __init__(self):
-        """初始化混合检索引擎"""
+        """
+        初始化混合检索引擎
+        
+        先校验配置并加载索引包，索引包尚未发布或损坏时在加载向量模型、启动编码线程和
+        创建线程池与ES客户端之前失败，预热重试不会重复创建这些资源。
+        """
+        # 精确匹配后端：Elasticsearch，或单机部署时使用进程内BM25倒排索引
+        self.lexical_backend = active_config.LEXICAL_BACKEND
+        
+        # 检索后端：FAISS+ES两路检索后合并，或ES dense_vector单次请求
+        self.search_backend = active_config.SEARCH_BACKEND
+        if self.search_backend == "es_knn" and self.lexical_backend == "bm25":
+            raise ValueError("SEARCH_BACKEND=es_knn需要Elasticsearch，不能与LEXICAL_BACKEND=bm25同时使用")
+        if active_config.FUSION_STRATEGY not in FUSION_STRATEGIES:
+            raise ValueError(f"不支持的融合策略: {active_config.FUSION_STRATEGY}")
+        
+        # 当前索引包（FAISS索引、元数据存储、嵌入矩阵、BM25索引与增量段），运行中可原子切换
+        self._bundle_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._failed_bundle_version = None
+        self._warm_up_query = None
+        self.bundle = self._load_bundle()
+        
+        try:
+            self._init_services()
+        except Exception:
+            self.bundle.close()
+            raise
+        
+        # 后台线程检查新发布的索引包，加载预热后切换，不影响正在处理的请求
+        self._stop_watching = threading.Event()
+        self._bundle_watcher = None
+        if active_config.INDEX_BUNDLE_ROOT:
+            self._bundle_watcher = threading.Thread(
+                target=self._watch_bundles, name="bundle-watcher", daemon=True
+            )
+            self._bundle_watcher.start()
+    
+    def _init_services(self):
+        """加载向量模型，创建编码服务、缓存、ES客户端与检索线程池"""
         # 加载向量模型
         self.model = SentenceTransformer(active_config.EMBEDDING_MODEL)
         
-        # 加载FAISS索引
-        self.index = faiss.read_index(active_config.FAISS_INDEX_PATH)
+        # 微批处理编码服务，合并并发请求的查询
+        self.encoder = BatchingQueryEncoder(
+            self.model,
+            batch_window_ms=active_config.ENCODER_BATCH_WINDOW_MS,
+            max_batch_size=active_config.ENCODER_MAX_BATCH_SIZE
+        )
+        
+        # Redis作为多进程共享的二级缓存（可选）
+        redis_client = None
+        if active_config.EMBEDDING_CACHE_REDIS or active_config.RESULT_CACHE_REDIS:
+            redis_client = connect_redis(
+                active_config.REDIS_HOST, active_config.REDIS_PORT, active_config.REDIS_DB
+            )
+        
+        # 查询向量缓存
+        self.embedding_cache = EmbeddingCache(
+            active_config.EMBEDDING_MODEL,
+            max_size=active_config.EMBEDDING_CACHE_SIZE,
+            ttl=active_config.CACHE_EXPIRATION,
+            redis_client=redis_client if active_config.EMBEDDING_CACHE_REDIS else None
+        )
+        
+        # 混合检索结果缓存，键中包含索引版本
+        self.result_cache = ResultCache(
+            max_size=active_config.RESULT_CACHE_SIZE,
+            ttl=active_config.CACHE_EXPIRATION,
+            redis_client=redis_client if active_config.RESULT_CACHE_REDIS else None
+        )
+        
+        # 精确匹配后端为Elasticsearch时创建客户端
+        self.es = None
+        self.async_es = None
+        if self.lexical_backend != "bm25":
+            # 初始化Elasticsearch客户端
+            self.es = Elasticsearch(
+                hosts=[f"{active_config.ELASTICSEARCH_HOST}:{active_config.ELASTICSEARCH_PORT}"]
+            )
+            
+            # 异步检索路径：ES使用异步客户端
+            self.async_es = AsyncElasticsearch(
+                hosts=[f"{active_config.ELASTICSEARCH_HOST}:{active_config.ELASTICSEARCH_PORT}"]
+            )
+        
+        # 向量检索等CPU计算在线程池中执行
+        self._executor = ThreadPoolExecutor(
+            max_workers=active_config.SEARCH_THREADS, thread_name_prefix="search"
+        )
+        
+        # 各ES索引的版本（索引重建后uuid改变），按固定间隔刷新
+        self._es_versions = {}
+        self._version_lock = threading.Lock()
+    
+    def _load_bundle(self, version: Optional[str] = None) -> IndexBundle:
+        """
+        加载索引包：根目录下已发布版本时加载版本化的索引包，否则加载单文件部署的各个路径
+        
+        Args:
+            version: 索引包版本，默认为CURRENT记录的版本
+            
+        Returns:
+            IndexBundle: 索引包
+        """
+        options = {
+            "use_mmap": active_config.FAISS_MMAP,
+            "load_lexical": self.lexical_backend == "bm25",
+            "es_index": active_config.ELASTICSEARCH_INDEX,
+            "delta_log_path": active_config.DELTA_LOG_PATH,
+            "delta_refresh_interval": active_config.DELTA_REFRESH_INTERVAL
+        }
+        
+        root = active_config.INDEX_BUNDLE_ROOT
+        version = version or (read_current(root) if root else None)
+        if version:
+            return IndexBundle.from_directory(os.path.join(root, version), **options)
         
-        # 初始化Elasticsearch客户端
-        self.es = Elasticsearch(
-            hosts=[f"{active_config.ELASTICSEARCH_HOST}:{active_config.ELASTICSEARCH_PORT}"]
+        return IndexBundle(
+            {
+                "index": active_config.FAISS_INDEX_PATH,
+                "manifest": active_config.INDEX_MANIFEST_PATH,
+                "metadata_store": active_config.METADATA_STORE_PATH,
+                "embeddings": active_config.EMBEDDINGS_PATH,
+                "bm25": active_config.BM25_INDEX_PATH
+            },
+            **options
         )
+    
+    @contextmanager
+    def _use_bundle(self):
+        """
+        在一次查询期间固定使用当前索引包，切换版本时旧索引包等待查询结束后再释放
+        
+        Yields:
+            IndexBundle: 当前索引包
+        """
+        with self._bundle_lock:
+            bundle = self.bundle
+            bundle.acquire()
+        try:
+            yield bundle
+        finally:
+            bundle.release()
+    
+    def _watch_bundles(self):
+        """后台检查CURRENT文件，发现新发布的版本时加载并切换"""
+        while not self._stop_watching.wait(active_config.INDEX_BUNDLE_CHECK_INTERVAL):
+            try:
+                version = read_current(active_config.INDEX_BUNDLE_ROOT)
+                if version and version != self.bundle.version and version != self._failed_bundle_version:
+                    self.reload_bundle(version)
+            except Exception as e:
+                print(f"检查索引包失败: {str(e)}")
+    
+    def reload_bundle(self, version: Optional[str] = None) -> bool:
+        """
+        加载新版本的索引包并原子切换
+        
+        新索引包在后台加载并预热，切换只替换一个引用；切换前开始的查询继续使用旧索引包，
+        全部结束后释放旧索引包映射的文件。加载失败时继续使用当前版本。
+        
+        Args:
+            version: 索引包版本，默认为CURRENT记录的版本
+            
+        Returns:
+            bool: 是否已切换
+        """
+        with self._reload_lock:
+            root = active_config.INDEX_BUNDLE_ROOT
+            version = version or (read_current(root) if root else None)
+            if not version or version == self.bundle.version:
+                return False
+            
+            try:
+                bundle = self._load_bundle(version)
+                if bundle.index.d != self.model.get_sentence_embedding_dimension():
+                    raise ValueError(f"索引包{bundle.version}的向量维度{bundle.index.d}与向量模型不一致")
+                
+                # 预热：预读索引文件并执行一次检索，切换后的首批查询不出现延迟尖峰
+                bundle.prefetch()
+                if self._warm_up_query is not None:
+                    bundle.index.search(self.encode_queries([self._warm_up_query]), 1)
+            except Exception as e:
+                self._failed_bundle_version = version
+                print(f"加载索引包失败: {str(e)}")
+                return False
+            
+            with self._bundle_lock:
+                old_bundle = self.bundle
+                self.bundle = bundle
+            print(f"已切换到索引包: {bundle.version}")
+            
+            # 等待旧索引包上进行中的查询结束后释放
+            if old_bundle.retire(timeout=active_config.INDEX_BUNDLE_DRAIN_TIMEOUT):
+                old_bundle.close()
+            else:
+                print(f"旧索引包{old_bundle.version}未在超时时间内排空，由垃圾回收释放")
+            return True
+    
+    def index_version(self, bundle: Optional[IndexBundle] = None) -> str:
+        """
+        获取索引版本，由索引包版本、精确匹配索引（ES或BM25）与增量段共同决定
+        
+        Args:
+            bundle: 索引包，默认为当前索引包
+            
+        Returns:
+            str: 索引版本
+        """
+        bundle = bundle or self.bundle
+        
+        # 增量段新增题目后缓存的结果同样失效
+        bundle.delta.maybe_refresh()
+        if self.es is None:
+            return f"{bundle.version}:{bundle.lexical_version}:{len(bundle.delta)}"
         
-        # 加载元数据映射
-        self.metadata_map = self._load_metadata_map()
+        now = time.monotonic()
+        es_version, checked_at = self._es_versions.get(bundle.es_index, ("unknown", 0.0))
+        if now - checked_at >= active_config.INDEX_VERSION_CHECK_INTERVAL:
+            with self._version_lock:
+                es_version, checked_at = self._es_versions.get(bundle.es_index, ("unknown", 0.0))
+                if now - checked_at >= active_config.INDEX_VERSION_CHECK_INTERVAL:
+                    try:
+                        settings = self.es.indices.get_settings(index=bundle.es_index)
+                        # 别名可能指向具体索引，取实际索引的uuid
+                        es_version = ",".join(
+                            sorted(value["settings"]["index"]["uuid"] for value in settings.values())
+                        )
+                    except Exception as e:
+                        print(f"获取ES索引版本失败: {str(e)}")
+                        es_version = "unknown"
+                    self._es_versions[bundle.es_index] = (es_version, now)
+        
+        return f"{bundle.version}:{es_version}:{len(bundle.delta)}"
     
-    def _load_metadata_map(self) -> Dict[int, Dict[str, Any]]:
+    def _cache_version(self, nprobe: Optional[int] = None, bundle: Optional[IndexBundle] = None) -> str:
         """
-        加载元数据映射，将索引ID映射到题目元数据
+        结果缓存使用的版本，指定nprobe的请求与默认请求分开缓存
         
+        Args:
+            nprobe: 请求级nprobe
+            bundle: 索引包，默认为当前索引包
+            
         Returns:
-            Dict[int, Dict[str, Any]]: 元数据映射字典
+            str: 缓存版本
         """
-        # 实际项目中应从数据库或文件加载
-        # 这里使用示例数据
-        return {}  # 实际实现时需要加载真实数据
+        version = self.index_version(bundle)
+        return f"{version}/nprobe={nprobe}" if nprobe else version
     
-    def semantic_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        编码查询文本，优先读取向量缓存，未命中的查询交给编码服务
+        
+        Args:
+            queries: 查询文本列表
+            
+        Returns:
+            np.ndarray: 形状为(len(queries), dim)的归一化float32矩阵
+        """
+        vectors, keys = self.embedding_cache.get_many(queries)
+        
+        # 同一批次中重复的未命中查询只编码一次
+        missing_keys = list(dict.fromkeys(key for key, vector in zip(keys, vectors) if vector is None))
+        if missing_keys:
+            encoded = self.encoder.encode_many(missing_keys)
+            self.embedding_cache.set_many(missing_keys, encoded)
+            encoded_map = dict(zip(missing_keys, encoded))
+            vectors = [encoded_map[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        
+        return np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+    
+    def semantic_search(
+        self, 
+        query: str, 
+        top_k: int = 5, 
+        filters: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         执行语义检索
         
         Args:
             query: 查询文本
             top_k: 返回结果数量
+            filters: 过滤条件，可由属性位图处理的条件会直接限制向量检索范围
+            nprobe: 请求级IVF探测列表数，默认使用清单中调优的值
             
         Returns:
             List[Dict[str, Any]]: 检索结果列表
         """
-        # 编码查询文本
-        query_vector = self.model.encode(query)
+        return self.semantic_search_batch([query], top_k=top_k, filters_list=[filters], nprobe=nprobe)[0]
+    
+    def semantic_search_batch(
+        self, 
+        queries: List[str], 
+        top_k: int = 5, 
+        filters_list: Optional[List[Optional[Dict[str, Any]]]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量执行语义检索，一次编码全部查询，无过滤条件的查询合并为一次矩阵检索
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回的结果数量
+            filters_list: 与queries一一对应的过滤条件
+            nprobe: 请求级IVF探测列表数，默认使用清单中调优的值
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 与queries一一对应的检索结果列表
+        """
+        with self._use_bundle() as bundle:
+            return self._semantic_search_batch(bundle, queries, top_k, filters_list, nprobe)
+    
+    def _semantic_search_batch(
+        self, 
+        bundle: IndexBundle, 
+        queries: List[str], 
+        top_k: int = 5, 
+        filters_list: Optional[List[Optional[Dict[str, Any]]]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        在指定索引包中批量执行语义检索
+        
+        Args:
+            bundle: 索引包
+            queries: 查询文本列表
+            top_k: 每个查询返回的结果数量
+            filters_list: 与queries一一对应的过滤条件
+            nprobe: 请求级IVF探测列表数，默认使用清单中调优的值
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 与queries一一对应的检索结果列表
+        """
+        if not queries:
+            return []
+        
+        # 编码全部查询（返回已归一化的向量）
+        query_vectors = self.encode_queries(queries)
+        
+        if bundle.metadata is None:
+            return [[] for _ in queries]
+        bundle.delta.maybe_refresh()
+        
+        # 可由属性位图处理的过滤条件
+        if filters_list is None:
+            filters_list = [None] * len(queries)
+        bitmaps = [
+            bundle.metadata.filter_bitmap(self._bitmap_conditions(filters))
+            if self.supports_filters(filters, bundle) else None
+            for filters in filters_list
+        ]
+        
+        batch_results = [None] * len(queries)
+        
+        # 无过滤条件的查询合并为一次矩阵检索，再与增量段的结果合并
+        plain = [i for i, bitmap in enumerate(bitmaps) if bitmap is None]
+        if plain:
+            params = self._search_params(bundle, nprobe=nprobe)
+            if params is not None:
+                distances, indices = bundle.index.search(query_vectors[plain], top_k, params=params)
+            else:
+                distances, indices = bundle.index.search(query_vectors[plain], top_k)
+            delta_distances, delta_indices = bundle.delta.search(query_vectors[plain], top_k)
+            for j, i in enumerate(plain):
+                row_indices, row_distances = self._merge_delta(
+                    indices[j], distances[j], delta_indices[j], delta_distances[j], top_k
+                )
+                batch_results[i] = self._build_results(bundle, row_indices, row_distances)
+        
+        # 带过滤条件的查询只在满足条件的行中检索
+        for i, bitmap in enumerate(bitmaps):
+            if bitmap is not None:
+                row_indices, row_distances = self._filtered_search(bundle, query_vectors[i], top_k, bitmap, nprobe)
+                delta_distances, delta_indices = bundle.delta.search(
+                    query_vectors[i:i + 1], top_k, conditions=self._bitmap_conditions(filters_list[i])
+                )
+                row_indices, row_distances = self._merge_delta(
+                    row_indices, row_distances, delta_indices[0], delta_distances[0], top_k
+                )
+                batch_results[i] = self._build_results(bundle, row_indices, row_distances)
+        
+        return batch_results
+    
+    @staticmethod
+    def _merge_delta(
+        row_indices: np.ndarray, 
+        row_distances: np.ndarray, 
+        delta_indices: np.ndarray, 
+        delta_distances: np.ndarray, 
+        top_k: int
+    ):
+        """
+        合并基础索引与增量段的检索结果
         
-        # 归一化向量
-        faiss.normalize_L2(query_vector.reshape(1, -1))
+        Args:
+            row_indices: 基础索引的行号
+            row_distances: 基础索引的相似度
+            delta_indices: 增量段的行号
+            delta_distances: 增量段的相似度
+            top_k: 返回结果数量
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 合并后的行号与相似度（按相似度降序）
+        """
+        delta_valid = delta_indices >= 0
+        if not delta_valid.any():
+            return row_indices, row_distances
         
-        # 执行检索
-        distances, indices = self.index.search(query_vector.reshape(1, -1), top_k)
+        valid = row_indices >= 0
+        rows = np.concatenate([row_indices[valid], delta_indices[delta_valid]])
+        distances = np.concatenate([row_distances[valid], delta_distances[delta_valid]])
+        order = np.argsort(-distances, kind="stable")[:top_k]
+        return rows[order], distances[order]
+    
+    @staticmethod
+    def _build_results(
+        bundle: IndexBundle, 
+        row_indices: np.ndarray, 
+        row_distances: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """
+        根据FAISS行号构建检索结果（每条结果都是新构建的字典）
         
-        # 获取结果
+        Args:
+            bundle: 索引包
+            row_indices: FAISS行号
+            row_distances: 对应的相似度
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
         results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1:  # 有效索引
-                item = self.metadata_map.get(int(idx), {})
-                if item:
-                    item["score"] = float(distances[0][i])
+        for row, distance in zip(row_indices, row_distances):
+            if 0 <= row < len(bundle.metadata):
+                results.append(bundle.metadata.record(int(row), float(distance)))
+            elif row >= len(bundle.metadata):
+                # 增量段中的题目
+                item = bundle.delta.record(int(row), float(distance))
+                if item is not None:
                     results.append(item)
-        
         return results
     
-    def exact_search(self, filters: Dict[str, Any], size: int = 5) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _active_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        去掉取值为空的过滤条件
+        
+        Args:
+            filters: 过滤条件
+            
+        Returns:
+            Dict[str, Any]: 有效的过滤条件
+        """
+        return {key: value for key, value in (filters or {}).items() if value}
+    
+    def supports_filters(self, filters: Optional[Dict[str, Any]], bundle: Optional[IndexBundle] = None) -> bool:
+        """
+        判断过滤条件能否全部由属性位图处理
+        
+        Args:
+            filters: 过滤条件
+            bundle: 索引包，默认为当前索引包
+            
+        Returns:
+            bool: 存在有效条件且全部字段都有属性位图时返回True
+        """
+        active = self._active_filters(filters)
+        metadata = (bundle or self.bundle).metadata
+        if not active or metadata is None:
+            return False
+        return all(
+            key in self.FILTER_FIELDS and metadata.has_field(self.FILTER_FIELDS[key])
+            for key in active
+        )
+    
+    def _bitmap_conditions(self, filters: Dict[str, Any]) -> Dict[str, str]:
+        """
+        将过滤条件转换为元数据存储的字段条件
+        
+        Args:
+            filters: 过滤条件
+            
+        Returns:
+            Dict[str, str]: 存储字段名到取值的映射
+        """
+        return {self.FILTER_FIELDS[key]: str(value) for key, value in self._active_filters(filters).items()}
+    
+    def _filtered_search(
+        self, 
+        bundle: IndexBundle, 
+        query_vector: np.ndarray, 
+        top_k: int, 
+        bitmap: np.ndarray, 
+        nprobe: Optional[int] = None
+    ):
+        """
+        在位图限定的行中执行向量检索
+        
+        候选较少时直接对mmap的嵌入矩阵做精确计算；否则通过IDSelectorBitmap限制
+        FAISS检索范围，IVF索引在结果不足时自适应增大nprobe。
+        
+        Args:
+            bundle: 索引包
+            query_vector: 归一化的查询向量
+            top_k: 返回结果数量
+            bitmap: 满足条件的行位图
+            nprobe: 请求级IVF探测列表数
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 行号与相似度（按相似度降序）
+        """
+        candidates = bundle.metadata.bitmap_rows(bitmap)
+        if candidates.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        wanted = min(top_k, candidates.size)
+        
+        # 候选较少时精确计算
+        if bundle.embeddings is not None and candidates.size <= active_config.FILTER_EXACT_MAX_CANDIDATES:
+            scores = bundle.embeddings[candidates] @ query_vector
+            top = np.argpartition(-scores, wanted - 1)[:wanted] if wanted < scores.size else np.arange(scores.size)
+            top = top[np.argsort(-scores[top])]
+            return candidates[top], scores[top]
+        
+        # 限制FAISS检索范围
+        selector = faiss.IDSelectorBitmap(len(bundle.metadata), faiss.swig_ptr(bitmap))
+        query_matrix = query_vector.reshape(1, -1)
+        ivf = bundle.ivf_index()
+        if ivf is None:
+            params = faiss.SearchParameters(sel=selector)
+            distances, indices = bundle.index.search(query_matrix, top_k, params=params)
+            return indices[0], distances[0]
+        
+        nprobe = nprobe or ivf.nprobe
+        while True:
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+            distances, indices = bundle.index.search(query_matrix, top_k, params=params)
+            found = int((indices[0] >= 0).sum())
+            if found >= wanted or nprobe >= ivf.nlist:
+                return indices[0], distances[0]
+            # 探测的倒排列表中候选不足，扩大探测范围
+            nprobe = min(nprobe * 4, ivf.nlist)
+    
+    @staticmethod
+    def _search_params(bundle: IndexBundle, nprobe: Optional[int] = None):
+        """
+        构建请求级检索参数，不修改共享索引的状态，可在并发请求中安全使用
+        
+        Args:
+            bundle: 索引包
+            nprobe: 请求级IVF探测列表数
+            
+        Returns:
+            Optional[faiss.SearchParameters]: 无需覆盖时返回None
+        """
+        if not nprobe:
+            return None
+        ivf = bundle.ivf_index()
+        if ivf is None:
+            return None
+        return faiss.SearchParametersIVF(nprobe=min(int(nprobe), ivf.nlist))
+    
+    def warm_up(self, query: str):
+        """
+        预热：执行一次编码和检索，使模型权重与索引页面进入内存
+        
+        Args:
+            query: 预热查询
+        """
+        self._warm_up_query = query
+        query_vector = self.encoder.encode_many([query])
+        with self._use_bundle() as bundle:
+            bundle.index.search(query_vector, 1)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取检索引擎运行指标
+        
+        Returns:
+            Dict[str, Any]: 各组件的指标
+        """
+        with self._use_bundle() as bundle:
+            ivf = bundle.ivf_index()
+            return {
+                "encoder": self.encoder.stats(),
+                "embedding_cache": self.embedding_cache.stats(),
+                "result_cache": self.result_cache.stats(),
+                "index_version": self.index_version(bundle),
+                "bundle_version": bundle.version,
+                "corpus_hash": bundle.manifest.get("corpus_hash"),
+                "es_index": bundle.es_index,
+                "index_load_mode": bundle.index_load_mode,
+                "search_backend": self.search_backend,
+                "lexical_backend": self.lexical_backend,
+                "delta_size": len(bundle.delta),
+                "nprobe": ivf.nprobe if ivf is not None else None
+            }
+    
+    @staticmethod
+    def question_text(question: Dict[str, Any]) -> str:
+        """
+        构建题目的编码文本（与vectorize.py的预处理保持一致）
+        
+        Args:
+            question: 题目数据
+            
+        Returns:
+            str: 标题、描述与标签拼接的文本
+        """
+        tags = [str(tag) for tag in question.get("tags") or []]
+        return " ".join([question.get("title", ""), question.get("description", ""), " ".join(tags)])
+    
+    def encode_question(self, question: Dict[str, Any]) -> np.ndarray:
+        """
+        编码题目，得到与索引中题目向量可比较的归一化向量
+        
+        Args:
+            question: 题目数据
+            
+        Returns:
+            np.ndarray: 归一化float32向量
+        """
+        return self.encoder.encode_many([self.question_text(question)])[0]
+    
+    def nearest_questions(self, vector: np.ndarray, top_k: int = 1) -> List[Dict[str, Any]]:
+        """
+        按向量检索最相似的已有题目（基础索引与增量段，不加过滤条件）
+        
+        Args:
+            vector: 归一化的题目向量
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表，score为余弦相似度
+        """
+        query_vector = np.ascontiguousarray(vector.reshape(1, -1), dtype=np.float32)
+        with self._use_bundle() as bundle:
+            if bundle.metadata is None:
+                return []
+            bundle.delta.maybe_refresh()
+            distances, indices = bundle.index.search(query_vector, top_k)
+            delta_distances, delta_indices = bundle.delta.search(query_vector, top_k)
+            row_indices, row_distances = self._merge_delta(
+                indices[0], distances[0], delta_indices[0], delta_distances[0], top_k
+            )
+            return self._build_results(bundle, row_indices, row_distances)
+    
+    @staticmethod
+    def new_question_id() -> str:
+        """
+        为生成的题目分配ID（gen_前缀），避免与数据集中的题目ID冲突
+        
+        Returns:
+            str: 题目ID
+        """
+        return f"gen_{uuid.uuid4().hex}"
+    
+    def add_question(
+        self, 
+        question: Dict[str, Any], 
+        parsed_intent: Optional[Dict[str, Any]] = None,
+        vector: Optional[np.ndarray] = None,
+        question_id: Optional[str] = None
+    ) -> str:
+        """
+        增量写入一道新题目：编码后加入增量段并写入ES，几秒内即可被检索到
+        
+        未指定question_id时分配新的ID（见new_question_id）。
+        进程内BM25索引不做增量更新，新题目在合并后才能被关键词匹配检索到。
+        
+        Args:
+            question: 题目数据（title、description、difficulty、tags等）
+            parsed_intent: 生成题目时解析的意图，用于补充数据结构与算法字段
+            vector: 已由encode_question编码的题目向量，为None时重新编码
+            question_id: 已保存到数据库的题目ID
+            
+        Returns:
+            str: 题目ID
+        """
+        parsed_intent = parsed_intent or {}
+        question["id"] = question_id or self.new_question_id()
+        tags = [str(tag) for tag in question.get("tags") or []]
+        
+        record = {
+            "id": question["id"],
+            "title": question.get("title", ""),
+            "description": question.get("description", ""),
+            "difficulty": question.get("difficulty") or "Medium",
+            "tags": tags,
+            "data_structure": question.get("data_structure") or parsed_intent.get("data_structure") or None,
+            "algorithm": question.get("algorithm") or parsed_intent.get("technique") or None
+        }
+        record["text"] = self.question_text(record)
+        if vector is None:
+            vector = self.encoder.encode_many([record["text"]])[0]
+        
+        with self._use_bundle() as bundle:
+            bundle.delta.add(record, vector)
+            
+            if self.es is not None:
+                document = {key: value for key, value in record.items() if key != "text"}
+                if self.search_backend == "es_knn":
+                    document[VECTOR_FIELD] = vector.tolist()
+                try:
+                    self.es.index(index=bundle.es_index, id=record["id"], document=document)
+                except Exception as e:
+                    print(f"写入ES失败: {str(e)}")
+        
+        return record["id"]
+    
+    def _lexical_search(
+        self, 
+        bundle: IndexBundle, 
+        filters: Dict[str, Any], 
+        size: int = 5, 
+        query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        使用进程内BM25倒排索引执行精确匹配，过滤条件由元数据存储的属性位图处理
+        
+        Args:
+            bundle: 索引包
+            filters: 过滤条件
+            size: 返回结果数量
+            query: 查询文本
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
+        active = self._active_filters(filters)
+        if bundle.lexical_index is None or (not active and not query):
+            return []
+        
+        bitmap = None
+        if active:
+            if not self.supports_filters(active, bundle):
+                # 没有属性位图的字段无法匹配任何行（与ES对不存在字段的term查询一致）
+                return []
+            bitmap = bundle.metadata.filter_bitmap(self._bitmap_conditions(active))
+        
+        rows, scores = bundle.lexical_index.search(query or "", size=size, bitmap=bitmap)
+        return bundle.metadata.records(rows, scores)
+    
+    def _lexical_query(self, bundle: IndexBundle, query: str) -> Optional[str]:
+        """
+        混合检索中精确匹配使用的查询文本
+        
+        进程内BM25索引可以在属性位图限定的行上计分，过滤条件走位图与走精确匹配索引时都对查询文本
+        做关键词匹配；使用ES时位图路径不请求ES，精确匹配只按过滤条件，两条路径的排序规则保持一致。
+        
+        Args:
+            bundle: 索引包
+            query: 查询文本
+            
+        Returns:
+            Optional[str]: 查询文本，不参与精确匹配时返回None
+        """
+        return query if bundle.lexical_index is not None else None
+    
+    def _bitmap_exact_search(
+        self, 
+        bundle: IndexBundle, 
+        filters: Dict[str, Any], 
+        size: int, 
+        query: str
+    ) -> List[Dict[str, Any]]:
+        """
+        过滤条件由属性位图处理时的精确匹配：BM25只在满足条件的行上计分，不请求ES
+        
+        Args:
+            bundle: 索引包
+            filters: 过滤条件
+            size: 返回结果数量
+            query: 查询文本
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表，未加载BM25索引时为空
+        """
+        if bundle.lexical_index is None:
+            return []
+        return self._lexical_search(bundle, filters, size=size, query=query)
+    
+    def exact_search(
+        self, 
+        filters: Dict[str, Any], 
+        size: int = 5, 
+        query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         执行精确匹配检索
         
         Args:
             filters: 过滤条件
             size: 返回结果数量
+            query: 查询文本，对标题和描述做关键词匹配
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
+        with self._use_bundle() as bundle:
+            return self._exact_search(bundle, filters, size=size, query=query)
+    
+    def _exact_search(
+        self, 
+        bundle: IndexBundle, 
+        filters: Dict[str, Any], 
+        size: int = 5, 
+        query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        在指定索引包对应的精确匹配索引中检索
+        
+        Args:
+            bundle: 索引包
+            filters: 过滤条件
+            size: 返回结果数量
+            query: 查询文本
             
         Returns:
             List[Dict[str, Any]]: 检索结果列表
         """
+        if self.es is None:
+            return self._lexical_search(bundle, filters, size=size, query=query)
+        
         # 构建查询
-        must_clauses = []
-        for key, value in filters.items():
-            if value:
-                must_clauses.append({"term": {key: value}})
+        body = build_exact_query(filters, query)
+        if body is None:
+            return []
         
         # 执行查询
-        if must_clauses:
-            query = {
-                "query": {
-                    "bool": {
-                        "must": must_clauses
-                    }
-                }
-            }
-            response = self.es.search(index="kodcode", body=query, size=size)
+        response = self.es.search(index=bundle.es_index, body=body, size=size)
+        return parse_hits(response)
+    
+    async def exact_search_async(
+        self, 
+        filters: Dict[str, Any], 
+        size: int = 5, 
+        query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        异步执行精确匹配检索，不阻塞事件循环
+        
+        Args:
+            filters: 过滤条件
+            size: 返回结果数量
+            query: 查询文本，对标题和描述做关键词匹配
             
-            # 处理结果
-            results = []
-            for hit in response["hits"]["hits"]:
-                item = hit["_source"]
-                item["score"] = hit["_score"]
-                results.append(item)
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
+        with self._use_bundle() as bundle:
+            return await self._exact_search_async(bundle, filters, size=size, query=query)
+    
+    async def _exact_search_async(
+        self, 
+        bundle: IndexBundle, 
+        filters: Dict[str, Any], 
+        size: int = 5, 
+        query: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        异步在指定索引包对应的精确匹配索引中检索
+        
+        Args:
+            bundle: 索引包
+            filters: 过滤条件
+            size: 返回结果数量
+            query: 查询文本
             
-            return results
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
+        if self.es is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, lambda: self._lexical_search(bundle, filters, size=size, query=query)
+            )
+        
+        body = build_exact_query(filters, query)
+        if body is None:
+            return []
+        
+        response = await self.async_es.search(index=bundle.es_index, body=body, size=size)
+        return parse_hits(response)
+    
+    def _knn_body(self, query_vector: np.ndarray, filters: Dict[str, Any], top_k: int, query: str) -> Dict[str, Any]:
+        """
+        构建ES kNN检索的查询体
+        
+        Args:
+            query_vector: 归一化的查询向量
+            filters: 过滤条件
+            top_k: 返回结果数量
+            query: 查询文本
+            
+        Returns:
+            Dict[str, Any]: ES查询体
+        """
+        return build_knn_query(
+            query_vector.tolist(),
+            filters,
+            top_k,
+            num_candidates=active_config.ES_KNN_NUM_CANDIDATES,
+            query=query,
+            knn_boost=active_config.ES_KNN_BOOST,
+            query_boost=active_config.ES_KNN_QUERY_BOOST
+        )
+    
+    @staticmethod
+    def _knn_results(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        处理ES kNN检索结果，ES返回的合并得分即混合得分
         
-        return []
+        Args:
+            response: ES响应
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果列表
+        """
+        results = parse_hits(response)
+        for item in results:
+            item["hybrid_score"] = item["score"]
+        return results
     
-    def hybrid_search(self, query: str, filters: Dict[str, Any] = None, top_k: int = 10) -> List[Dict[str, Any]]:
+    def knn_search(self, query: str, filters: Dict[str, Any], top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        使用ES dense_vector执行混合检索，向量近邻、过滤条件与关键词匹配在一次请求中完成
+        
+        Args:
+            query: 查询文本
+            filters: 过滤条件
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Dict[str, Any]]: 混合排序后的检索结果
+        """
+        with self._use_bundle() as bundle:
+            return self._knn_search(bundle, query, filters, top_k)
+    
+    def _knn_search(
+        self, 
+        bundle: IndexBundle, 
+        query: str, 
+        filters: Dict[str, Any], 
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        在指定索引包对应的ES索引中执行dense_vector混合检索
+        
+        Args:
+            bundle: 索引包（调用方已持有）
+            query: 查询文本
+            filters: 过滤条件
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Dict[str, Any]]: 混合排序后的检索结果
+        """
+        query_vector = self.encode_queries([query])[0]
+        response = self.es.search(
+            index=bundle.es_index, body=self._knn_body(query_vector, filters, top_k, query), size=top_k
+        )
+        return self._knn_results(response)
+    
+    async def knn_search_async(self, query: str, filters: Dict[str, Any], top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        异步执行ES dense_vector混合检索，编码在线程池中执行
+        
+        Args:
+            query: 查询文本
+            filters: 过滤条件
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Dict[str, Any]]: 混合排序后的检索结果
+        """
+        with self._use_bundle() as bundle:
+            return await self._knn_search_async(bundle, query, filters, top_k)
+    
+    async def _knn_search_async(
+        self, 
+        bundle: IndexBundle, 
+        query: str, 
+        filters: Dict[str, Any], 
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        异步在指定索引包对应的ES索引中执行dense_vector混合检索
+        
+        Args:
+            bundle: 索引包（调用方已持有）
+            query: 查询文本
+            filters: 过滤条件
+            top_k: 返回结果数量
+            
+        Returns:
+            List[Dict[str, Any]]: 混合排序后的检索结果
+        """
+        loop = asyncio.get_running_loop()
+        query_vector = (await loop.run_in_executor(self._executor, self.encode_queries, [query]))[0]
+        response = await self.async_es.search(
+            index=bundle.es_index, body=self._knn_body(query_vector, filters, top_k, query), size=top_k
+        )
+        return self._knn_results(response)
+    
+    def knn_search_batch(
+        self, 
+        queries: List[str], 
+        filters_list: List[Dict[str, Any]], 
+        top_k: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量执行ES dense_vector混合检索，一次编码全部查询并通过msearch一次请求完成
+        
+        Args:
+            queries: 查询文本列表
+            filters_list: 与queries一一对应的过滤条件列表
+            top_k: 每个查询返回的结果数量
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 与queries一一对应的检索结果
+        """
+        with self._use_bundle() as bundle:
+            return self._knn_search_batch(bundle, queries, filters_list, top_k)
+    
+    def _knn_search_batch(
+        self, 
+        bundle: IndexBundle, 
+        queries: List[str], 
+        filters_list: List[Dict[str, Any]], 
+        top_k: int
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        在指定索引包对应的ES索引中批量执行dense_vector混合检索
+        
+        Args:
+            bundle: 索引包（调用方已持有）
+            queries: 查询文本列表
+            filters_list: 与queries一一对应的过滤条件列表
+            top_k: 每个查询返回的结果数量
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 与queries一一对应的检索结果
+        """
+        query_vectors = self.encode_queries(queries)
+        searches = []
+        for query, filters, query_vector in zip(queries, filters_list, query_vectors):
+            body = self._knn_body(query_vector, filters, top_k, query)
+            body["size"] = top_k
+            searches.extend([{"index": bundle.es_index}, body])
+        
+        response = self.es.msearch(body=searches)
+        return [self._knn_results(item) for item in response["responses"]]
+    
+    def hybrid_search(
+        self, 
+        query: str, 
+        filters: Dict[str, Any] = None, 
+        top_k: int = 10, 
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         执行混合检索
         
@@ -120,6 +1102,7 @@ class HybridSearchEngine:
             query: 查询文本
             filters: 过滤条件
             top_k: 返回结果数量
+            nprobe: 请求级IVF探测列表数
             
         Returns:
             List[Dict[str, Any]]: 混合排序后的检索结果
@@ -128,14 +1111,171 @@ class HybridSearchEngine:
         if filters is None:
             filters = {}
         
-        # 执行语义检索
-        semantic_results = self.semantic_search(query, top_k=top_k*2)
+        # 一次查询的语义检索与精确匹配使用同一版本的索引包
+        with self._use_bundle() as bundle:
+            # 查询结果缓存
+            cache_key = self.result_cache.make_key(query, filters, top_k, self._cache_version(nprobe, bundle))
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            if self.search_backend == "es_knn":
+                # 向量近邻、过滤与关键词匹配在ES中一次完成
+                results = self._knn_search(bundle, query, filters, top_k)
+            elif self.supports_filters(filters, bundle):
+                # 过滤条件由属性位图处理，向量检索直接返回满足条件的top_k，无需请求ES
+                semantic_results = self._semantic_search_batch(bundle, [query], top_k, [filters], nprobe)[0]
+                exact_results = self._bitmap_exact_search(bundle, filters, top_k, query)
+                results = self._hybrid_rerank(semantic_results, exact_results, top_k)
+            else:
+                # 执行语义检索
+                semantic_results = self._semantic_search_batch(bundle, [query], top_k*2, None, nprobe)[0]
+                
+                # 执行精确匹配
+                exact_results = self._exact_search(bundle, filters, size=top_k, query=self._lexical_query(bundle, query))
+                
+                # 混合排序
+                results = self._hybrid_rerank(semantic_results, exact_results, top_k)
+            
+            self.result_cache.set(cache_key, results)
+            return results
+    
+    async def hybrid_search_async(
+        self, 
+        query: str, 
+        filters: Dict[str, Any] = None, 
+        top_k: int = 10, 
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        异步执行混合检索，语义检索与精确匹配并发进行
+        
+        编码、FAISS检索、缓存读写等阻塞操作在线程池中执行，ES请求使用异步客户端，
+        整个过程不阻塞事件循环。
         
-        # 执行精确匹配
-        exact_results = self.exact_search(filters, size=top_k)
+        Args:
+            query: 查询文本
+            filters: 过滤条件
+            top_k: 返回结果数量
+            nprobe: 请求级IVF探测列表数
+            
+        Returns:
+            List[Dict[str, Any]]: 混合排序后的检索结果
+        """
+        loop = asyncio.get_running_loop()
         
-        # 混合排序
-        return self._hybrid_rerank(semantic_results, exact_results, top_k)
+        # 默认过滤条件
+        if filters is None:
+            filters = {}
+        
+        # 一次查询的语义检索与精确匹配使用同一版本的索引包
+        with self._use_bundle() as bundle:
+            # 查询结果缓存（可能访问Redis与ES索引版本，放入线程池）
+            def lookup_cache():
+                cache_key = self.result_cache.make_key(query, filters, top_k, self._cache_version(nprobe, bundle))
+                return cache_key, self.result_cache.get(cache_key)
+            
+            cache_key, cached = await loop.run_in_executor(self._executor, lookup_cache)
+            if cached is not None:
+                return cached
+            
+            if self.search_backend == "es_knn":
+                # 向量近邻、过滤与关键词匹配在ES中一次完成
+                results = await self._knn_search_async(bundle, query, filters, top_k)
+                await loop.run_in_executor(self._executor, self.result_cache.set, cache_key, results)
+                return results
+            
+            if self.supports_filters(filters, bundle):
+                # 过滤条件由属性位图处理，无需请求ES
+                semantic_results, exact_results = await loop.run_in_executor(
+                    self._executor, lambda: (
+                        self._semantic_search_batch(bundle, [query], top_k, [filters], nprobe)[0],
+                        self._bitmap_exact_search(bundle, filters, top_k, query)
+                    )
+                )
+            else:
+                # 语义检索与精确匹配并发执行
+                semantic_results, exact_results = await asyncio.gather(
+                    loop.run_in_executor(
+                        self._executor, lambda: self._semantic_search_batch(bundle, [query], top_k*2, None, nprobe)[0]
+                    ),
+                    self._exact_search_async(bundle, filters, size=top_k, query=self._lexical_query(bundle, query))
+                )
+            
+            # 混合排序
+            results = self._hybrid_rerank(semantic_results, exact_results, top_k)
+            await loop.run_in_executor(self._executor, self.result_cache.set, cache_key, results)
+            return results
+    
+    def hybrid_search_batch(
+        self, 
+        queries: List[str], 
+        filters_list: List[Dict[str, Any]] = None, 
+        top_k: int = 10, 
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        批量执行混合检索，语义检索部分合并为一次编码和一次矩阵检索
+        
+        Args:
+            queries: 查询文本列表
+            filters_list: 与queries一一对应的过滤条件列表
+            top_k: 每个查询返回的结果数量
+            nprobe: 请求级IVF探测列表数
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 与queries一一对应的混合排序结果
+        """
+        # 默认过滤条件
+        if filters_list is None:
+            filters_list = [{} for _ in queries]
+        filters_list = [filters or {} for filters in filters_list]
+        
+        # 整批查询使用同一版本的索引包
+        with self._use_bundle() as bundle:
+            # 先读取结果缓存，只检索未命中的查询
+            cache_version = self._cache_version(nprobe, bundle)
+            cache_keys = [
+                self.result_cache.make_key(query, filters, top_k, cache_version)
+                for query, filters in zip(queries, filters_list)
+            ]
+            results = [self.result_cache.get(cache_key) for cache_key in cache_keys]
+            missing = [i for i, cached in enumerate(results) if cached is None]
+            if not missing:
+                return results
+            
+            if self.search_backend == "es_knn":
+                # 全部未命中的查询合并为一次msearch请求
+                knn_batch = self._knn_search_batch(
+                    bundle, [queries[i] for i in missing], [filters_list[i] for i in missing], top_k
+                )
+                for i, knn_results in zip(missing, knn_batch):
+                    results[i] = knn_results
+                    self.result_cache.set(cache_keys[i], results[i])
+                return results
+            
+            # 批量语义检索，可由属性位图处理的过滤条件直接限制检索范围
+            filtered = [self.supports_filters(filters_list[i], bundle) for i in missing]
+            semantic_batch = self._semantic_search_batch(
+                bundle, 
+                [queries[i] for i in missing], 
+                top_k=top_k*2, 
+                filters_list=[filters_list[i] if use_bitmap else None for i, use_bitmap in zip(missing, filtered)],
+                nprobe=nprobe
+            )
+            
+            # 逐个查询执行精确匹配（位图已处理过滤的查询跳过ES）并混合排序
+            for i, use_bitmap, semantic_results in zip(missing, filtered, semantic_batch):
+                if use_bitmap:
+                    exact_results = self._bitmap_exact_search(bundle, filters_list[i], top_k, queries[i])
+                else:
+                    exact_results = self._exact_search(
+                        bundle, filters_list[i], size=top_k, query=self._lexical_query(bundle, queries[i])
+                    )
+                results[i] = self._hybrid_rerank(semantic_results, exact_results, top_k)
+                self.result_cache.set(cache_keys[i], results[i])
+            
+            return results
     
     def _hybrid_rerank(
         self, 
@@ -144,7 +1284,7 @@ class HybridSearchEngine:
         top_k: int
     ) -> List[Dict[str, Any]]:
         """
-        混合排序算法
+        混合排序算法，按配置的融合策略在id/得分数组上合并两路结果
         
         Args:
             semantic_results: 语义检索结果
@@ -154,33 +1294,24 @@ class HybridSearchEngine:
         Returns:
             List[Dict[str, Any]]: 混合排序后的结果
         """
-        # 计算综合得分
-        score_map = {}
-        id_to_item = {}
-        
-        # 语义结果加权
-        for i, res in enumerate(semantic_results):
-            item_id = res["id"]
-            # 语义得分权重为0.7
-            score = 0.7 * (1 - i/len(semantic_results))
-            score_map[item_id] = score_map.get(item_id, 0) + score
-            id_to_item[item_id] = res
-        
-        # 精确匹配加权
-        for res in exact_results:
-            item_id = res["id"]
-            # 精确匹配权重为0.3
-            score_map[item_id] = score_map.get(item_id, 0) + 0.3
-            id_to_item[item_id] = res
-        
-        # 按总分排序
-        sorted_ids = sorted(score_map.items(), key=lambda x: x[1], reverse=True)
-        
-        # 返回排序结果
+        positions, scores = fuse(
+            [res["id"] for res in semantic_results],
+            [res.get("score", 0.0) for res in semantic_results],
+            [res["id"] for res in exact_results],
+            [res.get("score", 0.0) for res in exact_results],
+            top_k,
+            strategy=active_config.FUSION_STRATEGY,
+            semantic_weight=active_config.FUSION_SEMANTIC_WEIGHT,
+            exact_weight=active_config.FUSION_EXACT_WEIGHT,
+            rrf_k=active_config.FUSION_RRF_K
+        )
+        
+        # 同时命中两路时使用精确匹配的结果
+        candidates = semantic_results + exact_results
         results = []
-        for item_id, score in sorted_ids[:top_k]:
-            item = id_to_item[item_id]
-            item["hybrid_score"] = score
+        for position, score in zip(positions, scores):
+            item = candidates[position]
+            item["hybrid_score"] = float(score)
             results.append(item)
         
         return results
@@ -0,0 +1,227 @@
+"""
+索引包模块，检索引擎在运行中切换版本的单位
+
+一个IndexBundle持有同一版本语料的FAISS索引、元数据存储、嵌入矩阵、BM25索引与增量段，
+FAISS行号在这些数据之间一致。检索引擎每个查询开始时acquire当前索引包、结束时release；
+切换到新版本后，旧索引包等进行中的查询全部结束（排空）后再释放映射的文件。
+"""
+import os
+import json
+import threading
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+from .bundle_layout import bundle_paths
+from .metadata_store import MetadataStore
+from .bm25 import BM25Index
+from .delta_index import DeltaSegment
+from .index_io import load_faiss_index
+
+
+def file_signature(path: str) -> str:
+    """
+    计算文件的版本签名（修改时间+大小）
+    
+    Args:
+        path: 文件路径
+    
+    Returns:
+        str: 版本签名
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class IndexBundle:
+    """
+    一个版本的检索数据
+    """
+    
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        version: Optional[str] = None,
+        use_mmap: bool = True,
+        load_lexical: bool = False,
+        es_index: Optional[str] = None,
+        delta_log_path: str = "data/delta.jsonl",
+        delta_refresh_interval: float = 1.0
+    ):
+        """
+        加载索引包
+        
+        Args:
+            paths: 各文件路径（index、manifest、metadata_store、embeddings、bm25）
+            version: 版本号，默认使用FAISS索引文件的版本签名（单文件部署）
+            use_mmap: 是否以mmap方式加载FAISS索引
+            load_lexical: 是否加载进程内BM25倒排索引
+            es_index: 清单中未记录ES索引名时使用的索引名（或别名）
+            delta_log_path: 增量日志路径
+            delta_refresh_interval: 读取增量日志新条目的最小间隔（秒）
+        """
+        self.paths = paths
+        
+        # 加载FAISS索引（优先mmap，多个worker共享页缓存）
+        self.index, self.index_load_mode = load_faiss_index(paths["index"], use_mmap=use_mmap)
+        self.version = version or file_signature(paths["index"])
+        self.manifest = self._load_manifest()
+        self._apply_default_nprobe()
+        
+        # 与本版本语料对应的ES索引（构建时写入清单），单文件部署时使用配置的索引名
+        self.es_index = self.manifest.get("es_index") or es_index
+        
+        # 加载元数据存储（mmap，多个worker共享页缓存）
+        self.metadata = self._load_metadata_store()
+        
+        # 进程内BM25倒排索引，行号与元数据存储一致
+        self.lexical_index = None
+        self.lexical_version = "none"
+        if load_lexical:
+            self.lexical_index = self._load_lexical_index()
+        
+        # 归一化的嵌入矩阵（mmap），用于小候选集的精确过滤检索
+        self.embeddings = None
+        if os.path.exists(paths["embeddings"]):
+            self.embeddings = np.load(paths["embeddings"], mmap_mode="r")
+        
+        # 增量段：新生成的题目在合并进基础索引前由此检索，行号接在基础索引之后
+        self.delta = DeltaSegment(
+            self.index.d,
+            base_count=len(self.metadata) if self.metadata is not None else self.index.ntotal,
+            log_path=delta_log_path,
+            refresh_interval=delta_refresh_interval
+        )
+        
+        # 进行中的查询计数
+        self._refs = 0
+        self._retired = False
+        self._drained = threading.Condition()
+    
+    @classmethod
+    def from_directory(cls, bundle_dir: str, **kwargs) -> "IndexBundle":
+        """
+        从版本化的索引包目录加载
+        
+        Args:
+            bundle_dir: 索引包目录
+            **kwargs: 传给构造函数的其他参数
+        
+        Returns:
+            IndexBundle: 索引包
+        """
+        # 版本号即目录名，与CURRENT中记录的一致
+        return cls(bundle_paths(bundle_dir), version=os.path.basename(os.path.normpath(bundle_dir)), **kwargs)
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """
+        加载构建索引时生成的清单（索引类型、调优后的nprobe、语料哈希、评估报告等）
+        
+        Returns:
+            Dict[str, Any]: 索引清单，不存在时返回空字典
+        """
+        try:
+            with open(self.paths["manifest"]) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+    
+    def _apply_default_nprobe(self):
+        """将清单中调优得到的nprobe应用到IVF索引"""
+        ivf = self.ivf_index()
+        if ivf is not None and self.manifest.get("nprobe"):
+            ivf.nprobe = int(self.manifest["nprobe"])
+    
+    def _load_metadata_store(self) -> Optional[MetadataStore]:
+        """
+        加载列式元数据存储，将FAISS行号映射到题目元数据
+        
+        Returns:
+            Optional[MetadataStore]: 元数据存储，不存在时返回None
+        """
+        try:
+            return MetadataStore(self.paths["metadata_store"])
+        except FileNotFoundError:
+            print(f"元数据存储不存在: {self.paths['metadata_store']}，语义检索结果将为空")
+            return None
+    
+    def _load_lexical_index(self) -> Optional[BM25Index]:
+        """
+        加载进程内BM25倒排索引
+        
+        Returns:
+            Optional[BM25Index]: 倒排索引，不存在或与元数据存储行数不一致时返回None
+        """
+        try:
+            lexical_index = BM25Index(self.paths["bm25"])
+        except FileNotFoundError:
+            print(f"BM25索引不存在: {self.paths['bm25']}，精确匹配结果将为空")
+            return None
+        
+        if self.metadata is None or len(lexical_index) != len(self.metadata):
+            print("BM25索引与元数据存储的行数不一致，请重新构建BM25索引")
+            return None
+        
+        self.lexical_version = file_signature(os.path.join(self.paths["bm25"], "bm25.json"))
+        return lexical_index
+    
+    def ivf_index(self):
+        """
+        获取IVF索引层
+        
+        Returns:
+            Optional[faiss.IndexIVF]: 非IVF索引返回None
+        """
+        try:
+            return faiss.extract_index_ivf(self.index)
+        except RuntimeError:
+            return None
+    
+    def prefetch(self):
+        """提示内核预读mmap的索引与嵌入文件，切换前让页面进入页缓存"""
+        if not hasattr(os, "posix_fadvise"):
+            return
+        for key in ("index", "embeddings"):
+            path = self.paths[key]
+            if os.path.exists(path):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+    
+    def acquire(self):
+        """查询开始时调用，计入进行中的查询"""
+        with self._drained:
+            self._refs += 1
+    
+    def release(self):
+        """查询结束时调用，已退役的索引包排空后唤醒等待者"""
+        with self._drained:
+            self._refs -= 1
+            if self._refs == 0 and self._retired:
+                self._drained.notify_all()
+    
+    def retire(self, timeout: Optional[float] = None) -> bool:
+        """
+        标记为退役（不再接受新查询），等待进行中的查询结束
+        
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+        
+        Returns:
+            bool: 是否已排空
+        """
+        with self._drained:
+            self._retired = True
+            return self._drained.wait_for(lambda: self._refs == 0, timeout=timeout)
+    
+    def close(self):
+        """释放索引与映射的文件，只能在排空后调用"""
+        if self.metadata is not None:
+            self.metadata.close()
+        self.index = None
+        self.metadata = None
+        self.lexical_index = None
+        self.embeddings = None
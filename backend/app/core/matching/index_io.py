@@ -0,0 +1,38 @@
+"""
+FAISS索引读写模块
+"""
+import os
+from typing import Tuple
+
+import faiss
+
+
+def load_faiss_index(path: str, use_mmap: bool = True) -> Tuple[faiss.Index, str]:
+    """
+    加载FAISS索引
+    
+    mmap模式下IVF倒排表（以及新版FAISS中Flat类索引的编码）直接映射自文件，
+    同一台机器上的多个worker共享一份页缓存；索引类型不支持mmap时回退到常规读取。
+    实际共享效果以benchmarks/faiss_load_benchmark.py测得的PSS为准。
+    
+    Args:
+        path: 索引文件路径
+        use_mmap: 是否尝试mmap加载
+    
+    Returns:
+        Tuple[faiss.Index, str]: 索引及实际使用的加载方式（"mmap"或"read"）
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"FAISS索引不存在: {path}")
+    
+    if use_mmap:
+        try:
+            io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            # 新版FAISS支持映射IndexFlatCodes的编码
+            io_flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+            index = faiss.read_index(path, io_flags)
+            return index, "mmap"
+        except RuntimeError as e:
+            print(f"索引类型不支持mmap加载，回退到常规读取: {str(e)}")
+    
+    return faiss.read_index(path), "read"
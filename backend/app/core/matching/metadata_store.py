@@ -0,0 +1,393 @@
+"""
+列式元数据存储模块，按FAISS行号以O(1)读取题目元数据
+
+存储目录结构：
+    store.json                  清单（记录数、字段、编码表、数据类型）
+    {field}.offsets.npy         字符串字段的偏移量(int64, n+1)
+    {field}.blob                字符串字段的UTF-8拼接内容
+    {field}.codes.npy           分类字段的编码(int8，-1表示空)
+    tags.offsets.npy            多值标签的偏移量(int64, n+1)
+    tags.codes.npy              多值标签的编码(int8)
+    bitmaps.npy                 属性位图(uint8, 每个分类值一行，小端位序按行号打包)
+
+所有数组以只读mmap方式打开，多个worker进程共享同一份页缓存。
+本模块只依赖numpy，数据处理脚本可直接复用。
+"""
+import os
+import json
+import mmap
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 存储格式版本
+STORE_FORMAT_VERSION = 2
+
+# 字符串字段
+STRING_FIELDS = ("id", "title", "description")
+
+# 单值分类字段
+CATEGORY_FIELDS = ("difficulty", "data_structure", "algorithm")
+
+# 多值分类字段
+MULTI_FIELD = "tags"
+
+
+def _code_dtype(vocab_size: int) -> str:
+    """
+    根据编码表大小选择编码类型
+    
+    Args:
+        vocab_size: 编码表大小
+    
+    Returns:
+        str: numpy数据类型名
+    """
+    return "int8" if vocab_size <= np.iinfo(np.int8).max else "int16"
+
+
+def write_metadata_store(records: List[Dict[str, Any]], output_dir: str) -> Dict[str, Any]:
+    """
+    将题目元数据写入列式存储，records的顺序即FAISS行号
+    
+    Args:
+        records: 题目元数据列表
+        output_dir: 存储目录
+    
+    Returns:
+        Dict[str, Any]: 存储清单
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = len(records)
+    
+    # 字符串字段：偏移量 + 拼接内容
+    for field in STRING_FIELDS:
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        with open(os.path.join(output_dir, f"{field}.blob"), "wb") as f:
+            position = 0
+            for i, record in enumerate(records):
+                data = str(record.get(field) or "").encode("utf-8")
+                f.write(data)
+                position += len(data)
+                offsets[i + 1] = position
+        np.save(os.path.join(output_dir, f"{field}.offsets.npy"), offsets)
+    
+    # 单值分类字段：编码表 + 编码
+    vocabularies = {}
+    for field in CATEGORY_FIELDS:
+        vocab = sorted({str(record[field]) for record in records if record.get(field)})
+        lookup = {value: code for code, value in enumerate(vocab)}
+        codes = np.array(
+            [lookup[str(record[field])] if record.get(field) else -1 for record in records],
+            dtype=_code_dtype(len(vocab))
+        )
+        np.save(os.path.join(output_dir, f"{field}.codes.npy"), codes)
+        vocabularies[field] = vocab
+    
+    # 多值标签：偏移量 + 编码
+    tag_vocab = sorted({str(tag) for record in records for tag in record.get(MULTI_FIELD) or []})
+    tag_lookup = {value: code for code, value in enumerate(tag_vocab)}
+    tag_offsets = np.zeros(count + 1, dtype=np.int64)
+    tag_codes = []
+    for i, record in enumerate(records):
+        tag_codes.extend(tag_lookup[str(tag)] for tag in record.get(MULTI_FIELD) or [])
+        tag_offsets[i + 1] = len(tag_codes)
+    np.save(os.path.join(output_dir, f"{MULTI_FIELD}.offsets.npy"), tag_offsets)
+    np.save(
+        os.path.join(output_dir, f"{MULTI_FIELD}.codes.npy"),
+        np.array(tag_codes, dtype=_code_dtype(len(tag_vocab)))
+    )
+    vocabularies[MULTI_FIELD] = tag_vocab
+    
+    # 属性位图：每个(字段, 分类值)一行，位i表示第i行是否具有该属性
+    bitmap_rows = []
+    bitmap_offsets = {}
+    for field in CATEGORY_FIELDS:
+        codes = np.load(os.path.join(output_dir, f"{field}.codes.npy"))
+        bitmap_offsets[field] = len(bitmap_rows)
+        for code in range(len(vocabularies[field])):
+            bitmap_rows.append(np.packbits(codes == code, bitorder="little"))
+    bitmap_offsets[MULTI_FIELD] = len(bitmap_rows)
+    tag_rows = np.repeat(np.arange(count), np.diff(tag_offsets))
+    tag_codes = np.asarray(tag_codes, dtype=np.int64)
+    for code in range(len(tag_vocab)):
+        mask = np.zeros(count, dtype=bool)
+        mask[tag_rows[tag_codes == code]] = True
+        bitmap_rows.append(np.packbits(mask, bitorder="little"))
+    bitmaps = np.vstack(bitmap_rows) if bitmap_rows else np.zeros((0, (count + 7) // 8), dtype=np.uint8)
+    np.save(os.path.join(output_dir, "bitmaps.npy"), bitmaps)
+    
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "count": count,
+        "string_fields": list(STRING_FIELDS),
+        "category_fields": list(CATEGORY_FIELDS),
+        "multi_field": MULTI_FIELD,
+        "vocabularies": vocabularies,
+        "bitmap_offsets": bitmap_offsets
+    }
+    with open(os.path.join(output_dir, "store.json"), "w") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    
+    return manifest
+
+
+class MetadataStore:
+    """
+    只读的列式元数据存储，按FAISS行号读取题目元数据
+    """
+    
+    def __init__(self, path: str):
+        """
+        以mmap方式打开元数据存储
+        
+        Args:
+            path: 存储目录
+        """
+        self.path = path
+        with open(os.path.join(path, "store.json")) as f:
+            self.manifest = json.load(f)
+        
+        if self.manifest.get("format_version") != STORE_FORMAT_VERSION:
+            raise ValueError(f"不支持的元数据存储格式: {self.manifest.get('format_version')}")
+        
+        self.count = self.manifest["count"]
+        self.vocabularies = self.manifest["vocabularies"]
+        self._code_lookup = {
+            field: {value: code for code, value in enumerate(vocab)}
+            for field, vocab in self.vocabularies.items()
+        }
+        
+        # 字符串字段
+        self._files = []
+        self._offsets = {}
+        self._blobs = {}
+        for field in self.manifest["string_fields"]:
+            self._offsets[field] = np.load(os.path.join(path, f"{field}.offsets.npy"), mmap_mode="r")
+            self._blobs[field] = self._map_blob(os.path.join(path, f"{field}.blob"))
+        
+        # 分类字段
+        self._codes = {
+            field: np.load(os.path.join(path, f"{field}.codes.npy"), mmap_mode="r")
+            for field in self.manifest["category_fields"]
+        }
+        
+        # 多值标签
+        multi_field = self.manifest["multi_field"]
+        self._tag_offsets = np.load(os.path.join(path, f"{multi_field}.offsets.npy"), mmap_mode="r")
+        self._tag_codes = np.load(os.path.join(path, f"{multi_field}.codes.npy"), mmap_mode="r")
+        
+        # 属性位图
+        self._bitmaps = np.load(os.path.join(path, "bitmaps.npy"), mmap_mode="r")
+        self._bitmap_offsets = self.manifest["bitmap_offsets"]
+    
+    def _map_blob(self, file_path: str):
+        """
+        只读映射字符串内容文件
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            mmap.mmap或bytes: 映射后的内容（空文件无法mmap，返回空bytes）
+        """
+        if os.path.getsize(file_path) == 0:
+            return b""
+        f = open(file_path, "rb")
+        self._files.append(f)
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def get_string(self, field: str, row: int) -> str:
+        """
+        读取字符串字段
+        
+        Args:
+            field: 字段名
+            row: FAISS行号
+        
+        Returns:
+            str: 字段值
+        """
+        offsets = self._offsets[field]
+        return self._blobs[field][int(offsets[row]):int(offsets[row + 1])].decode("utf-8")
+    
+    def get_id(self, row: int) -> str:
+        """
+        读取题目ID
+        
+        Args:
+            row: FAISS行号
+        
+        Returns:
+            str: 题目ID
+        """
+        return self.get_string("id", row)
+    
+    def get_category(self, field: str, row: int) -> Optional[str]:
+        """
+        读取单值分类字段
+        
+        Args:
+            field: 字段名
+            row: FAISS行号
+        
+        Returns:
+            Optional[str]: 字段值，为空时返回None
+        """
+        code = int(self._codes[field][row])
+        return self.vocabularies[field][code] if code >= 0 else None
+    
+    def get_tags(self, row: int) -> List[str]:
+        """
+        读取标签列表
+        
+        Args:
+            row: FAISS行号
+        
+        Returns:
+            List[str]: 标签列表
+        """
+        vocab = self.vocabularies[self.manifest["multi_field"]]
+        start, end = int(self._tag_offsets[row]), int(self._tag_offsets[row + 1])
+        return [vocab[int(code)] for code in self._tag_codes[start:end]]
+    
+    def codes(self, field: str) -> np.ndarray:
+        """
+        获取分类字段的编码数组（只读mmap）
+        
+        Args:
+            field: 字段名
+        
+        Returns:
+            np.ndarray: 编码数组
+        """
+        return self._codes[field]
+    
+    def code_of(self, field: str, value: str) -> int:
+        """
+        查找分类值对应的编码
+        
+        Args:
+            field: 字段名
+            value: 分类值
+        
+        Returns:
+            int: 编码，不存在时返回-1
+        """
+        return self._code_lookup.get(field, {}).get(value, -1)
+    
+    def value_counts(self, fields: List[str]) -> Dict[Tuple[Optional[str], ...], int]:
+        """
+        按分类字段的取值组合统计行数（交叉计数，直接在编码数组上计算）
+        
+        Args:
+            fields: 分类字段名列表
+        
+        Returns:
+            Dict[Tuple[Optional[str], ...], int]: 取值组合（为空的字段为None）到行数的映射
+        """
+        if self.count == 0:
+            return {}
+        columns = np.stack([np.asarray(self._codes[field], dtype=np.int64) for field in fields], axis=1)
+        combos, counts = np.unique(columns, axis=0, return_counts=True)
+        return {
+            tuple(
+                self.vocabularies[field][int(code)] if code >= 0 else None
+                for field, code in zip(fields, combo)
+            ): int(count)
+            for combo, count in zip(combos, counts)
+        }
+    
+    def has_field(self, field: str) -> bool:
+        """
+        判断字段是否有属性位图
+        
+        Args:
+            field: 字段名
+            
+        Returns:
+            bool: 是否支持按该字段过滤
+        """
+        return field in self._bitmap_offsets
+    
+    def filter_bitmap(self, conditions: Dict[str, str]) -> np.ndarray:
+        """
+        计算满足全部过滤条件的行位图
+        
+        Args:
+            conditions: 字段名到取值的映射，各条件之间为与关系
+            
+        Returns:
+            np.ndarray: 小端位序打包的uint8位图，可直接用于faiss.IDSelectorBitmap
+        """
+        result = None
+        for field, value in conditions.items():
+            code = self.code_of(field, value)
+            if code < 0:
+                # 取值不在编码表中，没有任何行满足
+                return np.zeros(self._bitmaps.shape[1], dtype=np.uint8)
+            bitmap = self._bitmaps[self._bitmap_offsets[field] + code]
+            result = np.array(bitmap) if result is None else np.bitwise_and(result, bitmap, out=result)
+        
+        if result is None:
+            # 没有过滤条件时所有行均满足
+            result = np.packbits(np.ones(self.count, dtype=bool), bitorder="little")
+        return result
+    
+    def bitmap_rows(self, bitmap: np.ndarray) -> np.ndarray:
+        """
+        将位图展开为行号数组
+        
+        Args:
+            bitmap: 小端位序打包的位图
+            
+        Returns:
+            np.ndarray: 满足条件的行号（升序）
+        """
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.count, bitorder="little"))
+    
+    def record(self, row: int, score: Optional[float] = None) -> Dict[str, Any]:
+        """
+        构建单条检索结果，每次返回新的字典
+        
+        Args:
+            row: FAISS行号
+            score: 检索得分
+        
+        Returns:
+            Dict[str, Any]: 题目元数据
+        """
+        item = {field: self.get_string(field, row) for field in self.manifest["string_fields"]}
+        for field in self.manifest["category_fields"]:
+            item[field] = self.get_category(field, row)
+        item[self.manifest["multi_field"]] = self.get_tags(row)
+        if score is not None:
+            item["score"] = score
+        return item
+    
+    def records(self, rows: Iterable[int], scores: Optional[Iterable[float]] = None) -> List[Dict[str, Any]]:
+        """
+        批量构建检索结果
+        
+        Args:
+            rows: FAISS行号
+            scores: 与rows对应的检索得分
+        
+        Returns:
+            List[Dict[str, Any]]: 题目元数据列表
+        """
+        if scores is None:
+            return [self.record(int(row)) for row in rows]
+        return [self.record(int(row), float(score)) for row, score in zip(rows, scores)]
+    
+    def close(self):
+        """关闭映射文件"""
+        for blob in self._blobs.values():
+            if isinstance(blob, mmap.mmap):
+                blob.close()
+        for f in self._files:
+            f.close()
+        self._files = []
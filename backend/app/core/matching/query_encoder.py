@@ -0,0 +1,169 @@
+"""
+查询编码服务模块，将并发到达的查询合并为批次统一编码
+"""
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Dict, Any
+
+import faiss
+import numpy as np
+
+
+class BatchingQueryEncoder:
+    """
+    微批处理查询编码器
+    
+    并发请求的查询先进入队列，后台线程在时间窗口内（或达到批次上限时）
+    收集查询并执行一次前向计算，再把各自的向量交还给调用方。
+    """
+    
+    # 保留最近多少个批次的指标用于计算分位数
+    METRICS_WINDOW = 2048
+    
+    def __init__(self, model, batch_window_ms: float = 5.0, max_batch_size: int = 32):
+        """
+        初始化查询编码器
+        
+        Args:
+            model: SentenceTransformer模型
+            batch_window_ms: 收集批次的时间窗口（毫秒）
+            max_batch_size: 单个批次的最大查询数
+        """
+        self.model = model
+        self.batch_window = max(batch_window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(int(max_batch_size), 1)
+        
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=self.METRICS_WINDOW)
+        self._queue_waits = deque(maxlen=self.METRICS_WINDOW)
+        self._total_batches = 0
+        self._total_queries = 0
+        
+        # 后台编码线程
+        self._worker = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+        self._worker.start()
+    
+    def encode(self, query: str) -> np.ndarray:
+        """
+        编码单个查询，阻塞直到所在批次完成
+        
+        Args:
+            query: 查询文本
+        
+        Returns:
+            np.ndarray: 归一化后的float32向量
+        """
+        return self.submit(query).result()
+    
+    def encode_many(self, queries: List[str]) -> np.ndarray:
+        """
+        编码多个查询，与其他并发请求一起参与批处理
+        
+        Args:
+            queries: 查询文本列表
+        
+        Returns:
+            np.ndarray: 形状为(len(queries), dim)的归一化float32矩阵
+        """
+        futures = [self.submit(query) for query in queries]
+        return np.vstack([future.result() for future in futures])
+    
+    def submit(self, query: str) -> Future:
+        """
+        提交查询到编码队列
+        
+        Args:
+            query: 查询文本
+        
+        Returns:
+            Future: 完成后结果为该查询的向量
+        """
+        future = Future()
+        self._queue.put((query, future, time.perf_counter()))
+        return future
+    
+    def _run(self):
+        """后台线程：收集批次并编码"""
+        while True:
+            # 阻塞等待批次中的第一个查询
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.batch_window
+            
+            # 在窗口内继续收集，直到达到批次上限
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._encode_batch(batch)
+    
+    def _encode_batch(self, batch: List[tuple]):
+        """
+        编码一个批次并分发结果
+        
+        Args:
+            batch: (查询文本, Future, 入队时间)列表
+        """
+        started = time.perf_counter()
+        texts = [text for text, _, _ in batch]
+        
+        try:
+            vectors = self.model.encode(texts, convert_to_numpy=True)
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+            faiss.normalize_L2(vectors)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        
+        for i, (_, future, _) in enumerate(batch):
+            future.set_result(vectors[i])
+        
+        # 记录批次指标
+        with self._metrics_lock:
+            self._total_batches += 1
+            self._total_queries += len(batch)
+            self._batch_sizes.append(len(batch))
+            for _, _, enqueued in batch:
+                self._queue_waits.append((started - enqueued) * 1000.0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取批处理指标
+        
+        Returns:
+            Dict[str, Any]: 批次大小与排队等待时间（毫秒）统计
+        """
+        with self._metrics_lock:
+            batch_sizes = np.array(self._batch_sizes, dtype=np.float64)
+            queue_waits = np.array(self._queue_waits, dtype=np.float64)
+            total_batches = self._total_batches
+            total_queries = self._total_queries
+        
+        def summarize(values: np.ndarray) -> Dict[str, float]:
+            if values.size == 0:
+                return {"mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+            return {
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99)),
+                "max": float(values.max())
+            }
+        
+        return {
+            "batch_window_ms": self.batch_window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "total_batches": total_batches,
+            "total_queries": total_queries,
+            "queue_depth": self._queue.qsize(),
+            "batch_size": summarize(batch_sizes),
+            "queue_wait_ms": summarize(queue_waits)
+        }
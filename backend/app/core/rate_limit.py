@@ -0,0 +1,205 @@
+"""
+限流模块，令牌桶限制DeepSeek API的请求速率
+
+令牌按固定速率补充，桶容量决定允许的突发请求数；取不到令牌的调用方异步等待，
+不占用线程。服务端与批量生成脚本共用。多个进程（多个worker、同时运行的批量脚本）
+共用一个API配额时使用RedisTokenBucket，令牌状态保存在Redis中，由Lua脚本原子地补充与扣减。
+"""
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """
+    进程内令牌桶
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+        
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数），默认等于rate且不小于1
+        """
+        if rate <= 0:
+            raise ValueError(f"令牌补充速率必须大于0: {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        
+        self._acquired = 0
+        self._wait_seconds = 0.0
+    
+    def _try_acquire(self, tokens: float) -> float:
+        """
+        尝试取出令牌
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            float: 0表示已取出，否则为令牌补足前需要等待的时间（秒）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+    
+    async def _wait_time(self, tokens: float) -> float:
+        """
+        尝试取出令牌（子类可改为异步访问共享状态）
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            float: 0表示已取出，否则为令牌补足前需要等待的时间（秒）
+        """
+        return self._try_acquire(tokens)
+    
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        取出令牌，不足时异步等待
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            float: 等待的时间（秒）
+        """
+        started = time.monotonic()
+        while True:
+            wait = await self._wait_time(tokens)
+            if wait == 0.0:
+                break
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+        with self._lock:
+            self._acquired += 1
+            self._wait_seconds += waited
+        return waited
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计
+        
+        Returns:
+            Dict[str, Any]: 速率、容量、已发放次数与累计等待时间
+        """
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "acquired": self._acquired,
+                "wait_seconds": self._wait_seconds
+            }
+
+
+# 原子地补充并扣减令牌；时间取Redis服务器时间，各进程时钟不一致不影响速率
+# 返回值转为字符串，避免Redis将Lua数字截断为整数
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    跨进程共享的令牌桶，Redis不可用时退化为进程内令牌桶
+    
+    Redis调用在线程池中执行，不阻塞事件循环；调用失败后RETRY_INTERVAL秒内直接使用
+    进程内令牌桶，不再逐次等待Redis超时。
+    """
+    
+    # Redis调用失败后暂停访问Redis的时间（秒）
+    RETRY_INTERVAL = 5.0
+    
+    def __init__(self, redis_client, key: str, rate: float, capacity: Optional[float] = None):
+        """
+        初始化共享令牌桶
+        
+        Args:
+            redis_client: Redis客户端
+            key: 令牌桶在Redis中的键，共用配额的进程使用相同的键
+            rate: 每秒补充的令牌数（所有进程合计）
+            capacity: 桶容量（允许的突发请求数），默认等于rate且不小于1
+        """
+        super().__init__(rate, capacity)
+        self.redis = redis_client
+        self.key = key
+        self._script = redis_client.register_script(_ACQUIRE_SCRIPT)
+        self._fallbacks = 0
+        self._redis_retry_at = 0.0
+    
+    def _eval(self, tokens: float) -> float:
+        """
+        执行Lua脚本取出令牌（同步调用，在线程池中执行）
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            float: 0表示已取出，否则为令牌补足前需要等待的时间（秒）
+        """
+        return float(self._script(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+    
+    async def _wait_time(self, tokens: float) -> float:
+        """
+        在Redis中尝试取出令牌，Redis不可用时使用进程内令牌桶
+        
+        Args:
+            tokens: 需要的令牌数
+        
+        Returns:
+            float: 0表示已取出，否则为令牌补足前需要等待的时间（秒）
+        """
+        if time.monotonic() >= self._redis_retry_at:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, self._eval, tokens)
+            except Exception as e:
+                with self._lock:
+                    # 并发失败的调用只有第一个输出日志
+                    report = time.monotonic() >= self._redis_retry_at
+                    self._redis_retry_at = time.monotonic() + self.RETRY_INTERVAL
+                if report:
+                    print(f"Redis限流失败，{self.RETRY_INTERVAL:.0f}秒内使用进程内令牌桶: {str(e)}")
+        with self._lock:
+            self._fallbacks += 1
+        return self._try_acquire(tokens)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计
+        
+        Returns:
+            Dict[str, Any]: 速率、容量、已发放次数、累计等待时间与退化到进程内令牌桶的次数
+        """
+        stats = super().stats()
+        stats["key"] = self.key
+        stats["fallbacks"] = self._fallbacks
+        return stats
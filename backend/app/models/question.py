@@ -4,10 +4,9 @@
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
-Base = declarative_base()
+from ..database import Base
 
 
 class Question(Base):
@@ -0,0 +1,38 @@
+"""
+健康检查API路由
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from ..components import components
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz")
+async def healthz():
+    """
+    存活检查，进程能响应即返回200；组件连续预热失败次数超过WARM_UP_MAX_FAILURES时返回503，
+    由编排系统重启进程
+    
+    Returns:
+        JSONResponse: 存活状态
+    """
+    if not components.live:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warm_up_failed", "failures": components.warm_up_failures, "error": components.error}
+        )
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """
+    就绪检查，向量模型与索引加载完成且预热编码执行后才返回200
+    
+    Returns:
+        JSONResponse: 就绪状态，未就绪时状态码为503
+    """
+    status = components.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
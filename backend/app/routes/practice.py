@@ -1,22 +1,247 @@
 """
 练习相关API路由
 """
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..core.matching.hybrid_search import HybridSearchEngine
-from ..core.NLP.deepseek_nlp import QueryParser
-from ..core.generation.deepseek_generation import QuestionGenerator
 from ..models.question import Question, Solution
-from ..database import get_db
+from ..database import get_db, SessionLocal
+from ..config import active_config
+from ..components import components
+from ..core.generation.jobs import GenerationJob, GenerationJobManager
+from ..core.generation.persistence import save_generated, save_solution
 
 router = APIRouter(prefix="/api/v1/practice", tags=["practice"])
 
-# 初始化组件
-search_engine = HybridSearchEngine()
-query_parser = QueryParser()
-question_generator = QuestionGenerator()
+
+def _get_search_engine():
+    """
+    获取检索引擎，首次调用时加载（通常已由后台预热完成），需在线程池中调用
+    
+    Returns:
+        HybridSearchEngine: 混合检索引擎
+    """
+    try:
+        return components.search_engine
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"检索引擎不可用: {str(e)}")
+
+
+def _build_filters(parsed_intent: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    根据解析意图构建检索过滤条件
+    
+    Args:
+        parsed_intent: 解析后的意图
+        
+    Returns:
+        Dict[str, Any]: 过滤条件
+    """
+    return {
+        "difficulty": parsed_intent.get("difficulty"),
+        "data_structure": parsed_intent.get("data_structure"),
+        "technique": parsed_intent.get("technique")
+    }
+
+
+def _generated_result(question: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+    """
+    将生成的题目转换为检索结果格式
+    
+    Args:
+        question: 生成的题目，或去重检查返回的已有题目（带duplicate_source）
+        cached: 是否来自生成结果缓存
+        
+    Returns:
+        Dict[str, Any]: 检索结果
+    """
+    result = {
+        "id": question.get("id", "gen_001"),
+        "title": question.get("title", ""),
+        "difficulty": question.get("difficulty", "Medium"),
+        "description": question.get("description", ""),
+        "tags": question.get("tags", []),
+        "is_generated": True,
+        "cached": cached,
+        "score": 1.0
+    }
+    if question.get("duplicate_source"):
+        # 生成结果与已有题目重复，返回的是已有题目
+        result["is_generated"] = str(result["id"]).startswith("gen_")
+        result["duplicate"] = True
+        result["score"] = question.get("similarity", 1.0)
+    return result
+
+
+def _persist_generated(question: Dict[str, Any], solution: Dict[str, Any]) -> str:
+    """
+    保存生成的题目与解决方案，需在线程池中调用
+    
+    Args:
+        question: 生成的题目（已分配ID）
+        solution: 生成的解决方案
+        
+    Returns:
+        str: 题目ID
+    """
+    db = SessionLocal()
+    try:
+        return save_generated(db, question, solution)
+    finally:
+        db.close()
+
+
+async def _generate_question(job: GenerationJob) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    生成题目，流式任务字段生成完即登记，非流式任务生成后一次登记全部字段
+    
+    Args:
+        job: 生成任务
+        
+    Returns:
+        Tuple[Dict[str, Any], Optional[Dict[str, Any]]]: 生成的题目，以及合并模式下一并生成的解决方案
+    """
+    if not job.streaming:
+        # 合并模式下一次调用完成题目和解决方案
+        generated_question, generated_solution = await components.question_generator.generate(
+            job.query, job.parsed_intent
+        )
+        if not generated_question or not generated_solution:
+            raise RuntimeError("题目生成失败")
+        for field, value in generated_question.items():
+            job.add_field(field, value)
+        return generated_question, generated_solution
+    
+    async for event in components.question_generator.stream_question(job.query, job.parsed_intent):
+        if event["event"] == "field":
+            job.add_field(event["field"], event["value"])
+        elif event["event"] == "question":
+            job.timings["generation"] = event["timings"]
+            return event["question"], None
+        else:
+            raise RuntimeError(event["detail"])
+    raise RuntimeError("题目生成失败")
+
+
+async def _run_generation_job(job: GenerationJob) -> Dict[str, Any]:
+    """
+    执行生成任务：生成题目和解决方案，保存到数据库后再写入增量索引与生成结果缓存
+    
+    /search与/search/stream都通过该任务生成，两条路径的去重、索引、缓存与保存步骤一致。
+    
+    Args:
+        job: 生成任务
+        
+    Returns:
+        Dict[str, Any]: 与/search相同格式的结果，以及是否已保存到数据库；
+        生成结果与已有题目重复时返回已有题目（duplicate_of），不写入索引与数据库；
+        保存失败时任务失败，题目不会出现在检索结果与生成结果缓存中
+    """
+    search_engine = await run_in_threadpool(_get_search_engine)
+    query_vector = (await run_in_threadpool(search_engine.encode_queries, [job.query]))[0]
+    
+    job.update(stage="generating")
+    generated_question, generated_solution = await _generate_question(job)
+    
+    # 与已有题目近重复时直接返回已有题目（不再生成解决方案），缓存后相似查询不再重复生成
+    job.update(stage="deduplicating")
+    duplicate, question_vector = await run_in_threadpool(components.duplicate_gate.check, generated_question)
+    if duplicate is not None:
+        components.generation_cache.set(query_vector, job.parsed_intent, duplicate, None)
+        return {
+            "results": [_generated_result(duplicate, False)],
+            "solution": None,
+            "persisted": False,
+            "duplicate_of": duplicate["id"],
+            "timings": job.timings
+        }
+    
+    # 流式任务在题目推送完成后再生成解决方案
+    if generated_solution is None:
+        job.update(stage="solving")
+        generated_solution = await components.question_generator.generate_solution(generated_question)
+        if generated_solution is None:
+            raise RuntimeError("解决方案生成失败")
+    
+    # 先分配题目ID并保存到数据库，保存失败时任务失败，不写入索引与缓存
+    job.update(stage="saving")
+    generated_question["id"] = search_engine.new_question_id()
+    try:
+        question_id = await run_in_threadpool(_persist_generated, generated_question, generated_solution)
+    except Exception as e:
+        raise RuntimeError(f"保存生成题目失败: {str(e)}")
+    
+    # 写入增量索引，后续相似查询几秒内即可检索到
+    job.update(stage="indexing")
+    await run_in_threadpool(
+        search_engine.add_question, generated_question, job.parsed_intent, question_vector, question_id
+    )
+    components.duplicate_gate.admit(generated_question, question_vector)
+    components.generation_cache.set(query_vector, job.parsed_intent, generated_question, generated_solution)
+    
+    return {
+        "results": [_generated_result(generated_question, False)],
+        "solution": generated_solution,
+        "persisted": True,
+        "timings": job.timings
+    }
+
+
+# 后台生成任务，worker协程随服务启动
+generation_jobs = GenerationJobManager(
+    _run_generation_job,
+    workers=active_config.GENERATION_JOB_WORKERS,
+    max_pending=active_config.GENERATION_JOB_MAX_PENDING,
+    ttl=active_config.GENERATION_JOB_TTL
+)
+
+
+async def _parse_and_search(
+    query: str,
+    difficulty: Optional[str],
+    limit: int,
+    nprobe: Optional[int]
+) -> Tuple[Dict[str, Any], Any, List[Dict[str, Any]]]:
+    """
+    解析查询意图并执行混合检索
+    
+    Args:
+        query: 搜索查询
+        difficulty: 难度级别，覆盖解析结果
+        limit: 返回结果数量
+        nprobe: IVF索引探测列表数
+        
+    Returns:
+        Tuple[Dict[str, Any], HybridSearchEngine, List[Dict[str, Any]]]: 解析意图、检索引擎与检索结果
+    """
+    # 解析查询意图（可能调用DeepSeek API，异步等待不占用线程）
+    parsed_intent = await components.query_parser.parse(query)
+    
+    # 如果指定了难度，覆盖解析结果
+    if difficulty:
+        parsed_intent["difficulty"] = difficulty
+    
+    # 构建过滤条件
+    filters = _build_filters(parsed_intent)
+    
+    # 执行混合检索
+    search_engine = await run_in_threadpool(_get_search_engine)
+    if active_config.SEARCH_ASYNC:
+        # 语义检索与ES检索并发执行，不阻塞事件循环
+        search_results = await search_engine.hybrid_search_async(query, filters, top_k=limit, nprobe=nprobe)
+    else:
+        # 同步路径：整个检索在线程池中串行执行
+        search_results = await run_in_threadpool(
+            search_engine.hybrid_search, query, filters, top_k=limit, nprobe=nprobe
+        )
+    
+    return parsed_intent, search_engine, search_results
 
 
 @router.post("/search")
@@ -24,6 +249,7 @@ async def search_questions(
     query: str,
     difficulty: Optional[str] = None,
     limit: int = Query(10, ge=1, le=50),
+    nprobe: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
@@ -33,61 +259,285 @@ async def search_questions(
         query: 搜索查询
         difficulty: 难度级别
         limit: 返回结果数量
+        nprobe: IVF索引探测列表数，覆盖构建时调优的默认值
         db: 数据库会话
         
     Returns:
         Dict[str, Any]: 搜索结果
     """
-    # 解析查询意图
-    parsed_intent = query_parser.parse(query)
-    
-    # 如果指定了难度，覆盖解析结果
-    if difficulty:
-        parsed_intent["difficulty"] = difficulty
-    
-    # 构建过滤条件
-    filters = {
-        "difficulty": parsed_intent.get("difficulty"),
-        "data_structure": parsed_intent.get("data_structure"),
-        "technique": parsed_intent.get("technique")
-    }
+    parsed_intent, search_engine, search_results = await _parse_and_search(query, difficulty, limit, nprobe)
     
-    # 执行混合检索
-    search_results = search_engine.hybrid_search(query, filters, top_k=limit)
+    response = {}
     
     # 如果没有找到结果，尝试动态生成
     if not search_results:
-        # 生成题目
-        generated_question = question_generator.generate_question(query, parsed_intent)
+        # 语义相近且意图相同的查询已生成过题目时直接复用
+        query_vector = (await run_in_threadpool(search_engine.encode_queries, [query]))[0]
+        cached = components.generation_cache.get(query_vector, parsed_intent)
         
-        if generated_question:
-            # 生成解决方案
-            generated_solution = question_generator.generate_solution(generated_question)
-            
-            # 保存到数据库
-            if generated_solution:
-                # TODO: 保存生成的题目和解决方案到数据库
-                # 这里简化处理，直接返回生成结果
-                search_results = [
-                    {
-                        "id": generated_question.get("id", "gen_001"),
-                        "title": generated_question.get("title", ""),
-                        "difficulty": generated_question.get("difficulty", "Medium"),
-                        "description": generated_question.get("description", ""),
-                        "tags": generated_question.get("tags", []),
-                        "is_generated": True,
-                        "score": 1.0
-                    }
-                ]
+        if cached:
+            search_results = [_generated_result(cached["question"], True)]
+        else:
+            # 提交后台生成任务，立即返回任务ID，相同查询的进行中任务会被合并
+            try:
+                job = generation_jobs.submit(query, parsed_intent)
+            except RuntimeError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            response["generation_job"] = {
+                "id": job.id,
+                "status": job.status,
+                "status_url": f"{router.prefix}/generation/jobs/{job.id}",
+                "events_url": f"{router.prefix}/generation/jobs/{job.id}/events"
+            }
     
     return {
         "query": query,
         "parsed_intent": parsed_intent,
         "results": search_results,
-        "total": len(search_results)
+        "total": len(search_results),
+        **response
     }
 
 
+def _sse(event: str, data: Any) -> str:
+    """
+    编码一条服务端事件
+    
+    Args:
+        event: 事件类型
+        data: 事件数据（JSON序列化）
+        
+    Returns:
+        str: SSE格式的事件文本
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.get("/search/stream")
+async def search_questions_stream(
+    query: str,
+    difficulty: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    nprobe: Optional[int] = Query(None, ge=1)
+) -> StreamingResponse:
+    """
+    搜索题目（服务端事件流），检索无结果时提交流式生成任务，标题、描述、示例等字段生成完即推送
+    
+    事件依次为：intent（解析意图）；检索有结果时为results；需要生成时为若干field
+    （字段名与值）、result（与/search相同格式的结果及耗时）；生成失败时为error；最后是done。
+    
+    Args:
+        query: 搜索查询
+        difficulty: 难度级别
+        limit: 返回结果数量
+        nprobe: IVF索引探测列表数，覆盖构建时调优的默认值
+        
+    Returns:
+        StreamingResponse: text/event-stream响应
+    """
+    async def events():
+        started = time.perf_counter()
+        parsed_intent, search_engine, search_results = await _parse_and_search(query, difficulty, limit, nprobe)
+        yield _sse("intent", parsed_intent)
+        
+        if search_results:
+            yield _sse("results", {"results": search_results, "total": len(search_results)})
+            yield _sse("done", {"total_seconds": time.perf_counter() - started})
+            return
+        
+        query_vector = (await run_in_threadpool(search_engine.encode_queries, [query]))[0]
+        cached = components.generation_cache.get(query_vector, parsed_intent)
+        timings = {}
+        
+        if cached:
+            # 缓存命中时一次性推送全部字段
+            timings["first_content_seconds"] = time.perf_counter() - started
+            for field, value in cached["question"].items():
+                yield _sse("field", {"field": field, "value": value})
+            timings["total_seconds"] = time.perf_counter() - started
+            yield _sse("result", {"results": [_generated_result(cached["question"], True)], "timings": timings})
+            yield _sse("done", {"total_seconds": timings["total_seconds"]})
+            return
+        
+        # 提交流式生成任务，相同查询的进行中任务会被合并，排队任务已满时返回错误
+        try:
+            job = generation_jobs.submit(query, parsed_intent, streaming=True)
+        except RuntimeError as e:
+            yield _sse("error", {"detail": str(e)})
+            yield _sse("done", {"total_seconds": time.perf_counter() - started})
+            return
+        
+        sent = 0
+        while True:
+            version = job.version
+            fields = job.fields[sent:]
+            sent += len(fields)
+            for field, value in fields:
+                if "first_content_seconds" not in timings:
+                    timings["first_content_seconds"] = time.perf_counter() - started
+                yield _sse("field", {"field": field, "value": value})
+            if job.done:
+                break
+            # 长时间无进度时发送注释行保持连接
+            while not await job.wait(version, timeout=15):
+                yield ": keep-alive\n\n"
+        
+        if job.status == GenerationJob.FAILED:
+            yield _sse("error", {"detail": job.error})
+            yield _sse("done", {"total_seconds": time.perf_counter() - started})
+            return
+        
+        result = job.result
+        timings.update(result.get("timings", {}))
+        timings["total_seconds"] = time.perf_counter() - started
+        payload = {"results": result["results"], "timings": timings}
+        if result.get("duplicate_of"):
+            payload["duplicate_of"] = result["duplicate_of"]
+        yield _sse("result", payload)
+        yield _sse("done", {"total_seconds": timings["total_seconds"]})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # 禁止反向代理缓冲，事件到达即转发
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/search/batch")
+async def search_questions_batch(
+    queries: List[str] = Body(..., embed=True),
+    difficulty: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=50),
+    nprobe: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    批量搜索题目，多个查询共享一次向量编码和一次FAISS检索
+    
+    Args:
+        queries: 搜索查询列表
+        difficulty: 难度级别，作用于全部查询
+        limit: 每个查询返回的结果数量
+        nprobe: IVF索引探测列表数，覆盖构建时调优的默认值
+        db: 数据库会话
+        
+    Returns:
+        Dict[str, Any]: 与queries一一对应的搜索结果
+    """
+    if not queries:
+        raise HTTPException(status_code=400, detail="查询列表不能为空")
+    if len(queries) > active_config.SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"单次最多支持{active_config.SEARCH_BATCH_MAX_QUERIES}个查询"
+        )
+    
+    # 并发解析查询意图（并发数由DeepSeek客户端限制）
+    parsed_intents = await asyncio.gather(*(components.query_parser.parse(query) for query in queries))
+    for parsed_intent in parsed_intents:
+        if difficulty:
+            parsed_intent["difficulty"] = difficulty
+    
+    # 批量执行混合检索
+    search_engine = await run_in_threadpool(_get_search_engine)
+    batch_results = await run_in_threadpool(
+        search_engine.hybrid_search_batch,
+        queries, 
+        [_build_filters(parsed_intent) for parsed_intent in parsed_intents], 
+        top_k=limit,
+        nprobe=nprobe
+    )
+    
+    return {
+        "results": [
+            {
+                "query": query,
+                "parsed_intent": parsed_intent,
+                "results": search_results,
+                "total": len(search_results)
+            }
+            for query, parsed_intent, search_results in zip(queries, parsed_intents, batch_results)
+        ],
+        "total": len(queries)
+    }
+
+
+@router.get("/generation/jobs/{job_id}")
+async def get_generation_job(job_id: str) -> Dict[str, Any]:
+    """
+    查询生成任务状态（轮询）
+    
+    Args:
+        job_id: 任务ID
+        
+    Returns:
+        Dict[str, Any]: 任务状态、当前阶段，完成后包含生成结果
+    """
+    job = generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="生成任务不存在或已过期")
+    return job.to_dict()
+
+
+@router.get("/generation/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str) -> StreamingResponse:
+    """
+    订阅生成任务进度（服务端事件流），每次状态或阶段变化推送一条status事件，任务结束后关闭
+    
+    Args:
+        job_id: 任务ID
+        
+    Returns:
+        StreamingResponse: text/event-stream响应
+    """
+    job = generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="生成任务不存在或已过期")
+    
+    async def events():
+        while True:
+            version = job.version
+            yield _sse("status", job.to_dict())
+            if job.done:
+                return
+            # 长时间无进度时发送注释行保持连接
+            while not await job.wait(version, timeout=15):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+async def get_stats() -> Dict[str, Any]:
+    """
+    获取检索引擎运行指标（编码批次大小、排队等待时间、缓存命中率、生成耗时等）
+    
+    Returns:
+        Dict[str, Any]: 运行指标
+    """
+    return await run_in_threadpool(_collect_stats)
+
+
+def _collect_stats() -> Dict[str, Any]:
+    """
+    汇总各组件的运行指标，各组件的stats会获取线程锁，需在线程池中调用
+    
+    Returns:
+        Dict[str, Any]: 运行指标
+    """
+    stats = _get_search_engine().stats()
+    stats["generation_cache"] = components.generation_cache.stats()
+    stats["generation"] = components.question_generator.stats()
+    stats["generation_jobs"] = generation_jobs.stats()
+    stats["generation_dedup"] = components.duplicate_gate.stats()
+    return stats
+
+
 @router.get("/questions/{question_id}")
 async def get_question(
     question_id: str,
@@ -146,15 +596,18 @@ async def get_solutions(
         
         if question:
             # 生成解决方案
-            generated_solution = question_generator.generate_solution(question.to_dict())
+            generated_solution = await components.question_generator.generate_solution(question.to_dict(), language)
             
             if generated_solution:
-                # TODO: 保存生成的解决方案到数据库
-                # 这里简化处理，直接返回生成结果
-                return {
-                    "question_id": question_id,
-                    "solutions": [generated_solution]
-                }
+                # 保存生成的解决方案，保存失败时仍返回生成结果
+                try:
+                    solutions = [save_solution(db, question_id, generated_solution)]
+                except Exception as e:
+                    print(f"保存生成解决方案失败: {str(e)}")
+                    return {
+                        "question_id": question_id,
+                        "solutions": [generated_solution]
+                    }
     
     return {
         "question_id": question_id,
@@ -0,0 +1,476 @@
+"""
+DeepSeek本地桩服务：实现/chat/completions接口（含stream=true的服务端事件流），
+按提示类型返回模板化的JSON，可注入延迟分布、错误率与429，用于离线压测查询解析与题目生成路径
+
+识别的提示类型：查询意图解析、题目生成、解决方案生成、合并生成（题目+解决方案+测试用例），
+其他提示返回通用文本。--responses可指定JSON文件覆盖各类型的返回内容（键为intent/question/
+solution/combined/text，值为对象或字符串）。
+
+延迟模型：首个token前等待一次从延迟分布中抽样的时间，之后按--tokens-per-second输出内容；
+非流式请求在全部内容"生成"完后一次返回。
+
+使用方法：
+    python benchmarks/deepseek_stub_server.py --port 8100 --latency-dist lognormal --latency-ms 800 --rate-limit-rate 0.05
+    DEEPSEEK_API_URL=http://127.0.0.1:8100/v1 DEEPSEEK_API_KEY=stub uvicorn app:app --port 8000
+
+模板化的题目彼此相似，压测生成路径时可设置GENERATION_DEDUP_THRESHOLD=1.01关闭近重复拦截。
+"""
+import re
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import logging
+
+from aiohttp import web
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 估算token数时每个token对应的字符数
+CHARS_PER_TOKEN = 2
+
+# 流式输出每个事件包含的token数
+TOKENS_PER_CHUNK = 4
+
+# 意图解析使用的关键词（与QueryParser的规则相近，桩服务独立运行不引用app包）
+DIFFICULTY_KEYWORDS = {"简单": "Easy", "容易": "Easy", "入门": "Easy", "中等": "Medium", "困难": "Hard", "难": "Hard"}
+DATA_STRUCTURE_KEYWORDS = {
+    "数组": "Array", "链表": "LinkedList", "栈": "Stack", "队列": "Queue", "哈希表": "HashMap",
+    "二叉树": "BinaryTree", "树": "Tree", "堆": "Heap", "图": "Graph", "字符串": "String"
+}
+TECHNIQUE_KEYWORDS = {
+    "递归": "Recursion", "动态规划": "DynamicProgramming", "贪心": "Greedy", "回溯": "Backtracking",
+    "深度优先搜索": "DFS", "广度优先搜索": "BFS", "二分查找": "BinarySearch", "排序": "Sorting"
+}
+
+
+def classify_prompt(prompt):
+    """
+    根据提示内容识别请求类型（与服务端各提示的固定文案对应）
+    
+    Args:
+        prompt: 用户消息内容
+    
+    Returns:
+        str: intent、combined、question、solution或text
+    """
+    if "请分析以下编程问题查询" in prompt:
+        return "intent"
+    if '"question": {' in prompt and '"solution": {' in prompt:
+        return "combined"
+    if "请根据以下要求生成一个高质量的编程题目" in prompt:
+        return "question"
+    if "请为以下编程题目生成一个详细的解决方案" in prompt:
+        return "solution"
+    return "text"
+
+
+def extract(pattern, prompt, default=""):
+    """
+    从提示中提取字段
+    
+    Args:
+        pattern: 正则表达式（第一个分组为字段值）
+        prompt: 提示内容
+        default: 未匹配时的默认值
+    
+    Returns:
+        str: 字段值
+    """
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else default
+
+
+def match_keyword(text, keywords):
+    """
+    查找文本中出现的第一个关键词对应的分类值
+    
+    Args:
+        text: 文本
+        keywords: 关键词到分类值的映射
+    
+    Returns:
+        str: 分类值，未出现时返回None
+    """
+    for keyword, value in keywords.items():
+        if keyword in text:
+            return value
+    return None
+
+
+def build_intent(prompt):
+    """
+    模板化的查询意图
+    
+    Args:
+        prompt: 提示内容
+    
+    Returns:
+        dict: 意图解析结果
+    """
+    query = extract(r'查询："(.*?)"', prompt)
+    return {
+        "difficulty": match_keyword(query, DIFFICULTY_KEYWORDS),
+        "data_structure": match_keyword(query, DATA_STRUCTURE_KEYWORDS),
+        "technique": match_keyword(query, TECHNIQUE_KEYWORDS),
+        "keywords": [word for word in re.split(r"\s+", query) if word],
+        "intent": "Practice"
+    }
+
+
+def build_question(prompt, sequence):
+    """
+    模板化的生成题目
+    
+    Args:
+        prompt: 提示内容
+        sequence: 请求序号，用于区分题目标题
+    
+    Returns:
+        dict: 题目
+    """
+    query = extract(r'用户查询："(.*?)"', prompt, "编程练习")
+    difficulty = extract(r"难度级别：(\S+)", prompt, "Medium")
+    data_structure = extract(r"数据结构：(\S+)", prompt, "Array")
+    technique = extract(r"算法技术：(\S+)", prompt, "Iteration")
+    return {
+        "id": f"stub_{uuid.uuid4().hex[:12]}",
+        "title": f"{query}（练习{sequence}）",
+        "description": (
+            f"给定一个{data_structure}形式的输入，请使用{technique}的思路完成以下任务：{query}。"
+            f"输入第一行为元素个数n，第二行为n个以空格分隔的整数；输出一行，为处理后的结果。"
+        ),
+        "difficulty": difficulty if difficulty in ("Easy", "Medium", "Hard") else "Medium",
+        "tags": [data_structure, technique],
+        "example_input": "5\n1 2 3 4 5",
+        "example_output": "15",
+        "constraints": "1 <= n <= 10^5，-10^4 <= 元素值 <= 10^4",
+        "function_signature": "def solve(nums: List[int]) -> int"
+    }
+
+
+def build_solution(prompt):
+    """
+    模板化的解决方案
+    
+    Args:
+        prompt: 提示内容
+    
+    Returns:
+        dict: 解决方案（包含测试用例）
+    """
+    solution = {
+        "solution_code": (
+            "import sys\n\n\n"
+            "def solve(nums):\n"
+            "    return sum(nums)\n\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    data = sys.stdin.read().split()\n"
+            "    print(solve(list(map(int, data[1:]))))\n"
+        ),
+        "explanation": "遍历一次数组累加所有元素即可得到结果。",
+        "time_complexity": "O(n)",
+        "space_complexity": "O(1)",
+        "test_cases": [
+            {"input": "5\n1 2 3 4 5", "expected_output": "15"},
+            {"input": "1\n-3", "expected_output": "-3"},
+            {"input": "3\n0 0 0", "expected_output": "0"}
+        ]
+    }
+    language = extract(r"请使用(\S+?)实现", prompt)
+    if language:
+        solution["language"] = language
+    return solution
+
+
+class StubServer:
+    """
+    DeepSeek桩服务：生成模板化回复并按配置注入延迟与错误
+    """
+    
+    def __init__(self, args):
+        """
+        初始化桩服务
+        
+        Args:
+            args: 命令行参数
+        """
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.overrides = {}
+        if args.responses:
+            with open(args.responses) as f:
+                self.overrides = json.load(f)
+        
+        self.sequence = 0
+        self.inflight = 0
+        self.stats = {
+            "requests": 0,
+            "streamed": 0,
+            "by_kind": {},
+            "by_status": {},
+            "peak_inflight": 0,
+            "started_at": time.time()
+        }
+    
+    def sample_latency(self):
+        """
+        从延迟分布中抽样首个token前的等待时间
+        
+        Returns:
+            float: 等待时间（秒）
+        """
+        args = self.args
+        mean = args.latency_ms
+        if args.latency_dist == "fixed":
+            value = mean
+        elif args.latency_dist == "uniform":
+            value = self.rng.uniform(mean - args.jitter_ms, mean + args.jitter_ms)
+        elif args.latency_dist == "normal":
+            value = self.rng.gauss(mean, args.jitter_ms)
+        elif args.latency_dist == "lognormal":
+            # 均值保持为latency_ms，sigma越大长尾越重
+            value = mean * math.exp(self.rng.gauss(0, args.sigma) - args.sigma ** 2 / 2)
+        elif args.latency_dist == "exponential":
+            value = self.rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            raise ValueError(f"不支持的延迟分布: {args.latency_dist}")
+        return max(value, 0.0) / 1000.0
+    
+    def render(self, prompt):
+        """
+        生成回复内容
+        
+        Args:
+            prompt: 用户消息内容
+        
+        Returns:
+            tuple: (请求类型, 回复文本)
+        """
+        kind = classify_prompt(prompt)
+        self.sequence += 1
+        if kind in self.overrides:
+            content = self.overrides[kind]
+        elif kind == "intent":
+            content = build_intent(prompt)
+        elif kind == "question":
+            content = build_question(prompt, self.sequence)
+        elif kind == "solution":
+            content = build_solution(prompt)
+        elif kind == "combined":
+            content = {"question": build_question(prompt, self.sequence), "solution": build_solution(prompt)}
+        else:
+            content = "这是DeepSeek桩服务的回复。"
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+        return kind, content
+    
+    def _count(self, kind, status):
+        """
+        记录请求统计
+        
+        Args:
+            kind: 请求类型
+            status: 响应状态码
+        """
+        self.stats["by_kind"][kind] = self.stats["by_kind"].get(kind, 0) + 1
+        self.stats["by_status"][str(status)] = self.stats["by_status"].get(str(status), 0) + 1
+    
+    def injected_error(self):
+        """
+        按配置决定是否返回错误
+        
+        Returns:
+            web.Response: 注入的错误响应，不注入时返回None
+        """
+        args = self.args
+        if args.max_concurrency and self.inflight > args.max_concurrency:
+            return self._error(429, "rate_limit_exceeded", "并发请求数超过限制")
+        roll = self.rng.random()
+        if roll < args.rate_limit_rate:
+            return self._error(429, "rate_limit_exceeded", "请求过于频繁")
+        if roll < args.rate_limit_rate + args.error_rate:
+            return self._error(self.rng.choice((500, 502, 503)), "server_error", "服务暂时不可用")
+        return None
+    
+    def _error(self, status, error_type, message):
+        """
+        构建错误响应
+        
+        Args:
+            status: 状态码
+            error_type: 错误类型
+            message: 错误信息
+        
+        Returns:
+            web.Response: 错误响应
+        """
+        headers = {"Retry-After": str(self.args.retry_after)} if status == 429 else None
+        return web.json_response(
+            {"error": {"message": message, "type": error_type}}, status=status, headers=headers
+        )
+    
+    async def chat_completions(self, request):
+        """
+        /chat/completions接口
+        
+        Args:
+            request: 请求
+        
+        Returns:
+            web.StreamResponse: 回复
+        """
+        self.stats["requests"] += 1
+        self.inflight += 1
+        self.stats["peak_inflight"] = max(self.stats["peak_inflight"], self.inflight)
+        try:
+            try:
+                payload = await request.json()
+                prompt = "\n".join(str(message.get("content", "")) for message in payload["messages"])
+            except (ValueError, KeyError, TypeError):
+                self._count("invalid", 400)
+                return self._error(400, "invalid_request_error", "请求体不是有效的chat/completions请求")
+            
+            error = self.injected_error()
+            kind, content = self.render(prompt)
+            await asyncio.sleep(self.sample_latency())
+            if error is not None:
+                self._count(kind, error.status)
+                return error
+            
+            usage = {
+                "prompt_tokens": max(len(prompt) // CHARS_PER_TOKEN, 1),
+                "completion_tokens": max(len(content) // CHARS_PER_TOKEN, 1)
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            model = payload.get("model", "deepseek-coder")
+            self._count(kind, 200)
+            
+            if payload.get("stream"):
+                self.stats["streamed"] += 1
+                return await self._stream(request, content, model)
+            
+            if self.args.tokens_per_second > 0:
+                await asyncio.sleep(usage["completion_tokens"] / self.args.tokens_per_second)
+            return web.json_response({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+        finally:
+            self.inflight -= 1
+    
+    async def _stream(self, request, content, model):
+        """
+        以服务端事件流逐段输出回复
+        
+        Args:
+            request: 请求
+            content: 回复文本
+            model: 模型名称
+        
+        Returns:
+            web.StreamResponse: 事件流响应
+        """
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        chunk_chars = CHARS_PER_TOKEN * TOKENS_PER_CHUNK
+        interval = TOKENS_PER_CHUNK / self.args.tokens_per_second if self.args.tokens_per_second > 0 else 0.0
+        
+        def event(delta, finish_reason=None):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+        
+        try:
+            await response.write(event({"role": "assistant", "content": ""}))
+            for start in range(0, len(content), chunk_chars):
+                if start and interval:
+                    await asyncio.sleep(interval)
+                await response.write(event({"content": content[start:start + chunk_chars]}))
+            await response.write(event({}, "stop"))
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            # 客户端提前断开
+            pass
+        return response
+    
+    async def get_stats(self, request):
+        """
+        桩服务统计接口
+        
+        Args:
+            request: 请求
+        
+        Returns:
+            web.Response: 请求数、各类型与各状态码计数、当前与峰值并发
+        """
+        return web.json_response({**self.stats, "inflight": self.inflight})
+    
+    def build_app(self):
+        """
+        构建aiohttp应用，同时注册/chat/completions与/v1/chat/completions
+        
+        Returns:
+            web.Application: 应用
+        """
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="DeepSeek本地桩服务（/chat/completions，支持流式输出与故障注入）")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8100, help="监听端口")
+    parser.add_argument(
+        "--latency-dist", type=str, default="lognormal",
+        choices=["fixed", "uniform", "normal", "lognormal", "exponential"], help="首个token前等待时间的分布"
+    )
+    parser.add_argument("--latency-ms", type=float, default=500, help="首个token前等待时间的均值（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="uniform的半宽/normal的标准差（毫秒）")
+    parser.add_argument("--sigma", type=float, default=0.5, help="lognormal的形状参数，越大长尾越重")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="输出速率（token/秒），0表示立即输出全部内容")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回500/502/503的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="返回429的概率")
+    parser.add_argument("--retry-after", type=float, default=1, help="429响应的Retry-After（秒）")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="同时处理的请求数上限，超出返回429，0表示不限")
+    parser.add_argument("--responses", type=str, default=None, help="覆盖各类型回复内容的JSON文件")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    args = parser.parse_args()
+    
+    server = StubServer(args)
+    logger.info(
+        f"DeepSeek桩服务监听 http://{args.host}:{args.port}，延迟分布 {args.latency_dist}（均值{args.latency_ms}ms），"
+        f"错误率 {args.error_rate}，429比例 {args.rate_limit_rate}"
+    )
+    web.run_app(server.build_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+FAISS索引加载基准测试：对比常规读取与mmap加载的单worker常驻内存和冷启动耗时
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import multiprocessing as mp
+
+import numpy as np
+
+# 复用服务端的索引加载实现（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from index_io import load_faiss_index
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def read_memory_kb():
+    """
+    读取当前进程的内存占用
+    
+    Returns:
+        dict: RSS与PSS（KB）。PSS按共享进程数分摊共享页，能反映mmap共享效果
+    """
+    memory = {"rss_kb": 0, "pss_kb": 0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    memory["rss_kb"] = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    memory["pss_kb"] = int(line.split()[1])
+    except FileNotFoundError:
+        # 非Linux系统只能读取RSS
+        import resource
+        memory["rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return memory
+
+
+def worker(index_path, use_mmap, num_queries, barrier, results):
+    """
+    模拟一个服务worker：加载索引、执行若干查询后报告内存
+    
+    Args:
+        index_path: 索引文件路径
+        use_mmap: 是否mmap加载
+        num_queries: 加载后执行的查询数量（触达索引页面）
+        barrier: 所有worker完成加载后再统计内存
+        results: 结果队列
+    """
+    baseline = read_memory_kb()
+    
+    started = time.perf_counter()
+    index, mode = load_faiss_index(index_path, use_mmap=use_mmap)
+    load_seconds = time.perf_counter() - started
+    
+    # 执行查询，使访问到的页面进入内存
+    rng = np.random.default_rng(os.getpid())
+    queries = rng.standard_normal((num_queries, index.d)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    started = time.perf_counter()
+    index.search(queries, 10)
+    search_seconds = time.perf_counter() - started
+    
+    # 等待所有worker都加载完成，此时PSS才能体现共享
+    barrier.wait()
+    memory = read_memory_kb()
+    results.put({
+        "pid": os.getpid(),
+        "mode": mode,
+        "load_seconds": load_seconds,
+        "first_queries_seconds": search_seconds,
+        "rss_mb": (memory["rss_kb"] - baseline["rss_kb"]) / 1024,
+        "pss_mb": (memory["pss_kb"] - baseline["pss_kb"]) / 1024
+    })
+    barrier.wait()
+
+
+def run_mode(index_path, use_mmap, num_workers, num_queries):
+    """
+    以指定加载方式启动多个worker
+    
+    Args:
+        index_path: 索引文件路径
+        use_mmap: 是否mmap加载
+        num_workers: worker数量
+        num_queries: 每个worker执行的查询数量
+    
+    Returns:
+        dict: 汇总结果
+    """
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(num_workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(index_path, use_mmap, num_queries, barrier, results))
+        for _ in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    load_seconds = np.array([r["load_seconds"] for r in reports])
+    return {
+        "requested": "mmap" if use_mmap else "read",
+        "actual_modes": sorted({r["mode"] for r in reports}),
+        "workers": num_workers,
+        "load_seconds_mean": float(load_seconds.mean()),
+        "load_seconds_max": float(load_seconds.max()),
+        "first_queries_seconds_mean": float(np.mean([r["first_queries_seconds"] for r in reports])),
+        "rss_mb_per_worker": float(np.mean([r["rss_mb"] for r in reports])),
+        "pss_mb_per_worker": float(np.mean([r["pss_mb"] for r in reports])),
+        "pss_mb_total": float(np.sum([r["pss_mb"] for r in reports]))
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="FAISS索引加载方式基准测试")
+    parser.add_argument("--index", type=str, default="data/kodcode_index.faiss", help="索引文件路径")
+    parser.add_argument("--workers", type=int, default=4, help="模拟的worker数量")
+    parser.add_argument("--queries", type=int, default=100, help="每个worker加载后执行的查询数量")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    logger.info(f"索引文件大小: {os.path.getsize(args.index) / 1024 / 1024:.1f} MB")
+    
+    report = {"index": args.index, "results": []}
+    for use_mmap in (False, True):
+        result = run_mode(args.index, use_mmap, args.workers, args.queries)
+        report["results"].append(result)
+        logger.info(
+            f"[{result['requested']} -> {','.join(result['actual_modes'])}] "
+            f"加载耗时 {result['load_seconds_mean']:.2f}s (max {result['load_seconds_max']:.2f}s), "
+            f"每worker RSS {result['rss_mb_per_worker']:.1f} MB, "
+            f"每worker PSS {result['pss_mb_per_worker']:.1f} MB, "
+            f"总PSS {result['pss_mb_total']:.1f} MB"
+        )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+融合排序微基准：对比原有的Python字典实现与各融合策略在不同候选规模下的耗时
+
+fuse在候选较少时使用纯Python实现，numpy列为强制使用NumPy实现的rank策略，用于确定切换阈值。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+
+# 复用服务端的融合实现（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+import fusion
+from fusion import fuse, FUSION_STRATEGIES
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def dict_rerank(semantic_results, exact_results, top_k):
+    """
+    原有的_hybrid_rerank实现（Python字典 + 全量排序），作为对照
+    
+    Args:
+        semantic_results: 语义检索结果
+        exact_results: 精确匹配结果
+        top_k: 返回结果数量
+    
+    Returns:
+        list: 混合排序后的结果
+    """
+    score_map = {}
+    id_to_item = {}
+    for i, res in enumerate(semantic_results):
+        item_id = res["id"]
+        score_map[item_id] = score_map.get(item_id, 0) + 0.7 * (1 - i/len(semantic_results))
+        id_to_item[item_id] = res
+    for res in exact_results:
+        item_id = res["id"]
+        score_map[item_id] = score_map.get(item_id, 0) + 0.3
+        id_to_item[item_id] = res
+    sorted_ids = sorted(score_map.items(), key=lambda x: x[1], reverse=True)
+    return [id_to_item[item_id] for item_id, _ in sorted_ids[:top_k]]
+
+
+def make_candidates(size, overlap, rng):
+    """
+    生成模拟的两路检索结果，两路之间有一定比例的重合
+    
+    Args:
+        size: 每路候选数量
+        overlap: 精确匹配结果中与语义结果重合的比例
+        rng: 随机数生成器
+    
+    Returns:
+        tuple: (语义结果, 精确匹配结果)
+    """
+    semantic_ids = rng.choice(size * 10, size=size, replace=False)
+    shared = semantic_ids[rng.choice(size, size=int(size * overlap), replace=False)]
+    exact_ids = np.concatenate([shared, size * 10 + np.arange(size - len(shared))])
+    rng.shuffle(exact_ids)
+    semantic_results = [
+        {"id": str(item_id), "score": float(score)}
+        for item_id, score in zip(semantic_ids, np.sort(rng.random(size))[::-1])
+    ]
+    exact_results = [
+        {"id": str(item_id), "score": float(score)}
+        for item_id, score in zip(exact_ids, np.sort(rng.random(size) * 20)[::-1])
+    ]
+    return semantic_results, exact_results
+
+
+def time_call(func, repeat):
+    """
+    多次调用并统计耗时
+    
+    Args:
+        func: 无参函数
+        repeat: 调用次数
+    
+    Returns:
+        dict: 平均与p99耗时（微秒）
+    """
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies = np.array(latencies)
+    return {"mean_us": float(latencies.mean()), "p99_us": float(np.percentile(latencies, 99))}
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="融合排序微基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000, 10000], help="每路候选数量")
+    parser.add_argument("--overlap", type=float, default=0.3, help="两路结果的重合比例")
+    parser.add_argument("--top-k", type=int, default=10, help="返回结果数量")
+    parser.add_argument("--repeat", type=int, default=200, help="每种配置的调用次数")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(42)
+    results = []
+    for size in args.sizes:
+        semantic_results, exact_results = make_candidates(size, args.overlap, rng)
+        row = {"size": size, "dict": time_call(lambda: dict_rerank(semantic_results, exact_results, args.top_k), args.repeat)}
+        
+        # 与_hybrid_rerank一致：从结果字典中提取id与得分后融合
+        def run(strategy):
+            return fuse(
+                [res["id"] for res in semantic_results],
+                [res["score"] for res in semantic_results],
+                [res["id"] for res in exact_results],
+                [res["score"] for res in exact_results],
+                args.top_k,
+                strategy=strategy
+            )
+        
+        for strategy in FUSION_STRATEGIES:
+            row[strategy] = time_call(lambda: run(strategy), args.repeat)
+        
+        threshold = fusion.NUMPY_MIN_CANDIDATES
+        fusion.NUMPY_MIN_CANDIDATES = 0
+        try:
+            row["numpy"] = time_call(lambda: run("rank"), args.repeat)
+        finally:
+            fusion.NUMPY_MIN_CANDIDATES = threshold
+        results.append(row)
+        logger.info(
+            f"候选数 {size}: dict {row['dict']['mean_us']:.1f} us, "
+            + ", ".join(f"{strategy} {row[strategy]['mean_us']:.1f} us" for strategy in FUSION_STRATEGIES)
+            + f", numpy {row['numpy']['mean_us']:.1f} us"
+        )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+检索后端对比：带过滤条件的查询分别走FAISS+ES两路检索与ES dense_vector单次请求，比较检索延迟
+
+查询取自语料中的题目标题，过滤条件取该题目自身的难度与数据结构。两个后端使用同一个查询向量，
+编码耗时单独统计，不计入后端延迟。运行前需先以--with-vectors构建ES索引：
+    python data_processing/es_indexer.py --with-vectors
+    python benchmarks/knn_backend_benchmark.py --num-queries 300 --output knn_backend.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import faiss
+import numpy as np
+from elasticsearch import Elasticsearch
+from sentence_transformers import SentenceTransformer
+
+# 复用服务端的索引加载、元数据存储与ES查询构建（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from index_io import load_faiss_index
+from metadata_store import MetadataStore
+from es_queries import build_exact_query, build_knn_query, parse_hits
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def sample_filtered_queries(store, num_queries, seed=42):
+    """
+    从语料中抽取查询及其过滤条件
+    
+    Args:
+        store: 元数据存储
+        num_queries: 查询数量
+        seed: 随机种子
+    
+    Returns:
+        list: (查询文本, 过滤条件)列表
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(store), size=min(num_queries, len(store)), replace=False)
+    queries = []
+    for row in rows:
+        filters = {
+            "difficulty": store.get_category("difficulty", int(row)),
+            "data_structure": store.get_category("data_structure", int(row))
+        }
+        queries.append((store.get_string("title", int(row)), {key: value for key, value in filters.items() if value}))
+    return queries
+
+
+def latency_summary(latencies):
+    """
+    统计延迟分位数
+    
+    Args:
+        latencies: 延迟记录（秒）
+    
+    Returns:
+        dict: p50/p99/平均延迟（毫秒）
+    """
+    values = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean())
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="FAISS+ES与ES kNN检索后端对比")
+    parser.add_argument("--index", type=str, default="data/kodcode_index.faiss", help="FAISS索引文件路径")
+    parser.add_argument("--manifest", type=str, default="data/index_manifest.json", help="索引清单，用于应用调优后的nprobe")
+    parser.add_argument("--metadata-store", type=str, default="data/metadata_store", help="元数据存储目录")
+    parser.add_argument("--model", type=str, default="sentence-transformers/all-mpnet-base-v2", help="向量模型")
+    parser.add_argument("--es-host", type=str, default="localhost", help="Elasticsearch主机地址")
+    parser.add_argument("--es-port", type=int, default=9200, help="Elasticsearch端口号")
+    parser.add_argument("--es-index", type=str, default="kodcode", help="ES索引名称")
+    parser.add_argument("--num-queries", type=int, default=300, help="查询数量")
+    parser.add_argument("--top-k", type=int, default=10, help="每个查询返回的结果数量")
+    parser.add_argument("--num-candidates", type=int, default=100, help="ES kNN每个分片的候选数量")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    model = SentenceTransformer(args.model)
+    index, _ = load_faiss_index(args.index)
+    if os.path.exists(args.manifest):
+        with open(args.manifest) as f:
+            nprobe = json.load(f).get("nprobe")
+        if nprobe:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+    store = MetadataStore(args.metadata_store)
+    es = Elasticsearch(hosts=[f"{args.es_host}:{args.es_port}"])
+    queries = sample_filtered_queries(store, args.num_queries)
+    
+    encode_latencies, faiss_es_latencies, es_knn_latencies = [], [], []
+    for query, filters in queries:
+        started = time.perf_counter()
+        query_vector = model.encode([query], normalize_embeddings=True).astype(np.float32)
+        encode_latencies.append(time.perf_counter() - started)
+        
+        # FAISS+ES：向量检索与ES过滤各一次，结果在Python中合并
+        started = time.perf_counter()
+        distances, indices = index.search(query_vector, args.top_k * 2)
+        valid = indices[0] >= 0
+        store.records(indices[0][valid], distances[0][valid])
+        parse_hits(es.search(index=args.es_index, body=build_exact_query(filters, query), size=args.top_k))
+        faiss_es_latencies.append(time.perf_counter() - started)
+        
+        # ES kNN：近邻、过滤与关键词匹配一次请求完成
+        started = time.perf_counter()
+        body = build_knn_query(query_vector[0].tolist(), filters, args.top_k, args.num_candidates, query=query)
+        parse_hits(es.search(index=args.es_index, body=body, size=args.top_k))
+        es_knn_latencies.append(time.perf_counter() - started)
+    
+    result = {
+        "num_queries": len(queries),
+        "top_k": args.top_k,
+        "num_candidates": args.num_candidates,
+        "encode": latency_summary(encode_latencies),
+        "faiss_es": latency_summary(faiss_es_latencies),
+        "es_knn": latency_summary(es_knn_latencies)
+    }
+    logger.info(
+        f"FAISS+ES p50 {result['faiss_es']['p50_ms']:.2f} ms / p99 {result['faiss_es']['p99_ms']:.2f} ms, "
+        f"ES kNN p50 {result['es_knn']['p50_ms']:.2f} ms / p99 {result['es_knn']['p99_ms']:.2f} ms"
+    )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
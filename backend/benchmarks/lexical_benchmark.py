@@ -0,0 +1,130 @@
+"""
+精确匹配后端对比：在相同查询上比较进程内BM25与Elasticsearch的延迟和排序重合度
+    
+    python data_processing/bm25_indexer.py
+    python benchmarks/lexical_benchmark.py --num-queries 500 --difficulty Medium --output lexical.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+from elasticsearch import Elasticsearch
+
+# 直接引用模块文件，避免初始化整个app包
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from bm25 import BM25Index
+from metadata_store import MetadataStore
+from es_queries import build_exact_query
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_queries(store, queries_file, num_queries, seed=42):
+    """
+    加载查询：优先读取查询文件（每行一条），否则从语料中抽取题目标题
+    
+    Args:
+        store: 元数据存储
+        queries_file: 查询文件路径
+        num_queries: 抽取的查询数量
+        seed: 随机种子
+    
+    Returns:
+        list: 查询列表
+    """
+    if queries_file:
+        with open(queries_file) as f:
+            return [line.strip() for line in f if line.strip()]
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(store), size=min(num_queries, len(store)), replace=False)
+    return [store.get_string("title", int(row)) for row in rows]
+
+
+def latency_summary(latencies):
+    """
+    统计延迟分位数
+    
+    Args:
+        latencies: 延迟记录（秒）
+    
+    Returns:
+        dict: p50/p99/平均延迟（毫秒）
+    """
+    values = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean())
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="BM25与Elasticsearch精确匹配对比")
+    parser.add_argument("--bm25-index", type=str, default="data/bm25_index", help="BM25索引目录")
+    parser.add_argument("--metadata-store", type=str, default="data/metadata_store", help="元数据存储目录")
+    parser.add_argument("--es-host", type=str, default="localhost", help="Elasticsearch主机地址")
+    parser.add_argument("--es-port", type=int, default=9200, help="Elasticsearch端口号")
+    parser.add_argument("--es-index", type=str, default="kodcode", help="ES索引名称")
+    parser.add_argument("--queries", type=str, default=None, help="查询文件（每行一条），默认从语料中抽取标题")
+    parser.add_argument("--num-queries", type=int, default=500, help="抽取的查询数量")
+    parser.add_argument("--difficulty", type=str, default=None, help="附加的难度过滤条件")
+    parser.add_argument("--size", type=int, default=10, help="每个查询返回的结果数量")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    store = MetadataStore(args.metadata_store)
+    lexical_index = BM25Index(args.bm25_index)
+    es = Elasticsearch(hosts=[f"{args.es_host}:{args.es_port}"])
+    filters = {"difficulty": args.difficulty} if args.difficulty else {}
+    queries = load_queries(store, args.queries, args.num_queries)
+    
+    bm25_latencies, es_latencies, overlaps = [], [], []
+    for query in queries:
+        # 进程内BM25：过滤位图 + 倒排检索 + 构建结果
+        started = time.perf_counter()
+        bitmap = store.filter_bitmap(filters) if filters else None
+        rows, scores = lexical_index.search(query, size=args.size, bitmap=bitmap)
+        bm25_ids = [item["id"] for item in store.records(rows, scores)]
+        bm25_latencies.append(time.perf_counter() - started)
+        
+        # Elasticsearch：一次网络往返
+        started = time.perf_counter()
+        response = es.search(index=args.es_index, body=build_exact_query(filters, query), size=args.size)
+        es_ids = [hit["_source"]["id"] for hit in response["hits"]["hits"]]
+        es_latencies.append(time.perf_counter() - started)
+        
+        if es_ids:
+            overlaps.append(len(set(bm25_ids) & set(es_ids)) / len(es_ids))
+    
+    result = {
+        "num_queries": len(queries),
+        "filters": filters,
+        "size": args.size,
+        "bm25": latency_summary(bm25_latencies),
+        "elasticsearch": latency_summary(es_latencies),
+        f"overlap@{args.size}": float(np.mean(overlaps)) if overlaps else None
+    }
+    logger.info(
+        f"BM25 p50 {result['bm25']['p50_ms']:.2f} ms / p99 {result['bm25']['p99_ms']:.2f} ms, "
+        f"ES p50 {result['elasticsearch']['p50_ms']:.2f} ms / p99 {result['elasticsearch']['p99_ms']:.2f} ms, "
+        f"重合度 {result[f'overlap@{args.size}']}"
+    )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
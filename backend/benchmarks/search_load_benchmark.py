@@ -0,0 +1,138 @@
+"""
+检索接口并发压测：固定数量的客户端持续请求/search，统计吞吐量与延迟分位数
+
+对比同步与异步检索路径时，分别以SEARCH_ASYNC=false和SEARCH_ASYNC=true启动服务后运行本脚本：
+    SEARCH_ASYNC=false uvicorn app:app --port 8000
+    python benchmarks/search_load_benchmark.py --label sync --output sync.json
+    SEARCH_ASYNC=true uvicorn app:app --port 8000
+    python benchmarks/search_load_benchmark.py --label async --output async.json
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+import aiohttp
+import numpy as np
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 默认查询集合，附加随机后缀以避开结果缓存
+DEFAULT_QUERIES = [
+    "反转链表",
+    "二叉树 中等",
+    "动态规划 困难",
+    "数组 简单",
+    "图 广度优先搜索",
+    "字符串 回溯",
+    "哈希表 两数之和",
+    "栈 括号匹配",
+]
+
+
+async def client(session, url, queries, deadline, bypass_cache, latencies, errors):
+    """
+    单个压测客户端：在截止时间前循环发送请求
+    
+    Args:
+        session: aiohttp会话
+        url: 检索接口地址
+        queries: 查询集合
+        deadline: 截止时间（perf_counter）
+        bypass_cache: 是否为查询附加随机后缀以避开结果缓存
+        latencies: 延迟记录（秒）
+        errors: 错误计数
+    """
+    while time.perf_counter() < deadline:
+        query = random.choice(queries)
+        if bypass_cache:
+            query = f"{query} {random.randint(0, 1_000_000)}"
+        started = time.perf_counter()
+        try:
+            async with session.post(url, params={"query": query, "limit": 10}) as response:
+                await response.read()
+                if response.status != 200:
+                    errors["count"] += 1
+                    continue
+        except aiohttp.ClientError:
+            errors["count"] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(url, concurrency, duration, queries, bypass_cache):
+    """
+    执行压测
+    
+    Args:
+        url: 检索接口地址
+        concurrency: 并发客户端数量
+        duration: 压测时长（秒）
+        queries: 查询集合
+        bypass_cache: 是否避开结果缓存
+    
+    Returns:
+        dict: 吞吐量与延迟统计
+    """
+    latencies = []
+    errors = {"count": 0}
+    timeout = aiohttp.ClientTimeout(total=120)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[
+            client(session, url, queries, deadline, bypass_cache, latencies, errors)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+    
+    values = np.array(latencies) * 1000.0
+    return {
+        "concurrency": concurrency,
+        "duration_seconds": elapsed,
+        "requests": len(latencies),
+        "errors": errors["count"],
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": float(np.percentile(values, 50)) if values.size else None,
+            "p95": float(np.percentile(values, 95)) if values.size else None,
+            "p99": float(np.percentile(values, 99)) if values.size else None,
+            "max": float(values.max()) if values.size else None
+        }
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="检索接口并发压测")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8000/api/v1/practice/search", help="检索接口地址")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发客户端数量")
+    parser.add_argument("--duration", type=float, default=30, help="压测时长（秒）")
+    parser.add_argument("--use-cache", action="store_true", help="使用固定查询（允许命中结果缓存）")
+    parser.add_argument("--label", type=str, default="", help="结果标签，如sync/async")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    result = asyncio.run(run(args.url, args.concurrency, args.duration, DEFAULT_QUERIES, not args.use_cache))
+    result["label"] = args.label
+    logger.info(
+        f"[{args.label}] 并发{result['concurrency']}: 吞吐量 {result['throughput_rps']:.1f} req/s, "
+        f"p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms, 错误 {result['errors']}"
+    )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
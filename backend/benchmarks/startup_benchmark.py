@@ -0,0 +1,126 @@
+"""
+服务冷启动基准测试：测量进程启动到端口可用、就绪以及首个检索请求完成的耗时
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import subprocess
+
+import requests
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def wait_for(url, started, timeout, expect_status=200):
+    """
+    轮询URL直到返回期望的状态码
+    
+    Args:
+        url: 请求地址
+        started: 计时起点
+        timeout: 超时时间（秒）
+        expect_status: 期望的状态码
+    
+    Returns:
+        float: 自计时起点经过的秒数，超时返回None
+    """
+    while time.perf_counter() - started < timeout:
+        try:
+            response = requests.get(url, timeout=1)
+            if response.status_code == expect_status:
+                return time.perf_counter() - started
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def run_once(port, query, timeout):
+    """
+    启动一次服务并测量各阶段耗时
+    
+    Args:
+        port: 监听端口
+        query: 首个检索请求的查询
+        timeout: 每个阶段的超时时间（秒）
+    
+    Returns:
+        dict: 各阶段耗时（秒）
+    """
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    
+    try:
+        result = {"healthz_seconds": wait_for(f"{base_url}/healthz", started, timeout)}
+        
+        # 就绪前发出的首个请求会等待组件加载完成
+        request_started = time.perf_counter()
+        response = requests.post(
+            f"{base_url}/api/v1/practice/search", params={"query": query, "limit": 10}, timeout=timeout
+        )
+        result["first_search_seconds"] = time.perf_counter() - started
+        result["first_search_latency_seconds"] = time.perf_counter() - request_started
+        result["first_search_status"] = response.status_code
+        
+        result["readyz_seconds"] = wait_for(f"{base_url}/readyz", started, timeout)
+        return result
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="服务冷启动基准测试")
+    parser.add_argument("--port", type=int, default=8765, help="测试使用的端口")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数")
+    parser.add_argument("--query", type=str, default="反转链表", help="首个检索请求的查询")
+    parser.add_argument("--timeout", type=float, default=300, help="每个阶段的超时时间（秒）")
+    parser.add_argument("--output", type=str, default=None, help="结果输出JSON文件")
+    args = parser.parse_args()
+    
+    runs = []
+    for i in range(args.runs):
+        result = run_once(args.port, args.query, args.timeout)
+        runs.append(result)
+        logger.info(f"第{i + 1}次: {result}")
+    
+    def mean(key):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        return sum(values) / len(values) if values else None
+    
+    summary = {
+        "runs": runs,
+        "healthz_seconds_mean": mean("healthz_seconds"),
+        "readyz_seconds_mean": mean("readyz_seconds"),
+        "first_search_seconds_mean": mean("first_search_seconds")
+    }
+    logger.info(
+        f"端口可用 {summary['healthz_seconds_mean']}s, 就绪 {summary['readyz_seconds_mean']}s, "
+        f"首个检索完成 {summary['first_search_seconds_mean']}s"
+    )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
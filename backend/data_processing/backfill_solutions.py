@@ -0,0 +1,366 @@
+"""
+解决方案回填脚本：为没有解决方案的题目批量生成解决方案，避免首个查看题目的用户等待在线生成
+
+按题目ID顺序分页读取缺少解决方案的题目（可按语言过滤），以信号量限制同时生成的数量，
+以令牌桶限制DeepSeek请求速率；指定--redis时令牌桶保存在Redis中，与服务端及其他回填进程共享配额。
+生成结果按批批量插入Solution与TestCase，每批提交后把之前题目都已处理完的最大题目ID写入检查点，
+中断后重新运行即从检查点继续。生成失败的题目记录在检查点中，使用--reset从头运行时会重新尝试。
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from collections import deque
+
+from sqlalchemy import and_, exists
+from sqlalchemy.orm import selectinload
+
+# 复用服务端的配置、生成器与持久化逻辑
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.config import active_config
+from app.database import SessionLocal
+from app.models.question import Question, Solution
+from app.core.deepseek_client import DeepSeekClient, CircuitBreaker
+from app.core.rate_limit import TokenBucket, RedisTokenBucket
+from app.core.matching.cache import connect_redis
+from app.core.generation.deepseek_generation import QuestionGenerator
+from app.core.generation.persistence import save_solutions_bulk
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_checkpoint(path, language):
+    """
+    读取检查点
+    
+    Args:
+        path: 检查点路径
+        language: 本次回填的语言
+    
+    Returns:
+        dict: 检查点（已处理到的题目ID、累计生成与失败数量、失败的题目ID）
+    """
+    if not os.path.exists(path):
+        return {"language": language, "last_id": None, "generated": 0, "failed": 0, "failed_ids": []}
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("language") != language:
+        raise ValueError(
+            f"检查点 {path} 属于语言 {checkpoint.get('language')}，与本次的 {language} 不一致，请使用--reset或其他检查点路径"
+        )
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    原子地写入检查点
+    
+    Args:
+        path: 检查点路径
+        checkpoint: 检查点
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def fetch_questions(language, after_id, limit):
+    """
+    按题目ID顺序读取一页缺少解决方案的题目
+    
+    Args:
+        language: 编程语言，为None时查找没有任何解决方案的题目
+        after_id: 只读取ID大于该值的题目
+        limit: 每页数量
+    
+    Returns:
+        list: 题目字典（包含示例）
+    """
+    condition = Solution.question_id == Question.id
+    if language:
+        condition = and_(condition, Solution.language == language)
+    db = SessionLocal()
+    try:
+        query = db.query(Question).options(selectinload(Question.tags), selectinload(Question.examples))
+        query = query.filter(~exists().where(condition))
+        if after_id is not None:
+            query = query.filter(Question.id > after_id)
+        return [question.to_dict() for question in query.order_by(Question.id).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def insert_solutions(solutions):
+    """
+    批量插入解决方案与测试用例
+    
+    Args:
+        solutions: (题目ID, 生成的解决方案)列表
+    
+    Returns:
+        int: 插入的解决方案数量
+    """
+    db = SessionLocal()
+    try:
+        return save_solutions_bulk(db, solutions)
+    finally:
+        db.close()
+
+
+class SolutionBackfill:
+    """
+    并发生成解决方案，按批写入数据库并维护检查点
+    """
+    
+    def __init__(self, generator, language, checkpoint_path, checkpoint, concurrency=8, batch_size=20):
+        """
+        初始化回填任务
+        
+        Args:
+            generator: 题目生成器
+            language: 解决方案的编程语言
+            checkpoint_path: 检查点路径
+            checkpoint: 读取的检查点
+            concurrency: 同时生成的解决方案数量
+            batch_size: 每批插入的解决方案数量
+        """
+        self.generator = generator
+        self.language = language
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        
+        # 已提交但未处理完的题目ID（按提交顺序）与已处理完的题目ID
+        self._pending = deque()
+        self._settled = set()
+        self._buffer = []
+        self._flush_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        
+        self.generated = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+    
+    @property
+    def per_minute(self):
+        """本次运行每分钟回填的解决方案数量"""
+        elapsed = time.perf_counter() - self.started
+        return self.generated / elapsed * 60.0 if elapsed > 0 else 0.0
+    
+    async def run(self, page_size=200, limit=None):
+        """
+        从检查点开始回填
+        
+        Args:
+            page_size: 每次读取的题目数量
+            limit: 本次最多处理的题目数量
+        """
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        after_id = self.checkpoint["last_id"]
+        submitted = 0
+        while limit is None or submitted < limit:
+            page = await loop.run_in_executor(None, fetch_questions, self.language, after_id, page_size)
+            if not page:
+                break
+            for question in page:
+                if limit is not None and submitted >= limit:
+                    break
+                # 并发数已满时在此等待，读取与提交不会跑到生成前面太远
+                await self._semaphore.acquire()
+                self._pending.append(question["id"])
+                task = loop.create_task(self._process(question))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                submitted += 1
+            after_id = page[-1]["id"]
+        
+        if tasks:
+            await asyncio.gather(*tasks)
+        await self._flush()
+    
+    async def _process(self, question):
+        """
+        为一道题目生成解决方案
+        
+        Args:
+            question: 题目字典
+        """
+        try:
+            solution = await self.generator.generate_solution(question, self.language)
+        except Exception as e:
+            logger.error(f"题目 {question['id']} 生成解决方案出错: {str(e)}")
+            solution = None
+        finally:
+            self._semaphore.release()
+        
+        missing = self.generator.validate(solution=solution) if solution else ["solution"]
+        if missing:
+            logger.warning(f"题目 {question['id']} 生成解决方案失败: {missing}")
+            self._settle([question["id"]], failed=True)
+        else:
+            self._buffer.append((question["id"], solution))
+        
+        if len(self._buffer) >= self.batch_size:
+            await self._flush()
+        else:
+            self._advance()
+    
+    async def _flush(self):
+        """批量写入缓冲区中的解决方案，并更新检查点"""
+        async with self._flush_lock:
+            batch, self._buffer = self._buffer, []
+            question_ids = [question_id for question_id, _ in batch]
+            if batch:
+                try:
+                    count = await asyncio.get_running_loop().run_in_executor(None, insert_solutions, batch)
+                    self.generated += count
+                    self._settle(question_ids)
+                except Exception as e:
+                    logger.error(f"批量写入{len(batch)}个解决方案失败: {str(e)}")
+                    self._settle(question_ids, failed=True)
+                logger.info(
+                    f"已回填{self.generated}个解决方案，失败{self.failed}个，{self.per_minute:.1f}个/分钟"
+                )
+            self._advance()
+    
+    def _settle(self, question_ids, failed=False):
+        """
+        标记题目已处理完
+        
+        Args:
+            question_ids: 题目ID列表
+            failed: 是否失败
+        """
+        self._settled.update(question_ids)
+        if failed:
+            self.failed += len(question_ids)
+            self.checkpoint["failed_ids"].extend(question_ids)
+    
+    def _advance(self):
+        """检查点推进到之前题目都已处理完的最大题目ID"""
+        last_id = None
+        while self._pending and self._pending[0] in self._settled:
+            last_id = self._pending.popleft()
+            self._settled.discard(last_id)
+        if last_id is None:
+            return
+        self.checkpoint["last_id"] = last_id
+        save_checkpoint(self.checkpoint_path, {
+            **self.checkpoint,
+            "generated": self.checkpoint["generated"] + self.generated,
+            "failed": self.checkpoint["failed"] + self.failed
+        })
+
+
+def build_rate_limiter(args):
+    """
+    创建DeepSeek请求的令牌桶
+    
+    Args:
+        args: 命令行参数
+    
+    Returns:
+        TokenBucket: 令牌桶，--redis且Redis可用时为跨进程共享的令牌桶
+    """
+    rate = args.rate / 60.0
+    if args.redis:
+        redis_client = connect_redis(active_config.REDIS_HOST, active_config.REDIS_PORT, active_config.REDIS_DB)
+        if redis_client is not None:
+            return RedisTokenBucket(redis_client, args.limiter_key, rate, capacity=args.burst)
+        logger.warning("Redis不可用，使用进程内令牌桶")
+    return TokenBucket(rate, capacity=args.burst)
+
+
+async def backfill(args, checkpoint):
+    """
+    执行回填
+    
+    Args:
+        args: 命令行参数
+        checkpoint: 读取的检查点
+    
+    Returns:
+        tuple: 回填任务（包含本次统计）与DeepSeek调用统计
+    """
+    client = DeepSeekClient(
+        active_config.DEEPSEEK_API_KEY,
+        active_config.DEEPSEEK_API_URL,
+        max_connections=args.concurrency,
+        max_concurrency=args.concurrency,
+        timeout=active_config.DEEPSEEK_TIMEOUT,
+        max_retries=active_config.DEEPSEEK_MAX_RETRIES,
+        backoff_base=active_config.DEEPSEEK_BACKOFF_BASE,
+        backoff_max=active_config.DEEPSEEK_BACKOFF_MAX,
+        breaker=CircuitBreaker(
+            failure_threshold=active_config.DEEPSEEK_BREAKER_FAILURES,
+            reset_timeout=active_config.DEEPSEEK_BREAKER_RESET
+        ),
+        rate_limiter=build_rate_limiter(args)
+    )
+    if not client.enabled:
+        raise ValueError("未配置DEEPSEEK_API_KEY，无法生成解决方案")
+    
+    job = SolutionBackfill(
+        QuestionGenerator(client),
+        args.language,
+        args.checkpoint,
+        checkpoint,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size
+    )
+    try:
+        await job.run(page_size=args.page_size, limit=args.limit)
+    finally:
+        await client.close()
+    return job, client.stats()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="为没有解决方案的题目批量生成解决方案")
+    parser.add_argument("--language", type=str, default=None, help="解决方案的编程语言，只回填缺少该语言解决方案的题目")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时生成的解决方案数量")
+    parser.add_argument("--rate", type=float, default=60, help="每分钟最多发出的DeepSeek请求数（--redis时为所有进程合计）")
+    parser.add_argument("--burst", type=float, default=None, help="令牌桶容量（允许的突发请求数），默认等于并发数")
+    parser.add_argument("--redis", action="store_true", help="通过Redis与服务端及其他回填进程共享限流配额")
+    parser.add_argument("--limiter-key", type=str, default=active_config.DEEPSEEK_RATE_LIMIT_KEY, help="共享令牌桶在Redis中的键")
+    parser.add_argument("--batch-size", type=int, default=20, help="每批插入的解决方案数量")
+    parser.add_argument("--page-size", type=int, default=200, help="每次读取的题目数量")
+    parser.add_argument("--limit", type=int, default=None, help="本次最多处理的题目数量")
+    parser.add_argument("--checkpoint", type=str, default="data/solution_backfill.checkpoint.json", help="检查点路径")
+    parser.add_argument("--reset", action="store_true", help="忽略已有检查点，从头开始")
+    args = parser.parse_args()
+    if args.burst is None:
+        args.burst = float(args.concurrency)
+    
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    checkpoint = load_checkpoint(args.checkpoint, args.language)
+    if checkpoint["last_id"] is not None:
+        logger.info(f"从检查点继续：题目ID {checkpoint['last_id']} 之后，此前已回填{checkpoint['generated']}个")
+    
+    job, client_stats = asyncio.run(backfill(args, checkpoint))
+    elapsed = time.perf_counter() - job.started
+    logger.info(
+        f"回填完成: 生成{job.generated}个解决方案，失败{job.failed}个，耗时{elapsed:.1f}秒，"
+        f"{job.per_minute:.1f}个/分钟"
+    )
+    logger.info(f"DeepSeek调用统计: {json.dumps(client_stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+BM25倒排索引构建脚本，从索引包的元数据生成进程内精确匹配使用的倒排索引
+
+倒排索引写入索引包目录，应在发布索引包之前构建（vectorize.py默认只构建不发布），
+构建完成后使用--publish发布索引包。
+"""
+import os
+import sys
+import json
+import argparse
+import logging
+
+# 复用服务端的倒排索引格式与索引包布局（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from bm25 import write_bm25_index
+from bundle_layout import bundle_paths, list_versions, publish, prune
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_data(file_path):
+    """
+    加载数据
+    
+    Args:
+        file_path: 数据文件路径
+    
+    Returns:
+        list: 数据列表
+    """
+    logger.info(f"正在加载数据: {file_path}")
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    logger.info(f"数据加载成功，共{len(data)}条记录")
+    return data
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="KodCode数据集BM25倒排索引构建")
+    parser.add_argument("--bundle-root", type=str, default="data/bundles", help="索引包根目录")
+    parser.add_argument("--bundle", type=str, default=None, help="索引包版本，默认为最新构建的版本")
+    parser.add_argument("--k1", type=float, default=1.2, help="BM25词频饱和参数")
+    parser.add_argument("--b", type=float, default=0.75, help="BM25文档长度归一化参数")
+    parser.add_argument("--title-boost", type=float, default=2.0, help="标题词项权重")
+    parser.add_argument("--publish", action="store_true", help="构建完成后发布索引包")
+    parser.add_argument("--keep", type=int, default=2, help="发布后保留的索引包版本数量")
+    args = parser.parse_args()
+    
+    versions = list_versions(args.bundle_root)
+    version = args.bundle or (versions[-1] if versions else None)
+    if version is None:
+        logger.error(f"{args.bundle_root} 中没有索引包，请先运行vectorize.py")
+        return
+    paths = bundle_paths(os.path.join(args.bundle_root, version))
+    
+    # 元数据的顺序即FAISS行号
+    data = load_data(paths["metadata"])
+    if not data:
+        return
+    
+    logger.info(f"正在构建BM25倒排索引到 {paths['bm25']}")
+    manifest = write_bm25_index(data, paths["bm25"], k1=args.k1, b=args.b, title_boost=args.title_boost)
+    logger.info(
+        f"索引构建完成，文档数: {manifest['count']}，词项数: {manifest['num_terms']}，"
+        f"倒排记录数: {manifest['num_postings']}"
+    )
+    
+    # 发布：更新CURRENT，运行中的服务在后台加载新索引包并切换
+    if args.publish:
+        publish(args.bundle_root, version)
+        removed = prune(args.bundle_root, keep=args.keep)
+        logger.info(f"已发布索引包 {version}，清理旧版本: {removed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+增量合并脚本：将增量日志中的新题目与当前索引包合并，生成并发布新版本的索引包
+
+可由定时任务周期性执行。合并时先将日志改名，服务端随后写入的新题目进入新日志，
+已合并的题目在切换到新索引包前仍由各worker内存中的增量段提供检索。
+新索引包写入单独的版本目录，发布后运行中的服务在后台加载并切换，无需重启。
+新题目在写入时已同步到ES，新索引包沿用当前索引包的ES索引。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+import faiss
+
+# 复用服务端的存储格式与索引包布局（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from metadata_store import write_metadata_store
+from bm25 import write_bm25_index
+from bundle_layout import (
+    bundle_paths, corpus_hash, new_version, read_current, read_manifest, write_manifest, publish, prune
+)
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def read_delta_log(path):
+    """
+    读取增量日志中的完整条目
+    
+    Args:
+        path: 日志路径
+    
+    Returns:
+        list: (题目元数据, 向量)列表
+    """
+    entries = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.endswith(b"\n") and line.strip():
+                entry = json.loads(line)
+                entries.append((entry["record"], np.array(entry["vector"], dtype=np.float32)))
+    return entries
+
+
+def compact(bundle_root, delta_path, min_entries=1, settle_seconds=1.0, keep=2):
+    """
+    执行一次增量合并
+    
+    Args:
+        bundle_root: 索引包根目录
+        delta_path: 增量日志路径
+        min_entries: 日志条目少于该值时跳过合并
+        settle_seconds: 日志改名后等待正在进行的追加写完成的时间（秒）
+        keep: 发布后保留的索引包版本数量
+    
+    Returns:
+        int: 合并的题目数量
+    """
+    current = read_current(bundle_root)
+    if current is None:
+        raise FileNotFoundError(f"{bundle_root} 中没有已发布的索引包，请先运行vectorize.py")
+    compacting_path = f"{delta_path}.compacting"
+    
+    # 上次合并中断时留下的日志优先合并
+    if not os.path.exists(compacting_path):
+        if not os.path.exists(delta_path) or len(read_delta_log(delta_path)) < min_entries:
+            logger.info("增量日志条目不足，跳过合并")
+            return 0
+        os.rename(delta_path, compacting_path)
+        time.sleep(settle_seconds)
+    
+    entries = read_delta_log(compacting_path)
+    
+    # 加载当前索引包
+    source = bundle_paths(os.path.join(bundle_root, current))
+    with open(source["metadata"]) as f:
+        data = json.load(f)
+    embeddings = np.load(source["embeddings"])
+    index = faiss.read_index(source["index"])
+    if index.ntotal != len(data) or len(embeddings) != len(data):
+        raise ValueError(f"索引包数据不一致: 索引{index.ntotal}条，元数据{len(data)}条，嵌入向量{len(embeddings)}条")
+    
+    # 跳过已合并过的题目
+    existing_ids = {item["id"] for item in data}
+    new_records, new_vectors = [], []
+    for record, vector in entries:
+        if record["id"] not in existing_ids:
+            existing_ids.add(record["id"])
+            new_records.append(record)
+            new_vectors.append(vector)
+    
+    if new_records:
+        logger.info(f"正在合并{len(new_records)}道新题目，当前索引包 {current} 共{len(data)}条")
+        vectors = np.vstack(new_vectors).astype(np.float32)
+        data.extend(new_records)
+        embeddings = np.vstack([embeddings, vectors])
+        index.add(vectors)
+        
+        # 写入新版本的索引包目录
+        digest = corpus_hash(data)
+        version = new_version(digest)
+        bundle_dir = os.path.join(bundle_root, version)
+        target = bundle_paths(bundle_dir)
+        os.makedirs(bundle_dir, exist_ok=True)
+        with open(target["metadata"], "w") as f:
+            json.dump(data, f)
+        np.save(target["embeddings"], embeddings)
+        faiss.write_index(index, target["index"])
+        write_metadata_store(data, target["metadata_store"])
+        
+        bm25_manifest_path = os.path.join(source["bm25"], "bm25.json")
+        if os.path.exists(bm25_manifest_path):
+            with open(bm25_manifest_path) as f:
+                bm25_manifest = json.load(f)
+            write_bm25_index(
+                data, target["bm25"], k1=bm25_manifest["k1"], b=bm25_manifest["b"], title_boost=bm25_manifest["title_boost"]
+            )
+        
+        # 清单沿用当前索引包的索引参数与ES索引，更新版本、语料哈希与向量数量
+        manifest = read_manifest(os.path.join(bundle_root, current))
+        manifest.update({
+            "version": version,
+            "corpus_hash": digest,
+            "ntotal": int(index.ntotal),
+            "compacted_from": current
+        })
+        write_manifest(bundle_dir, manifest)
+        
+        publish(bundle_root, version)
+        removed = prune(bundle_root, keep=keep)
+        logger.info(f"已发布索引包 {version}，共{index.ntotal}条，清理旧版本: {removed}")
+    
+    os.remove(compacting_path)
+    return len(new_records)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="将增量日志合并进新版本的索引包")
+    parser.add_argument("--bundle-root", type=str, default="data/bundles", help="索引包根目录")
+    parser.add_argument("--delta-log", type=str, default="data/delta.jsonl", help="增量日志路径")
+    parser.add_argument("--min-entries", type=int, default=1, help="日志条目少于该值时跳过合并")
+    parser.add_argument("--keep", type=int, default=2, help="发布后保留的索引包版本数量")
+    args = parser.parse_args()
+    
+    compact(args.bundle_root, args.delta_log, args.min_entries, keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
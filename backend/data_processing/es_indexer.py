@@ -2,12 +2,19 @@
 Elasticsearch索引构建脚本
 """
 import os
+import sys
 import json
 import argparse
 import logging
+import numpy as np
 from tqdm import tqdm
 from elasticsearch import Elasticsearch, helpers
 
+# 复用服务端的ES字段定义与索引包布局（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from es_queries import VECTOR_FIELD
+from bundle_layout import bundle_paths, list_versions, read_manifest, write_manifest, publish, prune
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -41,13 +48,15 @@ def connect_elasticsearch(host="localhost", port=9200):
         return None
 
 
-def create_index(es, index_name="kodcode"):
+def create_index(es, index_name="kodcode", vector_dims=None, meta=None):
     """
     创建Elasticsearch索引
     
     Args:
         es: Elasticsearch客户端
         index_name: 索引名称
+        vector_dims: 嵌入向量维度，指定时添加dense_vector字段用于kNN检索
+        meta: 写入映射_meta的信息（索引包版本与语料哈希）
         
     Returns:
         bool: 是否创建成功
@@ -85,6 +94,18 @@ def create_index(es, index_name="kodcode"):
             }
         }
         
+        if meta:
+            mappings["mappings"]["_meta"] = meta
+        
+        # 嵌入向量已归一化，使用点积相似度（等价于余弦相似度）
+        if vector_dims:
+            mappings["mappings"]["properties"][VECTOR_FIELD] = {
+                "type": "dense_vector",
+                "dims": vector_dims,
+                "index": True,
+                "similarity": "dot_product"
+            }
+        
         # 创建索引
         logger.info(f"正在创建索引: {index_name}")
         es.indices.create(index=index_name, body=mappings)
@@ -116,12 +137,37 @@ def load_data(file_path):
         return []
 
 
-def prepare_documents(data):
+def load_embeddings(file_path, count):
+    """
+    加载vectorize.py生成的嵌入向量
+    
+    Args:
+        file_path: 嵌入向量文件路径
+        count: 数据条数，行数必须与之一致
+        
+    Returns:
+        np.ndarray: 嵌入向量（mmap），加载失败返回None
+    """
+    try:
+        logger.info(f"正在加载嵌入向量: {file_path}")
+        embeddings = np.load(file_path, mmap_mode="r")
+    except Exception as e:
+        logger.error(f"嵌入向量加载失败: {str(e)}")
+        return None
+    
+    if len(embeddings) != count:
+        logger.error(f"嵌入向量行数({len(embeddings)})与数据条数({count})不一致")
+        return None
+    return embeddings
+
+
+def prepare_documents(data, embeddings=None):
     """
     准备文档
     
     Args:
         data: 原始数据
+        embeddings: 与data一一对应的嵌入向量，指定时写入dense_vector字段
         
     Returns:
         list: 处理后的文档列表
@@ -129,18 +175,18 @@ def prepare_documents(data):
     logger.info("正在准备文档...")
     documents = []
     
-    for item in data:
+    for i, item in enumerate(data):
         # 提取标签
         tags = item.get("tags", [])
         
-        # 提取数据结构和算法
-        data_structure = None
-        algorithm = None
+        # 提取数据结构和算法（优先使用预处理阶段保留的字段）
+        data_structure = item.get("data_structure")
+        algorithm = item.get("algorithm")
         
         for tag in tags:
-            if tag in ["Array", "LinkedList", "Stack", "Queue", "HashMap", "Tree", "Graph", "String"]:
+            if data_structure is None and tag in ["Array", "LinkedList", "Stack", "Queue", "HashMap", "Tree", "Graph", "String"]:
                 data_structure = tag
-            elif tag in ["Recursion", "DynamicProgramming", "Greedy", "DFS", "BFS", "Sorting"]:
+            elif algorithm is None and tag in ["Recursion", "DynamicProgramming", "Greedy", "DFS", "BFS", "Sorting"]:
                 algorithm = tag
         
         # 构建文档
@@ -153,6 +199,8 @@ def prepare_documents(data):
             "data_structure": data_structure,
             "algorithm": algorithm
         }
+        if embeddings is not None:
+            doc[VECTOR_FIELD] = np.asarray(embeddings[i], dtype=np.float32).tolist()
         
         documents.append(doc)
     
@@ -201,39 +249,117 @@ def index_documents(es, documents, index_name="kodcode", batch_size=1000):
         return 0
 
 
+def switch_alias(es, alias, index_name):
+    """
+    原子地将别名切换到新索引
+    
+    Args:
+        es: Elasticsearch客户端
+        alias: 别名
+        index_name: 新索引名称
+    """
+    actions = []
+    if es.indices.exists_alias(name=alias):
+        for old_index in es.indices.get_alias(name=alias):
+            actions.append({"remove": {"index": old_index, "alias": alias}})
+    elif es.indices.exists(index=alias):
+        # 旧版本直接以别名创建的索引，需在同一操作中删除
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": index_name, "alias": alias}})
+    es.indices.update_aliases(actions=actions)
+    logger.info(f"别名 {alias} 已切换到 {index_name}")
+
+
+def prune_indices(es, alias, keep=2):
+    """
+    删除旧的版本化索引，保留最新的keep个以及别名指向的索引
+    
+    Args:
+        es: Elasticsearch客户端
+        alias: 别名
+        keep: 保留的索引数量
+    """
+    indices = sorted(es.indices.get(index=f"{alias}_*"))
+    aliased = set(es.indices.get_alias(name=alias)) if es.indices.exists_alias(name=alias) else set()
+    for index_name in indices[:max(len(indices) - keep, 0)]:
+        if index_name not in aliased:
+            es.indices.delete(index=index_name)
+            logger.info(f"已删除旧索引 {index_name}")
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="KodCode数据集Elasticsearch索引构建")
-    parser.add_argument("--data", type=str, default="data/metadata.json", help="数据文件路径")
+    parser.add_argument("--bundle-root", type=str, default="data/bundles", help="索引包根目录")
+    parser.add_argument("--bundle", type=str, default=None, help="索引包版本，默认为最新构建的版本")
     parser.add_argument("--host", type=str, default="localhost", help="Elasticsearch主机地址")
     parser.add_argument("--port", type=int, default=9200, help="Elasticsearch端口号")
-    parser.add_argument("--index", type=str, default="kodcode", help="索引名称")
+    parser.add_argument("--index", type=str, default="kodcode", help="索引别名，实际索引名为<别名>_<索引包版本>")
     parser.add_argument("--batch-size", type=int, default=1000, help="批处理大小")
+    parser.add_argument("--with-vectors", action="store_true", help="写入dense_vector字段，用于SEARCH_BACKEND=es_knn")
+    parser.add_argument("--no-publish", action="store_true", help="构建完成后不发布索引包")
+    parser.add_argument("--keep", type=int, default=2, help="保留的版本化ES索引与索引包数量")
     args = parser.parse_args()
     
+    # 与索引包使用同一份语料，ES索引名带索引包版本
+    versions = list_versions(args.bundle_root)
+    version = args.bundle or (versions[-1] if versions else None)
+    if version is None:
+        logger.error(f"{args.bundle_root} 中没有索引包，请先运行vectorize.py")
+        return
+    bundle_dir = os.path.join(args.bundle_root, version)
+    paths = bundle_paths(bundle_dir)
+    manifest = read_manifest(bundle_dir)
+    index_name = f"{args.index}_{version}"
+    
     try:
         # 连接Elasticsearch
         es = connect_elasticsearch(args.host, args.port)
         if not es:
             return
         
-        # 创建索引
-        if not create_index(es, args.index):
-            return
-        
         # 加载数据
-        data = load_data(args.data)
+        data = load_data(paths["metadata"])
         if not data:
             return
         
+        # 加载嵌入向量（行顺序与metadata.json一致）
+        embeddings = None
+        if args.with_vectors:
+            embeddings = load_embeddings(paths["embeddings"], len(data))
+            if embeddings is None:
+                return
+        
+        # 创建索引
+        meta = {"bundle_version": version, "corpus_hash": manifest.get("corpus_hash")}
+        if not create_index(
+            es, index_name, vector_dims=embeddings.shape[1] if embeddings is not None else None, meta=meta
+        ):
+            return
+        
         # 准备文档
-        documents = prepare_documents(data)
+        documents = prepare_documents(data, embeddings)
         
         # 索引文档
-        success_count = index_documents(es, documents, args.index, args.batch_size)
+        success_count = index_documents(es, documents, index_name, args.batch_size)
+        if success_count != len(documents):
+            logger.error(f"部分文档索引失败（{success_count}/{len(documents)}），不切换别名")
+            return
         
         logger.info(f"索引构建完成，成功索引{success_count}条文档")
         
+        # 索引包记录对应的ES索引，服务端切换索引包时同时切换ES索引
+        es.indices.refresh(index=index_name)
+        manifest["es_index"] = index_name
+        write_manifest(bundle_dir, manifest)
+        switch_alias(es, args.index, index_name)
+        prune_indices(es, args.index, keep=args.keep)
+        
+        if not args.no_publish:
+            publish(args.bundle_root, version)
+            removed = prune(args.bundle_root, keep=args.keep)
+            logger.info(f"已发布索引包 {version}，清理旧版本: {removed}")
+        
     except Exception as e:
         logger.error(f"处理失败: {str(e)}")
         raise
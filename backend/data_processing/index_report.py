@@ -0,0 +1,257 @@
+"""
+FAISS索引评估模块：对比精确检索计算召回率，并统计查询延迟与索引大小
+"""
+import os
+import time
+import logging
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def sample_queries(embeddings, num_queries=1000, seed=42):
+    """
+    从语料中抽取评估查询
+    
+    Args:
+        embeddings: 归一化的嵌入向量
+        num_queries: 查询数量
+        seed: 随机种子
+    
+    Returns:
+        np.ndarray: 被抽中的行号
+    """
+    rng = np.random.default_rng(seed)
+    num_queries = min(num_queries, len(embeddings))
+    return np.sort(rng.choice(len(embeddings), size=num_queries, replace=False))
+
+
+def exact_neighbors(embeddings, query_rows, k=10, chunk_size=50000):
+    """
+    分块暴力计算精确内积近邻（排除查询自身）
+    
+    Args:
+        embeddings: 归一化的嵌入向量
+        query_rows: 查询行号
+        k: 近邻数量
+        chunk_size: 每块处理的语料行数
+    
+    Returns:
+        np.ndarray: 形状为(len(query_rows), k)的近邻行号
+    """
+    queries = np.ascontiguousarray(embeddings[query_rows], dtype=np.float32)
+    best_scores = np.full((len(query_rows), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(query_rows), k), -1, dtype=np.int64)
+    
+    for start in range(0, len(embeddings), chunk_size):
+        chunk = np.asarray(embeddings[start:start + chunk_size], dtype=np.float32)
+        scores = queries @ chunk.T
+        
+        # 排除查询自身
+        in_chunk = (query_rows >= start) & (query_rows < start + len(chunk))
+        scores[np.flatnonzero(in_chunk), query_rows[in_chunk] - start] = -np.inf
+        
+        # 与已有候选合并后保留前k个
+        ids = np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def search_excluding_self(index, queries, query_rows, k=10, params=None):
+    """
+    检索近邻并排除查询自身
+    
+    Args:
+        index: FAISS索引
+        queries: 查询向量
+        query_rows: 查询行号
+        k: 近邻数量
+        params: FAISS检索参数
+    
+    Returns:
+        np.ndarray: 形状为(len(query_rows), k)的近邻行号
+    """
+    _, ids = index.search(queries, k + 1, params=params) if params is not None else index.search(queries, k + 1)
+    results = np.full((len(query_rows), k), -1, dtype=np.int64)
+    for i, (row, row_ids) in enumerate(zip(query_rows, ids)):
+        row_ids = row_ids[row_ids != row][:k]
+        results[i, :len(row_ids)] = row_ids
+    return results
+
+
+def recall_at_k(approx_ids, exact_ids):
+    """
+    计算recall@k
+    
+    Args:
+        approx_ids: 近似检索结果
+        exact_ids: 精确检索结果
+    
+    Returns:
+        float: 平均召回率
+    """
+    hits = [
+        len(np.intersect1d(approx[approx >= 0], exact[exact >= 0])) / max((exact >= 0).sum(), 1)
+        for approx, exact in zip(approx_ids, exact_ids)
+    ]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def measure_latency(index, queries, k=10, params=None):
+    """
+    逐条查询测量延迟
+    
+    Args:
+        index: FAISS索引
+        queries: 查询向量
+        k: 近邻数量
+        params: FAISS检索参数
+    
+    Returns:
+        dict: p50/p99/平均延迟（毫秒）
+    """
+    latencies = []
+    for query in queries:
+        query = query.reshape(1, -1)
+        started = time.perf_counter()
+        if params is not None:
+            index.search(query, k, params=params)
+        else:
+            index.search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+    latencies = np.array(latencies)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean())
+    }
+
+
+def evaluate_index(index, embeddings, index_path=None, num_queries=1000, k=10):
+    """
+    评估索引的召回率、查询延迟与磁盘大小
+    
+    Args:
+        index: 已构建的FAISS索引
+        embeddings: 归一化的嵌入向量（构建索引所用语料）
+        index_path: 已保存的索引文件路径，用于统计磁盘大小
+        num_queries: 评估查询数量
+        k: 近邻数量
+    
+    Returns:
+        dict: 评估报告
+    """
+    logger.info(f"正在评估索引，查询数量: {num_queries}，k={k}")
+    query_rows = sample_queries(embeddings, num_queries)
+    queries = np.ascontiguousarray(embeddings[query_rows], dtype=np.float32)
+    
+    exact_ids = exact_neighbors(embeddings, query_rows, k)
+    approx_ids = search_excluding_self(index, queries, query_rows, k)
+    
+    report = {
+        "num_queries": int(len(query_rows)),
+        "k": k,
+        f"recall@{k}": recall_at_k(approx_ids, exact_ids),
+        "latency": measure_latency(index, queries, k),
+        "ntotal": int(index.ntotal),
+        "raw_vectors_mb": float(embeddings.nbytes / 1024 / 1024)
+    }
+    if index_path and os.path.exists(index_path):
+        report["size_on_disk_mb"] = float(os.path.getsize(index_path) / 1024 / 1024)
+    
+    logger.info(
+        f"recall@{k}: {report[f'recall@{k}']:.4f}, "
+        f"p50: {report['latency']['p50_ms']:.2f} ms, p99: {report['latency']['p99_ms']:.2f} ms, "
+        f"磁盘大小: {report.get('size_on_disk_mb', 0):.1f} MB"
+    )
+    return report
+
+
+def choose_nlist(num_vectors):
+    """
+    根据语料规模选择IVF倒排列表数量
+    
+    取约4*sqrt(N)并向上取整到2的幂，同时保证每个列表至少有39个训练样本（FAISS的最低要求）。
+    
+    Args:
+        num_vectors: 向量数量
+        
+    Returns:
+        int: 倒排列表数量
+    """
+    target = 4 * np.sqrt(max(num_vectors, 1))
+    nlist = int(2 ** np.ceil(np.log2(target)))
+    return int(max(1, min(nlist, num_vectors // 39)))
+
+
+def tune_nprobe(index, embeddings, target_recall=0.95, num_queries=1000, k=10, seed=7):
+    """
+    扫描nprobe，找到达到目标召回率的最小值
+    
+    调优查询是从语料中抽取的行（已在索引中），检索时排除查询行自身，与evaluate_index的口径一致。
+    先按2的幂倍增找到第一个达标的值，再在最后一个未达标值与该值之间二分查找最小的达标值。
+    
+    Args:
+        index: 已训练并添加向量的IVF索引
+        embeddings: 归一化的嵌入向量
+        target_recall: 目标recall@k
+        num_queries: 调优查询数量（与评估报告使用不同的随机种子）
+        k: 近邻数量
+        seed: 随机种子
+        
+    Returns:
+        dict: 选中的nprobe及扫描记录
+    """
+    ivf = faiss.extract_index_ivf(index)
+    query_rows = sample_queries(embeddings, num_queries, seed=seed)
+    queries = np.ascontiguousarray(embeddings[query_rows], dtype=np.float32)
+    exact_ids = exact_neighbors(embeddings, query_rows, k)
+    
+    sweep = []
+    
+    def probe(nprobe):
+        params = faiss.SearchParametersIVF(nprobe=nprobe)
+        recall = recall_at_k(search_excluding_self(index, queries, query_rows, k, params=params), exact_ids)
+        latency = measure_latency(index, queries[:200], k, params=params)
+        sweep.append({"nprobe": nprobe, f"recall@{k}": recall, "p50_ms": latency["p50_ms"], "p99_ms": latency["p99_ms"]})
+        logger.info(f"nprobe={nprobe}: recall@{k}={recall:.4f}, p99={latency['p99_ms']:.2f} ms")
+        return recall >= target_recall
+    
+    # 倍增：找到第一个达标的nprobe
+    failing, passing = 0, None
+    nprobe = 1
+    while True:
+        if probe(nprobe):
+            passing = nprobe
+            break
+        failing = nprobe
+        if nprobe >= ivf.nlist:
+            logger.warning(f"nprobe达到nlist仍未达到目标召回率{target_recall}")
+            break
+        nprobe = min(nprobe * 2, ivf.nlist)
+    
+    # 二分：在(failing, passing]之间找到最小的达标值
+    if passing is not None:
+        while passing - failing > 1:
+            middle = (failing + passing) // 2
+            if probe(middle):
+                passing = middle
+            else:
+                failing = middle
+    
+    return {
+        "nprobe": int(passing if passing is not None else ivf.nlist),
+        "target_recall": target_recall,
+        "reached_target": passing is not None,
+        "num_queries": int(len(query_rows)),
+        "query_source": "corpus_rows_excluding_self",
+        "sweep": sorted(sweep, key=lambda item: item["nprobe"])
+    }
@@ -0,0 +1,406 @@
+"""
+覆盖缺口预生成脚本：统计 难度×数据结构×算法技术 网格中每个格子的题目数量，
+为题目不足的格子离线预生成题目与解决方案，校验通过后写入增量索引与数据库
+
+计数直接读取当前索引包的列式元数据存储与增量日志，不加载嵌入模型，--dry-run只输出覆盖报告。
+生成阶段以信号量限制同时生成的格子数，以令牌桶限制DeepSeek请求速率（重试与分步补充的请求同样计入），
+新题目进入增量日志，由compact_delta.py合并进下一版本的索引包。
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from itertools import product
+
+# 复用服务端的配置、生成器与持久化逻辑
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.config import active_config
+from app.database import SessionLocal
+from app.core.deepseek_client import DeepSeekClient, CircuitBreaker
+from app.core.rate_limit import TokenBucket
+from app.core.NLP.deepseek_nlp import QueryParser
+from app.core.generation.deepseek_generation import QuestionGenerator
+from app.core.generation.dedup import DuplicateGate
+from app.core.generation.persistence import save_generated
+from app.core.matching.metadata_store import MetadataStore
+from app.core.matching.bundle_layout import bundle_paths, read_current
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# 网格维度对应的元数据存储字段（算法技术存储在algorithm字段）
+GRID_FIELDS = ("difficulty", "data_structure", "algorithm")
+
+
+def taxonomy_labels(mapping):
+    """
+    从查询解析器的映射表中取出分类值及其中文名称（每个分类值取第一个中文别名）
+    
+    Args:
+        mapping: 中文/英文关键词到分类值的映射
+    
+    Returns:
+        dict: 分类值到中文名称的映射
+    """
+    labels = {}
+    for keyword, value in mapping.items():
+        if value not in labels or (labels[value].isascii() and not keyword.isascii()):
+            labels[value] = keyword
+    return labels
+
+
+def count_cells(bundle_root, delta_path):
+    """
+    统计当前索引包与增量日志中各取值组合的题目数量
+    
+    Args:
+        bundle_root: 索引包根目录
+        delta_path: 增量日志路径
+    
+    Returns:
+        dict: (难度, 数据结构, 算法技术)到题目数量的映射
+    """
+    current = read_current(bundle_root)
+    if current is None:
+        raise FileNotFoundError(f"{bundle_root} 中没有已发布的索引包，请先运行vectorize.py")
+    store = MetadataStore(bundle_paths(os.path.join(bundle_root, current))["metadata_store"])
+    counts = store.value_counts(list(GRID_FIELDS))
+    logger.info(f"索引包 {current} 共{len(store)}道题目")
+    
+    # 尚未合并的新题目
+    delta_count = 0
+    if os.path.exists(delta_path):
+        with open(delta_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n") or not line.strip():
+                    continue
+                record = json.loads(line)["record"]
+                key = tuple(str(record[field]) if record.get(field) else None for field in GRID_FIELDS)
+                counts[key] = counts.get(key, 0) + 1
+                delta_count += 1
+    logger.info(f"增量日志中未合并的题目{delta_count}道")
+    return counts
+
+
+def find_gaps(counts, min_count, max_per_cell):
+    """
+    找出题目数量不足的格子
+    
+    Args:
+        counts: 取值组合到题目数量的映射
+        min_count: 每个格子的目标题目数量
+        max_per_cell: 每个格子本次最多生成的题目数量
+    
+    Returns:
+        list: 格子信息（难度、数据结构、算法技术、现有数量、待生成数量），按现有数量升序
+    """
+    cells = []
+    for difficulty, data_structure, technique in product(
+        sorted(set(QueryParser.DIFFICULTY_MAP.values())),
+        sorted(set(QueryParser.DATA_STRUCTURE_MAP.values())),
+        sorted(set(QueryParser.TECHNIQUE_MAP.values()))
+    ):
+        count = counts.get((difficulty, data_structure, technique), 0)
+        cells.append({
+            "difficulty": difficulty,
+            "data_structure": data_structure,
+            "technique": technique,
+            "count": count,
+            "target": min(max(min_count - count, 0), max_per_cell)
+        })
+    return sorted((cell for cell in cells if cell["target"] > 0), key=lambda cell: cell["count"])
+
+
+def build_query(cell, labels, exclude_titles):
+    """
+    构建格子的生成查询
+    
+    Args:
+        cell: 格子信息
+        labels: 各维度分类值到中文名称的映射
+        exclude_titles: 本格子已生成的题目标题，要求新题目与之不同
+    
+    Returns:
+        str: 生成查询
+    """
+    query = (
+        f"{labels['difficulty'][cell['difficulty']]}难度的"
+        f"{labels['data_structure'][cell['data_structure']]}"
+        f"{labels['technique'][cell['technique']]}题目"
+    )
+    if exclude_titles:
+        query += f"，不要与以下题目重复：{'、'.join(exclude_titles)}"
+    return query
+
+
+def sandbox_check(sandbox, solution):
+    """
+    在沙箱中运行解决方案的测试用例
+    
+    Args:
+        sandbox: Docker沙箱
+        solution: 生成的解决方案
+    
+    Returns:
+        str: 未通过的原因，全部通过时返回None
+    """
+    test_cases = [
+        {
+            "input": case.get("input", ""),
+            "output": case.get("expected_output", case.get("output", ""))
+        }
+        for case in solution["test_cases"]
+    ]
+    for case in test_cases:
+        for key, value in case.items():
+            if not isinstance(value, str):
+                case[key] = json.dumps(value, ensure_ascii=False)
+    result = sandbox.execute_code(solution["solution_code"], solution.get("language") or "python", test_cases)
+    if not result.get("success"):
+        return f"沙箱执行失败: {result.get('error')}"
+    if result["passed"] != result["total"]:
+        return f"测试用例未全部通过: {result['passed']}/{result['total']}"
+    return None
+
+
+def verify(generator, cell, question, solution, sandbox=None):
+    """
+    校验生成结果：必需字段、难度与格子一致、测试用例完整，可选在沙箱中运行测试用例
+    
+    Args:
+        generator: 题目生成器
+        cell: 格子信息
+        question: 生成的题目
+        solution: 生成的解决方案
+        sandbox: Docker沙箱，为None时跳过运行
+    
+    Returns:
+        str: 未通过的原因，通过时返回None
+    """
+    missing = generator.validate(question, solution)
+    if missing:
+        return f"缺少字段: {missing}"
+    if question["difficulty"].strip().lower() != cell["difficulty"].lower():
+        return f"难度不符: {question['difficulty']}"
+    for case in solution["test_cases"]:
+        if not isinstance(case, dict) or "input" not in case or (
+            "expected_output" not in case and "output" not in case
+        ):
+            return f"测试用例不完整: {case}"
+    if sandbox is not None:
+        return sandbox_check(sandbox, solution)
+    return None
+
+
+def persist(question, solution):
+    """
+    保存生成的题目与解决方案
+    
+    Args:
+        question: 生成的题目
+        solution: 生成的解决方案
+    """
+    db = SessionLocal()
+    try:
+        save_generated(db, question, solution)
+    finally:
+        db.close()
+
+
+async def fill_cell(cell, labels, generator, search_engine, duplicate_gate, semaphore, sandbox=None):
+    """
+    为一个格子生成题目，格子内依次生成，后一题要求与前面的题目不重复
+    
+    Args:
+        cell: 格子信息，生成结果计入其中
+        labels: 各维度分类值到中文名称的映射
+        generator: 题目生成器
+        search_engine: 混合检索引擎
+        duplicate_gate: 近重复检测，与已有题目重复的生成结果丢弃
+        semaphore: 限制同时生成的格子数
+        sandbox: Docker沙箱，为None时跳过运行测试用例
+    """
+    loop = asyncio.get_running_loop()
+    cell.update({"generated": 0, "rejected": 0, "duplicates": 0, "failed": 0, "question_ids": []})
+    titles = []
+    async with semaphore:
+        for _ in range(cell["target"]):
+            query = build_query(cell, labels, titles)
+            intent = {
+                "difficulty": cell["difficulty"],
+                "data_structure": cell["data_structure"],
+                "technique": cell["technique"],
+                "original_query": query
+            }
+            question, solution = await generator.generate(query, intent)
+            if not question or not solution:
+                cell["failed"] += 1
+                continue
+            
+            reason = await loop.run_in_executor(None, verify, generator, cell, question, solution, sandbox)
+            if reason is not None:
+                logger.warning(f"{cell['difficulty']}/{cell['data_structure']}/{cell['technique']} 校验未通过: {reason}")
+                cell["rejected"] += 1
+                continue
+            
+            duplicate, vector = await loop.run_in_executor(None, duplicate_gate.check, question)
+            if duplicate is not None:
+                titles.append(question["title"])
+                cell["duplicates"] += 1
+                continue
+            
+            # 写入格子的分类值，使新题目计入该格子
+            question["difficulty"] = cell["difficulty"]
+            question["data_structure"] = cell["data_structure"]
+            question["algorithm"] = cell["technique"]
+            # 先保存到数据库，成功后再写入索引并登记到去重缓冲区
+            question["id"] = search_engine.new_question_id()
+            try:
+                await loop.run_in_executor(None, persist, question, solution)
+                question_id = await loop.run_in_executor(
+                    None, search_engine.add_question, question, intent, vector, question["id"]
+                )
+                duplicate_gate.admit(question, vector)
+            except Exception as e:
+                logger.error(f"保存生成题目失败: {str(e)}")
+                cell["failed"] += 1
+                continue
+            
+            titles.append(question["title"])
+            cell["question_ids"].append(question_id)
+            cell["generated"] += 1
+
+
+async def pregenerate(gaps, args):
+    """
+    为覆盖不足的格子预生成题目
+    
+    Args:
+        gaps: 待生成的格子
+        args: 命令行参数
+    
+    Returns:
+        dict: 生成统计
+    """
+    from app.core.matching.hybrid_search import HybridSearchEngine
+    
+    client = DeepSeekClient(
+        active_config.DEEPSEEK_API_KEY,
+        active_config.DEEPSEEK_API_URL,
+        max_connections=args.concurrency,
+        max_concurrency=args.concurrency,
+        timeout=active_config.DEEPSEEK_TIMEOUT,
+        max_retries=active_config.DEEPSEEK_MAX_RETRIES,
+        backoff_base=active_config.DEEPSEEK_BACKOFF_BASE,
+        backoff_max=active_config.DEEPSEEK_BACKOFF_MAX,
+        breaker=CircuitBreaker(
+            failure_threshold=active_config.DEEPSEEK_BREAKER_FAILURES,
+            reset_timeout=active_config.DEEPSEEK_BREAKER_RESET
+        ),
+        rate_limiter=TokenBucket(args.rate / 60.0, capacity=args.burst)
+    )
+    if not client.enabled:
+        raise ValueError("未配置DEEPSEEK_API_KEY，无法生成题目")
+    generator = QuestionGenerator(client, mode=active_config.GENERATION_MODE)
+    
+    loop = asyncio.get_running_loop()
+    search_engine = await loop.run_in_executor(None, HybridSearchEngine)
+    duplicate_gate = DuplicateGate(
+        search_engine,
+        threshold=active_config.GENERATION_DEDUP_THRESHOLD,
+        buffer_size=active_config.GENERATION_DEDUP_BUFFER
+    )
+    sandbox = None
+    if args.sandbox:
+        from app.core.validation.docker_sandbox import DockerSandbox
+        sandbox = DockerSandbox()
+    
+    labels = {
+        "difficulty": taxonomy_labels(QueryParser.DIFFICULTY_MAP),
+        "data_structure": taxonomy_labels(QueryParser.DATA_STRUCTURE_MAP),
+        "technique": taxonomy_labels(QueryParser.TECHNIQUE_MAP)
+    }
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            fill_cell(cell, labels, generator, search_engine, duplicate_gate, semaphore, sandbox) for cell in gaps
+        ))
+    finally:
+        await client.close()
+    elapsed = time.perf_counter() - started
+    
+    generated = sum(cell["generated"] for cell in gaps)
+    return {
+        "generated": generated,
+        "rejected": sum(cell["rejected"] for cell in gaps),
+        "duplicates": sum(cell["duplicates"] for cell in gaps),
+        "failed": sum(cell["failed"] for cell in gaps),
+        "elapsed_seconds": elapsed,
+        "questions_per_minute": generated / elapsed * 60.0 if elapsed > 0 else 0.0,
+        "client": client.stats(),
+        "generator": generator.stats(),
+        "dedup": duplicate_gate.stats()
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="统计题目覆盖缺口并为不足的格子预生成题目")
+    parser.add_argument("--bundle-root", type=str, default=active_config.INDEX_BUNDLE_ROOT, help="索引包根目录")
+    parser.add_argument("--delta-log", type=str, default=active_config.DELTA_LOG_PATH, help="增量日志路径")
+    parser.add_argument("--min-count", type=int, default=3, help="每个格子的目标题目数量")
+    parser.add_argument("--max-per-cell", type=int, default=3, help="每个格子本次最多生成的题目数量")
+    parser.add_argument("--limit", type=int, default=None, help="本次最多生成的题目总数")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时生成的格子数")
+    parser.add_argument("--rate", type=float, default=60, help="每分钟最多发出的DeepSeek请求数")
+    parser.add_argument("--burst", type=float, default=None, help="令牌桶容量（允许的突发请求数），默认等于并发数")
+    parser.add_argument("--sandbox", action="store_true", help="在Docker沙箱中运行测试用例，未全部通过的题目丢弃")
+    parser.add_argument("--dry-run", action="store_true", help="只输出覆盖报告，不生成题目")
+    parser.add_argument("--report", type=str, default=None, help="覆盖报告输出路径（JSON）")
+    args = parser.parse_args()
+    if args.burst is None:
+        args.burst = float(args.concurrency)
+    
+    counts = count_cells(args.bundle_root, args.delta_log)
+    gaps = find_gaps(counts, args.min_count, args.max_per_cell)
+    if args.limit is not None:
+        # 优先补齐题目最少的格子
+        remaining = args.limit
+        for cell in gaps:
+            cell["target"] = min(cell["target"], remaining)
+            remaining -= cell["target"]
+        gaps = [cell for cell in gaps if cell["target"] > 0]
+    
+    empty = sum(1 for cell in gaps if cell["count"] == 0)
+    logger.info(
+        f"共{len(gaps)}个格子题目少于{args.min_count}道（其中{empty}个没有题目），"
+        f"计划生成{sum(cell['target'] for cell in gaps)}道"
+    )
+    
+    report = {"min_count": args.min_count, "cells": gaps}
+    if not args.dry_run and gaps:
+        summary = asyncio.run(pregenerate(gaps, args))
+        report["summary"] = summary
+        logger.info(
+            f"生成完成: 通过{summary['generated']}道，校验未通过{summary['rejected']}道，"
+            f"与已有题目重复{summary['duplicates']}道，"
+            f"失败{summary['failed']}道，耗时{summary['elapsed_seconds']:.1f}秒"
+            f"（{summary['questions_per_minute']:.1f}道/分钟）"
+        )
+    
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"覆盖报告已写入 {args.report}")
+
+
+if __name__ == "__main__":
+    main()
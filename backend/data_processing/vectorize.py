@@ -2,6 +2,7 @@
 向量化处理脚本，用于生成FAISS向量数据
 """
 import os
+import sys
 import json
 import numpy as np
 import pandas as pd
@@ -12,6 +13,15 @@ from datasets import load_dataset
 import argparse
 import logging
 
+# 复用服务端的元数据存储格式与索引包布局（直接引用模块文件，避免初始化整个app包）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from metadata_store import write_metadata_store
+from bundle_layout import (
+    INDEX_FILE, METADATA_FILE, METADATA_STORE_DIR, EMBEDDINGS_FILE,
+    corpus_hash, new_version, write_manifest, publish, prune
+)
+from index_report import evaluate_index, choose_nlist, tune_nprobe
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -64,10 +74,14 @@ def preprocess_data(df):
     for _, row in tqdm(df.iterrows(), total=len(df)):
         # 提取标签
         tags = []
+        data_structure = None
+        algorithm = None
         if "data_structure" in row and row["data_structure"]:
-            tags.append(row["data_structure"])
+            data_structure = row["data_structure"]
+            tags.append(data_structure)
         if "algorithm" in row and row["algorithm"]:
-            tags.append(row["algorithm"])
+            algorithm = row["algorithm"]
+            tags.append(algorithm)
         
         # 合并文本用于向量化
         search_text = " ".join([
@@ -89,6 +103,8 @@ def preprocess_data(df):
             "description": row.get("description", ""),
             "difficulty": difficulty,
             "tags": tags,
+            "data_structure": data_structure,
+            "algorithm": algorithm,
             "text": search_text
         })
     
@@ -125,13 +141,44 @@ def generate_embeddings(data, model_name="sentence-transformers/all-mpnet-base-v
     return embeddings
 
 
-def build_faiss_index(embeddings, index_type="IVF100,Flat"):
+# 可选的索引类型及其FAISS工厂字符串模板
+INDEX_TYPES = {
+    "flat": "Flat",
+    "ivf-flat": "IVF{nlist},Flat",
+    "hnsw": "HNSW{hnsw_m}",
+    "ivf-pq": "IVF{nlist},PQ{pq_m}",
+    "ivf-sq8": "IVF{nlist},SQ8",
+    "opq-ivf-pq": "OPQ{pq_m}_{dim},IVF{nlist},PQ{pq_m}",
+}
+
+
+def index_factory_string(index_type, dim, nlist=100, pq_m=64, hnsw_m=32):
+    """
+    生成FAISS工厂字符串
+    
+    Args:
+        index_type: 索引类型（INDEX_TYPES中的键）
+        dim: 向量维度
+        nlist: IVF倒排列表数量
+        pq_m: PQ子量化器数量（需整除向量维度）
+        hnsw_m: HNSW每个节点的邻居数
+        
+    Returns:
+        str: FAISS工厂字符串
+    """
+    if "PQ" in INDEX_TYPES[index_type] and dim % pq_m != 0:
+        raise ValueError(f"PQ子量化器数量{pq_m}必须整除向量维度{dim}")
+    return INDEX_TYPES[index_type].format(nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m, dim=dim)
+
+
+def build_faiss_index(embeddings, index_type="IVF100,Flat", hnsw_ef_search=64):
     """
     构建FAISS索引
     
     Args:
         embeddings: 嵌入向量
-        index_type: 索引类型
+        index_type: 索引类型（FAISS工厂字符串）
+        hnsw_ef_search: HNSW检索时的候选队列长度
         
     Returns:
         faiss.Index: FAISS索引
@@ -147,8 +194,8 @@ def build_faiss_index(embeddings, index_type="IVF100,Flat"):
     # 归一化向量
     faiss.normalize_L2(embeddings)
     
-    # 训练索引（对于IVF类型的索引需要训练）
-    if "IVF" in index_type:
+    # 训练索引（IVF、PQ、OPQ、SQ等类型需要训练）
+    if not index.is_trained:
         logger.info("正在训练索引...")
         index.train(embeddings)
     
@@ -156,6 +203,10 @@ def build_faiss_index(embeddings, index_type="IVF100,Flat"):
     logger.info("正在添加向量到索引...")
     index.add(embeddings)
     
+    # HNSW检索参数随索引一起保存
+    if "HNSW" in index_type:
+        faiss.downcast_index(index).hnsw.efSearch = hnsw_ef_search
+    
     logger.info(f"索引构建完成，包含{index.ntotal}个向量")
     return index
 
@@ -174,17 +225,21 @@ def save_data(data, embeddings, index, output_dir="data"):
     os.makedirs(output_dir, exist_ok=True)
     
     # 保存元数据
-    logger.info(f"正在保存元数据到 {output_dir}/metadata.json")
-    with open(os.path.join(output_dir, "metadata.json"), "w") as f:
+    logger.info(f"正在保存元数据到 {output_dir}/{METADATA_FILE}")
+    with open(os.path.join(output_dir, METADATA_FILE), "w") as f:
         json.dump(data, f)
     
+    # 保存列式元数据存储（服务端以mmap方式按FAISS行号读取）
+    logger.info(f"正在保存元数据存储到 {output_dir}/{METADATA_STORE_DIR}")
+    write_metadata_store(data, os.path.join(output_dir, METADATA_STORE_DIR))
+    
     # 保存嵌入向量
-    logger.info(f"正在保存嵌入向量到 {output_dir}/embeddings.npy")
-    np.save(os.path.join(output_dir, "embeddings.npy"), embeddings)
+    logger.info(f"正在保存嵌入向量到 {output_dir}/{EMBEDDINGS_FILE}")
+    np.save(os.path.join(output_dir, EMBEDDINGS_FILE), embeddings)
     
     # 保存索引
-    logger.info(f"正在保存FAISS索引到 {output_dir}/kodcode_index.faiss")
-    faiss.write_index(index, os.path.join(output_dir, "kodcode_index.faiss"))
+    logger.info(f"正在保存FAISS索引到 {output_dir}/{INDEX_FILE}")
+    faiss.write_index(index, os.path.join(output_dir, INDEX_FILE))
     
     logger.info("所有数据保存完成")
 
@@ -195,7 +250,21 @@ def main():
     parser.add_argument("--sample", type=int, default=None, help="样本大小")
     parser.add_argument("--model", type=str, default="sentence-transformers/all-mpnet-base-v2", help="向量模型")
     parser.add_argument("--batch-size", type=int, default=32, help="批处理大小")
-    parser.add_argument("--output-dir", type=str, default="data", help="输出目录")
+    parser.add_argument("--bundle-root", type=str, default="data/bundles", help="索引包根目录，每次构建生成一个新版本")
+    parser.add_argument(
+        "--publish", action="store_true",
+        help="构建完成后直接发布，仅用于LEXICAL_BACKEND=bm25（默认只构建，由es_indexer.py或bm25_indexer.py --publish发布）"
+    )
+    parser.add_argument("--no-publish", action="store_true", help=argparse.SUPPRESS)  # 兼容旧命令，默认即不发布
+    parser.add_argument("--keep", type=int, default=2, help="发布后保留的索引包版本数量")
+    parser.add_argument("--index-type", type=str, default="ivf-flat", choices=sorted(INDEX_TYPES), help="FAISS索引类型")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF倒排列表数量，默认根据语料规模自动选择")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF检索时探测的倒排列表数量，默认按目标召回率自动调优")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="nprobe调优的目标recall@10")
+    parser.add_argument("--pq-m", type=int, default=64, help="PQ子量化器数量")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW每个节点的邻居数")
+    parser.add_argument("--hnsw-ef-search", type=int, default=64, help="HNSW检索时的候选队列长度")
+    parser.add_argument("--eval-queries", type=int, default=1000, help="评估报告使用的查询数量，0表示不评估")
     args = parser.parse_args()
     
     try:
@@ -209,10 +278,67 @@ def main():
         embeddings = generate_embeddings(processed_data, args.model, args.batch_size)
         
         # 构建FAISS索引
-        index = build_faiss_index(embeddings)
+        nlist = args.nlist or choose_nlist(len(embeddings))
+        factory = index_factory_string(
+            args.index_type, embeddings.shape[1], nlist=nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m
+        )
+        index = build_faiss_index(embeddings, factory, hnsw_ef_search=args.hnsw_ef_search)
+        
+        # IVF索引：在留出查询上调优nprobe，并随索引一起保存
+        tuning = None
+        if "IVF" in factory:
+            if args.nprobe:
+                tuning = {"nprobe": args.nprobe, "target_recall": None}
+            else:
+                tuning = tune_nprobe(index, embeddings, target_recall=args.target_recall)
+            faiss.extract_index_ivf(index).nprobe = tuning["nprobe"]
+        
+        # 保存到新版本的索引包目录，运行中的服务继续使用旧版本的文件
+        digest = corpus_hash(processed_data)
+        version = new_version(digest)
+        bundle_dir = os.path.join(args.bundle_root, version)
+        save_data(processed_data, embeddings, index, bundle_dir)
+        
+        # 评估召回率、延迟与磁盘大小，写入索引清单
+        manifest = {
+            "version": version,
+            "corpus_hash": digest,
+            "index_type": args.index_type,
+            "factory": factory,
+            "dim": int(embeddings.shape[1]),
+            "ntotal": int(index.ntotal),
+            "model": args.model
+        }
+        if tuning is not None:
+            manifest["nlist"] = nlist
+            manifest["nprobe"] = tuning["nprobe"]
+            manifest["nprobe_tuning"] = tuning
+        if args.eval_queries > 0:
+            manifest["report"] = evaluate_index(
+                index,
+                embeddings,
+                index_path=os.path.join(bundle_dir, INDEX_FILE),
+                num_queries=args.eval_queries
+            )
+        
+        # 清单最后写入，存在即表示索引包构建完成
+        write_manifest(bundle_dir, manifest)
+        logger.info(f"索引包已保存到 {bundle_dir}")
         
-        # 保存数据
-        save_data(processed_data, embeddings, index, args.output_dir)
+        # 发布：更新CURRENT，运行中的服务在后台加载新索引包并切换
+        # 使用ES时新索引包必须与对应的ES索引一起发布（由es_indexer.py完成），否则FAISS与ES的语料不一致
+        lexical_backend = os.getenv("LEXICAL_BACKEND", "elasticsearch")
+        if args.publish and lexical_backend != "bm25" and not manifest.get("es_index"):
+            logger.error(
+                f"LEXICAL_BACKEND={lexical_backend}时不能在构建对应的ES索引之前发布，"
+                f"请运行 es_indexer.py --bundle {version}，由其发布索引包"
+            )
+        elif args.publish:
+            publish(args.bundle_root, version)
+            removed = prune(args.bundle_root, keep=args.keep)
+            logger.info(f"已发布索引包 {version}，清理旧版本: {removed}")
+        else:
+            logger.info(f"索引包 {version} 未发布，构建精确匹配索引后由es_indexer.py或bm25_indexer.py --publish发布")
         
         logger.info("向量化处理完成")
         
@@ -0,0 +1,24 @@
+"""
+Elasticsearch查询构建测试
+"""
+import os
+import sys
+
+# 直接引用模块文件，避免初始化整个app包
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+from es_queries import build_exact_query, build_knn_query
+
+
+def test_knn_filter_maps_technique_to_algorithm():
+    body = build_knn_query([0.1, 0.2], {"technique": "Recursion", "difficulty": "Easy"}, 10, 100, query="递归")
+    
+    assert {"term": {"algorithm": "Recursion"}} in body["knn"]["filter"]
+    assert {"term": {"difficulty": "Easy"}} in body["knn"]["filter"]
+    assert all("technique" not in clause["term"] for clause in body["knn"]["filter"])
+    assert body["query"]["bool"]["filter"] == body["knn"]["filter"]
+
+
+def test_exact_query_maps_technique_and_skips_empty_filters():
+    body = build_exact_query({"technique": "DynamicProgramming", "data_structure": None})
+    
+    assert body["query"]["bool"]["must"] == [{"term": {"algorithm": "DynamicProgramming"}}]
@@ -0,0 +1,51 @@
+"""
+检索结果融合测试：纯Python实现与NumPy实现的结果应逐位一致
+"""
+import os
+import random
+import sys
+
+import pytest
+
+# 直接引用模块文件，避免初始化整个app包
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app", "core", "matching"))
+import fusion
+
+
+def _random_results(rng, pool, count, decimals):
+    ids = rng.sample(pool, count)
+    # 得分保留少量小数以制造并列
+    scores = sorted((round(rng.uniform(-1, 30), decimals) for _ in range(count)), reverse=True)
+    return ids, scores
+
+
+def _fuse_both(monkeypatch, *args, **kwargs):
+    monkeypatch.setattr(fusion, "NUMPY_MIN_CANDIDATES", 10 ** 9)
+    small = fusion.fuse(*args, **kwargs)
+    monkeypatch.setattr(fusion, "NUMPY_MIN_CANDIDATES", 0)
+    large = fusion.fuse(*args, **kwargs)
+    return small, large
+
+
+@pytest.mark.parametrize("strategy", fusion.FUSION_STRATEGIES)
+def test_python_and_numpy_paths_match(monkeypatch, strategy):
+    rng = random.Random(strategy)
+    for _ in range(200):
+        pool = [f"q{i}" for i in range(rng.randint(1, 300))]
+        semantic = _random_results(rng, pool, rng.randint(0, len(pool)), rng.choice([1, 3, 12]))
+        exact = _random_results(rng, pool, rng.randint(0, len(pool)), rng.choice([1, 3, 12]))
+        top_k = rng.randint(1, 50)
+        
+        (small_positions, small_scores), (large_positions, large_scores) = _fuse_both(
+            monkeypatch, *semantic, *exact, top_k, strategy=strategy, rrf_k=rng.choice([1, 60])
+        )
+        
+        assert list(small_positions) == large_positions.tolist()
+        assert list(small_scores) == large_scores.tolist()
+
+
+@pytest.mark.parametrize("strategy", fusion.FUSION_STRATEGIES)
+def test_empty_inputs(monkeypatch, strategy):
+    (small_positions, _), (large_positions, _) = _fuse_both(monkeypatch, [], [], [], [], 10, strategy=strategy)
+    
+    assert list(small_positions) == [] and large_positions.tolist() == []